@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+MCP 目錄記憶體用量測量
+比較 json.load 產生的一般 dict 與 load_catalog 的 flyweight ServerRecord 常駐記憶體 (RSS 與 tracemalloc)
+"""
+
+import argparse
+import gc
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+
+if __package__ in (None, ""):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.catalog_generator import generate_catalog
+
+DEFAULT_SIZES = (1000, 10000)
+
+
+def _rss_bytes() -> int:
+    """目前常駐記憶體 (Linux 讀取 /proc，其他平台回傳 0)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def measure(path: str, mode: str) -> Dict:
+    """在獨立程序中載入目錄並回傳載入後保留的記憶體"""
+    import mcp_catalog
+
+    gc.collect()
+    rss_before = _rss_bytes()
+    tracemalloc.start()
+    if mode == "dict":
+        with open(path, "r", encoding="utf-8") as f:
+            catalog = json.load(f)
+        servers = catalog["servers"]
+    else:
+        servers = mcp_catalog.load_servers(path)
+        # 快照模式下記錄延遲解析，全部存取一次以比較完整載入後的用量
+        for server_id in servers:
+            servers[server_id]
+    gc.collect()
+    traced, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss_after = _rss_bytes()
+    return {"mode": mode, "servers": len(servers), "traced_bytes": traced,
+            "rss_bytes": max(rss_after - rss_before, 0)}
+
+
+def run(size: int) -> List[Dict]:
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        from mcp_catalog import write_catalog, write_snapshot
+
+        path = os.path.join(directory, "mcp_catalog.json")
+        catalog = generate_catalog(size)
+        write_catalog(catalog, path)
+        # 與 update_catalog 相同一併寫入快照，flyweight 模式經由快照逐筆載入
+        write_snapshot(catalog, path)
+        context = multiprocessing.get_context("spawn")
+        for mode in ("dict", "flyweight"):
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                results.append(pool.submit(measure, path, mode).result())
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MCP 目錄記憶體用量測量 (一般 dict 與 flyweight 記錄)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="合成目錄的服務器數量")
+    args = parser.parse_args()
+
+    print(f"{'服務器數':>8} {'模式':>10} {'tracemalloc/筆':>15} {'RSS 增量':>12}")
+    for size in args.sizes:
+        results = run(size)
+        for r in results:
+            print(f"{r['servers']:>8} {r['mode']:>10} {r['traced_bytes'] / r['servers']:>13.0f} B "
+                  f"{r['rss_bytes'] / (1024 * 1024):>9.1f} MB")
+        ratio = results[0]["traced_bytes"] / max(results[1]["traced_bytes"], 1)
+        print(f"{'':>8} 每筆記憶體降為原本的 1/{ratio:.1f}")
+
+
+if __name__ == "__main__":
+    main()
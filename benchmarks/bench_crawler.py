@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+MCP 爬蟲吞吐量基準測試
+對本機 Docker Hub 模擬器執行 crawl_all_servers，回報 repos/sec、請求延遲 p50/p99 與峰值 RSS
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+
+if __package__ in (None, ""):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.hub_emulator import DockerHubEmulator
+
+DEFAULT_SIZES = (100, 1000, 10000)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """最近排名法計算百分位數"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(int(round(pct / 100 * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 回報 KB，macOS 回報 bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_crawl(base_url: str, concurrent: bool, max_concurrency: int, rate: float) -> Dict:
+    """在獨立程序中執行一次爬取，峰值 RSS 只計入爬蟲本身"""
+    import asyncio
+
+    from mcp_docker_crawler import MCPDockerCrawler
+
+    logging.getLogger().setLevel(logging.WARNING)
+    crawler = MCPDockerCrawler(base_url=base_url, max_concurrency=max_concurrency, cache_dir=None,
+                               request_rate=rate, max_retries=8, registry_url=base_url)
+    latencies: List[float] = []
+    crawler.session.hooks["response"].append(
+        lambda response, *args, **kwargs: latencies.append(response.elapsed.total_seconds())
+    )
+
+    start = time.perf_counter()
+    if concurrent:
+        servers = asyncio.run(crawler.crawl_all_servers_async())
+    else:
+        servers = crawler.crawl_all_servers()
+    elapsed = time.perf_counter() - start
+
+    return {
+        "servers": len(servers),
+        "seconds": round(elapsed, 3),
+        "repos_per_sec": round(len(servers) / elapsed, 1) if elapsed else 0.0,
+        "requests": len(latencies),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+        "throttled": crawler.scheduler.throttled,
+        "retries": crawler.scheduler.retries,
+    }
+
+
+def benchmark(size: int, latency: float = 0.0, throttle_rate: float = 0.0, concurrent: bool = False,
+              max_concurrency: int = 8, rate: float = 1000.0) -> Dict:
+    """啟動模擬器並在全新的子程序中爬取指定數量的倉庫"""
+    with DockerHubEmulator(size, latency=latency, throttle_rate=throttle_rate) as emulator:
+        # 每個規模使用全新的 spawn 程序，避免前一輪的記憶體影響峰值 RSS
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+            result = pool.submit(run_crawl, emulator.base_url, concurrent, max_concurrency, rate).result()
+        result["repos"] = size
+        result["emulator_requests"] = emulator.stats["requests"]
+        return result
+
+
+def print_table(results: List[Dict]):
+    header = f"{'repos':>7} {'秒數':>8} {'repos/sec':>10} {'請求數':>8} {'p50 ms':>8} {'p99 ms':>8} {'RSS MB':>8} {'429':>5}"
+    print(header)
+    print("-" * len(header.encode("utf-8")))
+    for r in results:
+        print(f"{r['repos']:>7} {r['seconds']:>8.2f} {r['repos_per_sec']:>10.1f} {r['requests']:>8} "
+              f"{r['p50_ms']:>8.2f} {r['p99_ms']:>8.2f} {r['peak_rss_mb']:>8.1f} {r['throttled']:>5}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MCP 爬蟲吞吐量基準測試 (使用本機 Docker Hub 模擬器)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="要測試的倉庫數量")
+    parser.add_argument("--latency", type=float, default=0.0, help="模擬器每個請求的延遲秒數")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="模擬器回應 429 的比例 (0-1)")
+    parser.add_argument("--concurrent", action="store_true", help="使用 crawl_all_servers_async")
+    parser.add_argument("--max-concurrency", type=int, default=8, help="最大並行請求數")
+    parser.add_argument("--rate", type=float, default=1000.0, help="爬蟲每秒請求數上限")
+    parser.add_argument("--json", dest="json_output", help="將結果另存為 JSON 檔案")
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        print(f"爬取 {size} 個模擬倉庫...", file=sys.stderr)
+        results.append(benchmark(size, args.latency, args.throttle_rate, args.concurrent,
+                                 args.max_concurrency, args.rate))
+
+    print_table(results)
+    if args.json_output:
+        with open(args.json_output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+MCP 目錄載入路徑基準測試
+以合成目錄測量 GUI 的目錄載入、搜尋、多重篩選與配置生成在 100 / 1k / 10k / 100k 個服務器下的耗時，
+結果存為 JSON 基準並與上一次比較，任何指標退化超過容許範圍時以非零狀態結束
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+if __package__ in (None, ""):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_crawler import percentile
+from benchmarks.bench_search import DEFAULT_QUERIES
+from benchmarks.catalog_generator import generate_catalog
+
+DEFAULT_SIZES = (100, 1000, 10000, 100000)
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "load_path.json")
+DEFAULT_TOLERANCE = 0.25
+# 低於此差距 (ms) 的變化視為量測雜訊，不判定為退化
+MIN_REGRESSION_MS = 2.0
+# 配置生成選取的服務器數上限 (0 表示全選)；Docker Compose 以 PyYAML 輸出，10k 個服務器已需數秒
+DEFAULT_CONFIG_LIMIT = 10000
+CONFIG_PLATFORMS = ("claude", "vscode", "cursor", "docker_compose")
+# 多重篩選組合 (與 GUI 下拉選單相同的值)，搜尋字詞為空字串時只套用篩選
+FILTER_CASES = (
+    ("", {"security_level": "high"}),
+    ("", {"official": True, "category": "數據庫"}),
+    ("", {"docker_required": True, "popularity": "高", "security_level": "low"}),
+    ("server", {"category": "檔案系統"}),
+    ("git", {"official": True, "security_level": "medium"}),
+)
+
+
+class _Value:
+    """取代 Tk 變數的唯讀值，配置生成不需要建立視窗"""
+
+    def __init__(self, value):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+
+def _elapsed_ms(func: Callable, repeat: int = 1) -> float:
+    """執行 repeat 次取最短耗時；與 timeit 相同在計時期間停用 GC，降低量測雜訊"""
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            func()
+            best = min(best, (time.perf_counter() - start) * 1000)
+        finally:
+            gc.enable()
+    return best
+
+
+def _cold(func: Callable) -> Callable:
+    """每次執行前清除程序內的目錄快取，量測實際的載入成本"""
+    from mcp_catalog import clear_catalog_cache
+
+    def run():
+        clear_catalog_cache()
+        return func()
+    return run
+
+
+def measure_load(path: str, repeat: int) -> Dict[str, float]:
+    import mcp_docker_configurator
+    from mcp_catalog import clear_catalog_cache, stream_servers, write_snapshot
+
+    os.environ["MCP_CATALOG"] = path
+    result = {
+        "load_json_ms": _elapsed_ms(_cold(mcp_docker_configurator.load_mcp_servers_from_catalog), repeat),
+        "stream_first_row_ms": _elapsed_ms(_cold(lambda: next(stream_servers())), repeat),
+    }
+    with open(path, "r", encoding="utf-8") as f:
+        write_snapshot(json.load(f), path)
+    result["load_snapshot_ms"] = _elapsed_ms(_cold(mcp_docker_configurator.load_mcp_servers_from_catalog), repeat)
+    clear_catalog_cache()
+    return result
+
+
+def measure_search(servers) -> Dict[str, float]:
+    """與 populate_server_list 相同：每次輸入或篩選都計算選項數量並取出結果"""
+    from mcp_search import SearchIndex
+
+    start = time.perf_counter()
+    index = SearchIndex(servers)
+    result = {"index_build_ms": (time.perf_counter() - start) * 1000}
+
+    def populate(query: str, selected: Dict) -> float:
+        start = time.perf_counter()
+        index.facet_counts(query, selected)
+        index.filter(query, selected)
+        return (time.perf_counter() - start) * 1000
+
+    searches = [populate(query[:n], {}) for query in DEFAULT_QUERIES for n in range(1, len(query) + 1)]
+    filters = [populate(query, selected) for query, selected in FILTER_CASES]
+    result.update({
+        "search_p50_ms": percentile(searches, 50), "search_p99_ms": percentile(searches, 99),
+        "filter_p50_ms": percentile(filters, 50), "filter_p99_ms": max(filters),
+    })
+    return result
+
+
+def measure_configs(servers, limit: int, repeat: int) -> Dict[str, float]:
+    """以不建立視窗的配置器實例執行 generate_*_config (全選或選取前 limit 個服務器)"""
+    from mcp_docker_configurator import MCPDockerConfigurator
+
+    configurator = MCPDockerConfigurator.__new__(MCPDockerConfigurator)
+    selected = list(servers.items())[:limit] if limit else list(servers.items())
+    configurator.selected_servers = {server_id: info.copy() for server_id, info in selected}
+    configurator.env_entries = {}
+    configurator.security_vars = {"read_only": _Value(True), "no_privileges": _Value(True), "memory_limit": _Value("")}
+    configurator.memory_limit_var = _Value("512m")
+    configurator.cpu_limit_var = _Value("1.0")
+    result = {"config_servers": len(selected)}
+    for name in CONFIG_PLATFORMS:
+        result[f"config_{name}_ms"] = _elapsed_ms(getattr(configurator, f"generate_{name}_config"), repeat)
+    return result
+
+
+def run(size: int, repeat: int = 3, config_limit: int = DEFAULT_CONFIG_LIMIT) -> Dict:
+    from mcp_catalog import load_servers, write_catalog
+
+    result = {"servers": size}
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "mcp_catalog.json")
+        write_catalog(generate_catalog(size), path)
+        result.update(measure_load(path, repeat))
+        servers = load_servers(path)
+        result.update(measure_search(servers))
+        result.update(measure_configs(servers, config_limit, repeat))
+    return {key: round(value, 3) if isinstance(value, float) else value for key, value in result.items()}
+
+
+def compare(results: List[Dict], baseline: List[Dict], tolerance: float) -> List[str]:
+    """與基準比較各項耗時，回傳退化超過 tolerance (比例) 與 MIN_REGRESSION_MS 的項目"""
+    previous = {entry["servers"]: entry for entry in baseline}
+    regressions = []
+    for result in results:
+        base = previous.get(result["servers"])
+        if base is None:
+            continue
+        if base.get("config_servers") != result.get("config_servers"):
+            # 配置生成的選取數不同時無法比較
+            base = {key: value for key, value in base.items() if not key.startswith("config_")}
+        for metric, value in result.items():
+            if not metric.endswith("_ms") or metric not in base:
+                continue
+            before = base[metric]
+            if value > before * (1 + tolerance) and value - before > MIN_REGRESSION_MS:
+                regressions.append(f"{result['servers']:>7} 個服務器 {metric}: {before:.2f} → {value:.2f} ms "
+                                   f"(+{(value / before - 1) * 100 if before else float('inf'):.0f}%)")
+    return regressions
+
+
+def load_baseline(path: str) -> Optional[Dict]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def write_baseline(path: str, results: List[Dict]):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    baseline = {"python": platform.python_version(), "machine": platform.machine(), "results": results}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(baseline, f, indent=2, ensure_ascii=False)
+        f.write("\n")
+
+
+def print_table(results: List[Dict], baseline: Optional[List[Dict]] = None):
+    previous = {entry["servers"]: entry for entry in baseline or []}
+    metrics = [key for key in results[0] if key.endswith("_ms")]
+    print(f"{'指標':<24}" + "".join(f"{r['servers']:>16}" for r in results))
+    for metric in metrics:
+        cells = []
+        for r in results:
+            cell = f"{r[metric]:.2f}"
+            before = previous.get(r["servers"], {}).get(metric)
+            if before:
+                cell += f" ({(r[metric] / before - 1) * 100:+.0f}%)"
+            cells.append(f"{cell:>16}")
+        print(f"{metric:<24}" + "".join(cells))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MCP 目錄載入、搜尋、篩選與配置生成的規模基準測試")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="合成目錄的服務器數量")
+    parser.add_argument("--repeat", type=int, default=3, help="載入與配置生成的重複次數 (取最短)")
+    parser.add_argument("--config-limit", type=int, default=DEFAULT_CONFIG_LIMIT,
+                        help="配置生成選取的服務器數上限 (0 表示全選)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="基準 JSON 檔案")
+    parser.add_argument("--update-baseline", action="store_true", help="以本次結果覆寫基準")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="容許的退化比例 (0.25 = 25%%)")
+    parser.add_argument("--json", dest="json_output", help="將結果另存為 JSON 檔案")
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        print(f"測量 {size} 個服務器...", file=sys.stderr)
+        results.append(run(size, args.repeat, args.config_limit))
+
+    baseline = load_baseline(args.baseline)
+    print_table(results, baseline["results"] if baseline else None)
+    if args.json_output:
+        with open(args.json_output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+
+    if args.update_baseline:
+        write_baseline(args.baseline, results)
+        print(f"已更新基準: {args.baseline}")
+        return
+    if baseline is None:
+        print(f"找不到基準 {args.baseline}，以 --update-baseline 建立", file=sys.stderr)
+        return
+    if baseline.get("python") != platform.python_version():
+        print(f"注意：基準以 Python {baseline.get('python')} 產生，目前為 {platform.python_version()}", file=sys.stderr)
+    regressions = compare(results, baseline["results"], args.tolerance)
+    if regressions:
+        print(f"\n❌ 效能退化 (超過基準 {args.tolerance:.0%})：", file=sys.stderr)
+        for line in regressions:
+            print(f"  {line}", file=sys.stderr)
+        sys.exit(1)
+    print(f"\n✅ 所有指標都在基準的 {args.tolerance:.0%} 範圍內")
+
+
+if __name__ == "__main__":
+    main()
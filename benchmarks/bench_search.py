@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+MCP 服務器搜尋延遲測量
+比較逐筆掃描與三連字索引在合成目錄上的逐字輸入搜尋延遲 (一個畫面約 16 ms)，以及 BM25 排序前 k 筆的延遲
+"""
+
+import argparse
+import os
+import sys
+import time
+from typing import Dict, List
+
+if __package__ in (None, ""):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.catalog_generator import generate_catalog
+from benchmarks.bench_crawler import percentile
+
+DEFAULT_SIZES = (1000, 10000, 50000)
+# 模擬逐字輸入，每個前綴都是一次搜尋
+DEFAULT_QUERIES = ("filesystem", "postgres", "database", "server", "git")
+FRAME_BUDGET_MS = 16.0
+
+
+def scan(servers, query: str) -> List[str]:
+    """GUI 原本的逐筆比對"""
+    return [server_id for server_id, info in servers.items()
+            if any(query in str(text).lower() for text in [
+                server_id, info.get("name", ""), info.get("description", ""), info.get("category", ""),
+                info.get("popularity", ""), " ".join(info.get("use_cases", []))])]
+
+
+def run(size: int, queries=DEFAULT_QUERIES) -> Dict:
+    from mcp_search import SearchIndex
+
+    servers = generate_catalog(size)["servers"]
+    start = time.perf_counter()
+    index = SearchIndex(servers)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    prefixes = [query[:n] for query in queries for n in range(1, len(query) + 1)]
+    timings = {"scan": [], "index": [], "rank": []}
+    for prefix in prefixes:
+        start = time.perf_counter()
+        expected = scan(servers, prefix)
+        timings["scan"].append((time.perf_counter() - start) * 1000)
+        start = time.perf_counter()
+        found = index.search(prefix)
+        timings["index"].append((time.perf_counter() - start) * 1000)
+        assert found == expected, prefix
+        start = time.perf_counter()
+        ranked = index.ranked_search(prefix)
+        timings["rank"].append((time.perf_counter() - start) * 1000)
+        assert sorted(ranked) == sorted(expected), prefix
+    result = {"servers": size, "build_ms": round(build_ms, 1), "searches": len(prefixes)}
+    for mode, values in timings.items():
+        result[f"{mode}_p50_ms"] = round(percentile(values, 50), 2)
+        result[f"{mode}_p99_ms"] = round(percentile(values, 99), 2)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MCP 服務器搜尋延遲測量 (逐筆掃描與三連字索引)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="合成目錄的服務器數量")
+    args = parser.parse_args()
+
+    print(f"{'服務器數':>8} {'建索引 ms':>10} {'掃描 p50':>9} {'掃描 p99':>9} {'索引 p50':>9} {'索引 p99':>9} "
+          f"{'排序 p50':>9} {'排序 p99':>9}")
+    for size in args.sizes:
+        r = run(size)
+        within = "✓" if r["rank_p99_ms"] <= FRAME_BUDGET_MS else "✗"
+        print(f"{r['servers']:>8} {r['build_ms']:>10.1f} {r['scan_p50_ms']:>9.2f} {r['scan_p99_ms']:>9.2f} "
+              f"{r['index_p50_ms']:>9.2f} {r['index_p99_ms']:>9.2f} "
+              f"{r['rank_p50_ms']:>9.2f} {r['rank_p99_ms']:>9.2f} {within}")
+
+
+if __name__ == "__main__":
+    main()
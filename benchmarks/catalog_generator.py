@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+MCP 合成目錄產生器
+以 Docker Hub 模擬器的合成倉庫與爬蟲規則引擎產生任意大小、欄位與實際目錄相同的 mcp_catalog.json，
+並提供目錄結構驗證 (基準測試與測試共用)
+"""
+
+import argparse
+import os
+import random
+import sys
+from typing import Any, Dict, List, Mapping
+
+if __package__ in (None, ""):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.hub_emulator import BASE_LAYERS, _layer, generate_repositories
+
+# 服務器項目的必要欄位與型別 (與 mcp_catalog.json 現有項目相同)
+REQUIRED_FIELDS = {
+    "id": str, "name": str, "description": str, "category": str, "image": str,
+    "environment_vars": dict, "security_level": str, "docker_required": bool, "best_practices": dict,
+    "default_ports": list, "official": bool, "reference_url": str, "popularity": str, "use_cases": list,
+}
+# 選用欄位：爬蟲的 last_updated 與 registry manifest 探測結果
+OPTIONAL_FIELDS = {
+    "volumes": list, "last_updated": str, "image_digest": str, "compressed_size": int,
+    "layers": list, "architectures": list,
+}
+SECURITY_LEVELS = ("high", "medium", "low")
+POPULARITY_LEVELS = ("極高", "高", "中等", "低")
+# 有 manifest 資訊的服務器比例 (其餘如同 --no-manifests 爬取或映像不存在)
+MANIFEST_RATIO = 0.8
+GENERATED_AT = "2025-06-01T00:00:00"
+
+
+def _manifest_fields(name: str, rng: random.Random) -> Dict[str, Any]:
+    """與模擬器 registry 端點相同的層結構：共用基底層加上 1-3 個倉庫自有的層"""
+    layers = [_layer(f"{seed}-amd64", size) for seed, size in BASE_LAYERS]
+    layers += [_layer(f"{name}-amd64-{n}", rng.randint(1_000_000, 21_000_000)) for n in range(rng.randint(1, 3))]
+    layers = [{"digest": layer["digest"], "size": layer["size"]} for layer in layers]
+    return {
+        "image_digest": _layer(f"{name}-manifest", 0)["digest"],
+        "compressed_size": sum(layer["size"] for layer in layers),
+        "layers": layers,
+        "architectures": ["linux/amd64"] if rng.random() < 0.3 else ["linux/amd64", "linux/arm64/v8"],
+    }
+
+
+def generate_catalog(size: int, seed: int = 0) -> Dict:
+    """產生指定服務器數量的合成目錄 (不發出任何請求，相同 seed 結果相同)"""
+    from mcp_docker_crawler import MCPDockerCrawler
+
+    crawler = MCPDockerCrawler(cache_dir=None, registry_url=None)
+    rng = random.Random(seed)
+    servers = {}
+    for repo in generate_repositories(size, seed):
+        details = {"pull_count": repo["pull_count"]}
+        entry = crawler.to_catalog_entry(crawler.build_server_info(repo, details, repo["tags"]))
+        if rng.random() < MANIFEST_RATIO:
+            entry.update(_manifest_fields(entry["id"], rng))
+        servers[entry["id"]] = entry
+    return {
+        "version": "2.0.0",
+        "last_updated": GENERATED_AT,
+        "total_servers": len(servers),
+        "description": f"合成 MCP 服務器目錄 ({len(servers)} 個服務器，seed {seed})",
+        "revision": 1,
+        "servers": servers,
+    }
+
+
+def validate_server(server_id: str, entry: Mapping) -> List[str]:
+    """檢查單一服務器項目，回傳錯誤訊息列表"""
+    errors = []
+    for field, expected in list(REQUIRED_FIELDS.items()) + list(OPTIONAL_FIELDS.items()):
+        if field not in entry:
+            if field in REQUIRED_FIELDS:
+                errors.append(f"{server_id}: 缺少欄位 {field}")
+        elif not isinstance(entry[field], expected) or (expected is int and isinstance(entry[field], bool)):
+            errors.append(f"{server_id}: 欄位 {field} 應為 {expected.__name__}")
+    if errors:
+        return errors
+    if entry["id"] != server_id:
+        errors.append(f"{server_id}: id 與鍵不符 ({entry['id']})")
+    if entry["security_level"] not in SECURITY_LEVELS:
+        errors.append(f"{server_id}: 未知的安全級別 {entry['security_level']}")
+    if entry["popularity"] not in POPULARITY_LEVELS:
+        errors.append(f"{server_id}: 未知的熱門程度 {entry['popularity']}")
+    if not all(isinstance(value, str) for value in entry["use_cases"] + list(entry.get("volumes", []))):
+        errors.append(f"{server_id}: use_cases 與 volumes 只能包含字串")
+    if "layers" in entry and entry.get("compressed_size") != sum(layer["size"] for layer in entry["layers"]):
+        errors.append(f"{server_id}: compressed_size 與各層大小總和不符")
+    return errors
+
+
+def validate_catalog(catalog: Mapping) -> List[str]:
+    """檢查目錄結構，回傳錯誤訊息列表 (空列表表示通過)"""
+    servers = catalog.get("servers")
+    if not isinstance(servers, Mapping):
+        return ["目錄缺少 servers 物件"]
+    errors = []
+    if "total_servers" in catalog and catalog["total_servers"] != len(servers):
+        errors.append(f"total_servers 為 {catalog['total_servers']}，實際有 {len(servers)} 個服務器")
+    for server_id, entry in servers.items():
+        errors.extend(validate_server(server_id, entry))
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="產生合成 MCP 服務器目錄")
+    parser.add_argument("--size", type=int, default=1000, help="服務器數量")
+    parser.add_argument("--seed", type=int, default=0, help="亂數種子")
+    parser.add_argument("--output", default="synthetic_catalog.json", help="輸出的目錄檔案路徑")
+    parser.add_argument("--snapshot", action="store_true", help="同時寫入二進位目錄快照")
+    args = parser.parse_args()
+
+    from mcp_catalog import write_catalog, write_snapshot
+
+    catalog = generate_catalog(args.size, args.seed)
+    errors = validate_catalog(catalog)
+    if errors:
+        sys.exit("\n".join(errors))
+    write_catalog(catalog, args.output)
+    if args.snapshot:
+        write_snapshot(catalog, args.output)
+    print(f"已產生 {args.output} ({len(catalog['servers'])} 個服務器)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+本機 Docker Hub 模擬器
+實作 MCPDockerCrawler 使用的倉庫列表、詳細資訊與標籤端點，以及 registry:2 風格的 manifest / token 端點，
+可設定延遲與 429 注入比例
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+# 合成倉庫名稱使用的字詞，涵蓋爬蟲規則檔中的關鍵字
+NAME_WORDS = [
+    "filesystem", "github", "git", "postgres", "sqlite", "slack", "fetch", "time", "memory",
+    "sentry", "brave-search", "puppeteer", "gdrive", "everything", "redis", "kubernetes",
+    "notion", "jira", "weather", "maps", "docs", "browser", "shell", "aws", "stripe",
+]
+DESCRIPTION_WORDS = [
+    "MCP", "server", "for", "the", "API", "database", "file", "web", "knowledge", "graph",
+    "search", "monitor", "log", "date", "tools", "access", "with", "secure", "integration",
+]
+MAX_PAGE_SIZE = 100
+
+REGISTRY_TOKEN = "emulator-token"
+INDEX_MEDIA_TYPE = "application/vnd.oci.image.index.v1+json"
+OCI_MANIFEST_MEDIA_TYPE = "application/vnd.oci.image.manifest.v1+json"
+DOCKER_MANIFEST_MEDIA_TYPE = "application/vnd.docker.distribution.manifest.v2+json"
+LAYER_MEDIA_TYPE = "application/vnd.oci.image.layer.v1.tar+gzip"
+# 所有合成映像共用的基底層 (digest 種子, 大小)，用來測試拉取計畫的共用層去重
+BASE_LAYERS = [("base-os", 29_000_000), ("base-runtime", 12_000_000)]
+
+
+def _digest(data: bytes) -> str:
+    return "sha256:" + hashlib.sha256(data).hexdigest()
+
+
+def _layer(seed: str, size: int) -> Dict:
+    return {"mediaType": LAYER_MEDIA_TYPE, "digest": _digest(seed.encode("utf-8")), "size": size}
+
+
+def generate_repositories(count: int, seed: int = 0) -> List[Dict]:
+    """產生合成的 mcp 命名空間倉庫"""
+    rng = random.Random(seed)
+    repos = []
+    for i in range(count):
+        word = NAME_WORDS[i % len(NAME_WORDS)]
+        name = word if i < len(NAME_WORDS) else f"{word}-{i}"
+        description = " ".join(rng.choice(DESCRIPTION_WORDS) for _ in range(rng.randint(4, 12)))
+        repos.append({
+            "name": name,
+            "namespace": "mcp",
+            "description": description,
+            "last_updated": f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T00:00:00.000000Z",
+            "pull_count": int(rng.paretovariate(1.2) * 500),
+            "star_count": rng.randint(0, 500),
+            "tags": ["latest"] + [f"1.{n}.0" for n in range(rng.randint(0, 4))],
+        })
+    return repos
+
+
+class DockerHubEmulator:
+    """以背景執行緒提供 Docker Hub API 的模擬器"""
+
+    def __init__(self, repo_count: int = 100, latency: float = 0.0, throttle_rate: float = 0.0,
+                 retry_after: float = 0.0, seed: int = 0, host: str = "127.0.0.1", port: int = 0):
+        self.repos = generate_repositories(repo_count, seed)
+        self.repo_index = {repo["name"]: repo for repo in self.repos}
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "throttled": 0, "not_modified": 0,
+                      "tokens": 0, "manifest_heads": 0, "manifest_gets": 0}
+        self._registry_objects: Dict[str, Dict[str, Tuple[str, bytes]]] = {}
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> str:
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def _should_throttle(self) -> bool:
+        with self._lock:
+            self.stats["requests"] += 1
+            throttled = self._rng.random() < self.throttle_rate
+            if throttled:
+                self.stats["throttled"] += 1
+            return throttled
+
+    def route(self, path: str, query: Dict[str, List[str]]) -> Optional[Dict]:
+        """依路徑產生回應內容，找不到時回傳 None"""
+        prefix = "/v2/repositories/mcp/"
+        if not path.startswith(prefix):
+            return None
+        rest = path[len(prefix):]
+        if rest == "":
+            page = max(int(query.get("page", ["1"])[0]), 1)
+            page_size = min(max(int(query.get("page_size", ["10"])[0]), 1), MAX_PAGE_SIZE)
+            start = (page - 1) * page_size
+            results = [{k: v for k, v in repo.items() if k != "tags"} for repo in self.repos[start:start + page_size]]
+            next_url = None
+            if start + page_size < len(self.repos):
+                params = {k: v[0] for k, v in query.items()}
+                params["page"] = page + 1
+                next_url = f"{self.base_url}{prefix}?{urlencode(params)}"
+            return {"count": len(self.repos), "next": next_url, "previous": None, "results": results}
+
+        name, _, sub = rest.strip("/").partition("/")
+        repo = self.repo_index.get(name)
+        if repo is None:
+            return None
+        if sub == "":
+            return {k: v for k, v in repo.items() if k != "tags"}
+        if sub == "tags":
+            return {"count": len(repo["tags"]), "next": None,
+                    "results": [{"name": tag, "last_updated": repo["last_updated"]} for tag in repo["tags"]]}
+        return None
+
+    def registry_objects(self, name: str) -> Dict[str, Tuple[str, bytes]]:
+        """產生倉庫 latest 映像的 manifest 與 config blob (標籤或摘要 -> (media type, 內容))
+
+        每三個倉庫中有一個是單一架構映像，其餘為含 amd64 / arm64 與 attestation 的 OCI index
+        """
+        with self._lock:
+            cached = self._registry_objects.get(name)
+        if cached:
+            return cached
+
+        index = self.repos.index(self.repo_index[name])
+        objects: Dict[str, Tuple[str, bytes]] = {}
+        platforms = [("amd64", None)] if index % 3 == 2 else [("amd64", None), ("arm64", "v8")]
+        descriptors = []
+        for arch, variant in platforms:
+            platform = {"architecture": arch, "os": "linux"}
+            if variant:
+                platform["variant"] = variant
+            config = json.dumps(platform).encode("utf-8")
+            config_digest = _digest(config)
+            objects[config_digest] = ("application/vnd.oci.image.config.v1+json", config)
+            layers = [_layer(f"{seed}-{arch}", size) for seed, size in BASE_LAYERS]
+            layers += [_layer(f"{name}-{arch}-{n}", 1_000_000 + (index * 7919 + n * 104729) % 20_000_000)
+                       for n in range(1 + index % 3)]
+            media_type = DOCKER_MANIFEST_MEDIA_TYPE if len(platforms) == 1 else OCI_MANIFEST_MEDIA_TYPE
+            manifest = json.dumps({
+                "schemaVersion": 2,
+                "mediaType": media_type,
+                "config": {"mediaType": "application/vnd.oci.image.config.v1+json",
+                           "digest": config_digest, "size": len(config)},
+                "layers": layers,
+            }).encode("utf-8")
+            objects[_digest(manifest)] = (media_type, manifest)
+            descriptors.append({"mediaType": media_type, "digest": _digest(manifest),
+                                "size": len(manifest), "platform": platform})
+
+        if len(platforms) == 1:
+            objects["latest"] = objects[descriptors[0]["digest"]]
+        else:
+            descriptors.append({"mediaType": OCI_MANIFEST_MEDIA_TYPE, "digest": _digest(f"{name}-attestation".encode()),
+                                "size": 0, "platform": {"architecture": "unknown", "os": "unknown"}})
+            index_body = json.dumps({"schemaVersion": 2, "mediaType": INDEX_MEDIA_TYPE,
+                                     "manifests": descriptors}).encode("utf-8")
+            objects[_digest(index_body)] = (INDEX_MEDIA_TYPE, index_body)
+            objects["latest"] = objects[_digest(index_body)]
+
+        with self._lock:
+            self._registry_objects[name] = objects
+        return objects
+
+    def registry_route(self, method: str, path: str, query: Dict[str, List[str]],
+                       authorization: Optional[str]) -> Optional[Tuple[int, bytes, Dict[str, str]]]:
+        """registry v2 與 token 端點，非 registry 路徑回傳 None"""
+        if path == "/token":
+            with self._lock:
+                self.stats["tokens"] += 1
+            body = json.dumps({"token": REGISTRY_TOKEN, "expires_in": 300}).encode("utf-8")
+            return 200, body, {"Content-Type": "application/json"}
+
+        match = re.match(r"^/v2/(mcp/[^/]+)/(manifests|blobs)/([^/]+)$", path)
+        if not match:
+            return None
+        repository, kind, reference = match.groups()
+        if authorization != f"Bearer {REGISTRY_TOKEN}":
+            challenge = (f'Bearer realm="{self.base_url}/token",service="registry.emulator",'
+                         f'scope="repository:{repository}:pull"')
+            return 401, b'{"errors": [{"code": "UNAUTHORIZED"}]}', {"WWW-Authenticate": challenge,
+                                                                    "Content-Type": "application/json"}
+
+        name = repository.split("/", 1)[1]
+        if name not in self.repo_index:
+            return 404, b'{"errors": [{"code": "NAME_UNKNOWN"}]}', {"Content-Type": "application/json"}
+        found = self.registry_objects(name).get(reference)
+        if found is None:
+            return 404, b'{"errors": [{"code": "MANIFEST_UNKNOWN"}]}', {"Content-Type": "application/json"}
+        media_type, body = found
+        if kind == "manifests":
+            with self._lock:
+                self.stats["manifest_heads" if method == "HEAD" else "manifest_gets"] += 1
+        return 200, body, {"Content-Type": media_type, "Docker-Content-Digest": _digest(body)}
+
+    def _make_handler(self):
+        emulator = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # 標頭與內容分開寫出，關閉 Nagle 以免延遲 ACK 讓每個請求多出約 40ms
+            disable_nagle_algorithm = True
+
+            def _send(self, status: int, body: bytes = b"", headers: Optional[Dict[str, str]] = None):
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if body and self.command != "HEAD":
+                    self.wfile.write(body)
+
+            def do_HEAD(self):
+                self.do_GET()
+
+            def do_GET(self):
+                if emulator.latency:
+                    time.sleep(emulator.latency)
+                if emulator._should_throttle():
+                    self._send(429, b'{"detail": "Too Many Requests"}', {
+                        "Content-Type": "application/json",
+                        "Retry-After": str(emulator.retry_after),
+                        "X-RateLimit-Remaining": "0",
+                        "X-RateLimit-Reset": str(int(emulator.retry_after)),
+                    })
+                    return
+
+                parts = urlsplit(self.path)
+                registry = emulator.registry_route(self.command, parts.path, parse_qs(parts.query),
+                                                   self.headers.get("Authorization"))
+                if registry is not None:
+                    self._send(*registry)
+                    return
+
+                payload = emulator.route(parts.path, parse_qs(parts.query))
+                if payload is None:
+                    self._send(404, b'{"detail": "Not Found"}', {"Content-Type": "application/json"})
+                    return
+
+                body = json.dumps(payload).encode("utf-8")
+                etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+                if self.headers.get("If-None-Match") == etag:
+                    with emulator._lock:
+                        emulator.stats["not_modified"] += 1
+                    self._send(304, headers={"ETag": etag})
+                    return
+                self._send(200, body, {"Content-Type": "application/json", "ETag": etag})
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    """以獨立程序啟動模擬器"""
+    parser = argparse.ArgumentParser(description="本機 Docker Hub 模擬器")
+    parser.add_argument("--repos", type=int, default=100, help="合成倉庫數量")
+    parser.add_argument("--latency", type=float, default=0.0, help="每個請求的延遲秒數")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="回應 429 的比例 (0-1)")
+    parser.add_argument("--retry-after", type=float, default=0.0, help="429 回應的 Retry-After 秒數")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    emulator = DockerHubEmulator(args.repos, args.latency, args.throttle_rate, args.retry_after, port=args.port)
+    print(f"Docker Hub 模擬器運行於 {emulator.base_url} ({args.repos} 個倉庫)，Ctrl+C 結束")
+    try:
+        emulator._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        emulator._server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -7,9 +7,10 @@ MCP Docker 配置器功能演示腳本
 
 import tkinter as tk
 from tkinter import ttk, messagebox
-import json
 import os
 
+from mcp_catalog import load_catalog
+
 def demo_mcp_configurator():
     """演示 MCP Docker 配置器的功能"""
     
@@ -25,9 +26,8 @@ def demo_mcp_configurator():
     print("🚀 MCP Docker 配置器演示")
     print("=" * 60)
     
-    # 載入目錄檔案
-    with open('mcp_catalog.json', 'r', encoding='utf-8') as f:
-        catalog = json.load(f)
+    # 載入目錄檔案 (與 GUI 共用同一份已解析的快取)
+    catalog = load_catalog()
     
     print(f"📊 載入的 MCP 服務器統計：")
     print(f"   版本: {catalog.get('version', 'N/A')}")
@@ -0,0 +1,975 @@
+#!/usr/bin/env python3
+"""
+MCP 目錄存取模組
+mcp_catalog.json 的讀寫共用邏輯；load_catalog / load_servers 在整個程序內共用一份已解析的唯讀目錄
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+import tempfile
+import threading
+from dataclasses import dataclass, field
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Set, Tuple
+
+DEFAULT_CATALOG_FILE = "mcp_catalog.json"
+# 設定此環境變數可讓 GUI 等工具改讀其他目錄檔案 (例如 SQLite 目錄 mcp_catalog.db)
+CATALOG_PATH_ENV = "MCP_CATALOG"
+# 保留的 delta 數量；落後更多版本的讀取端改為重新載入完整目錄
+DEFAULT_DELTA_HISTORY = 100
+DELTA_FILE_PATTERN = re.compile(r"^(\d+)\.json$")
+
+
+class _HashingWriter:
+    """將 json.dump 的輸出寫入二進位檔案，同時計算 SHA-256"""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.hash = hashlib.sha256()
+
+    def write(self, text: str):
+        data = text.encode("utf-8")
+        self.hash.update(data)
+        self.raw.write(data)
+
+
+def file_sha256(path: str) -> Optional[str]:
+    """計算檔案的 SHA-256，檔案不存在時回傳 None"""
+    digest = hashlib.sha256()
+    try:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+    except FileNotFoundError:
+        return None
+    return digest.hexdigest()
+
+
+def _fsync_directory(directory: str):
+    """確保 rename 本身寫入磁碟 (不支援的平台略過)"""
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def write_catalog(catalog: Dict, path: str = DEFAULT_CATALOG_FILE) -> bool:
+    """串流寫入暫存檔、fsync 後原子替換目錄檔案
+
+    內容與現有檔案的雜湊相同時不替換檔案，回傳是否實際寫入。
+    servers 固定寫在最後，讀取端不必解析服務器即可取得 revision 等欄位 (read_catalog_revision)
+    """
+    if "servers" in catalog:
+        catalog = dict({key: value for key, value in catalog.items() if key != "servers"}, servers=catalog["servers"])
+    return _write_json_atomic(catalog, path, indent=2)
+
+
+def _write_json_atomic(data: Dict, path: str, indent: Optional[int]) -> bool:
+    def write_body(raw) -> str:
+        writer = _HashingWriter(raw)
+        json.dump(data, writer, indent=indent, ensure_ascii=False,
+                  separators=None if indent else (",", ":"))
+        return writer.hash.hexdigest()
+
+    return _write_atomic(path, write_body)
+
+
+def _write_atomic(path: str, write_body: Callable[[BinaryIO], Optional[str]]) -> bool:
+    """write_body 寫入暫存檔並回傳內容的 SHA-256 (回傳 None 表示不比對)，內容未變時略過替換"""
+    path = os.path.abspath(path)
+    directory = os.path.dirname(path)
+    fd, tmp_path = tempfile.mkstemp(prefix=".mcp_catalog.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w+b") as raw:
+            digest = write_body(raw)
+            raw.flush()
+            os.fsync(raw.fileno())
+
+        if digest is not None and digest == file_sha256(path):
+            os.unlink(tmp_path)
+            return False
+
+        # mkstemp 建立的檔案權限為 0600，沿用原檔權限讓 GUI 與其他使用者仍可讀取
+        try:
+            mode = os.stat(path).st_mode & 0o777
+        except FileNotFoundError:
+            umask = os.umask(0)
+            os.umask(umask)
+            mode = 0o666 & ~umask
+        os.chmod(tmp_path, mode)
+
+        os.replace(tmp_path, path)
+        _fsync_directory(directory)
+        return True
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def read_catalog(path: str = DEFAULT_CATALOG_FILE) -> Dict:
+    """讀取完整目錄檔案 (可修改的副本，供爬蟲等寫入端使用)"""
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class CatalogFormatError(ValueError):
+    """目錄檔案不是合法的 JSON 或結構無效"""
+
+
+class ReadOnlyDict(dict):
+    """唯讀的 dict：isinstance(x, dict) 與 json.dumps 照常運作，任何修改都會引發 TypeError
+
+    copy.copy / copy.deepcopy 會回傳可修改的一般 dict，需要編輯時請先複製
+    """
+
+    __slots__ = ()
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("目錄資料為唯讀，請先以 copy.deepcopy 複製後再修改")
+
+    __setitem__ = __delitem__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+    __ior__ = _readonly
+
+    def __copy__(self) -> Dict:
+        return dict(self)
+
+    def __deepcopy__(self, memo) -> Dict:
+        return {key: _thaw(value) for key, value in self.items()}
+
+    def __reduce__(self):
+        return (dict, (dict(self),))
+
+
+class ReadOnlyList(list):
+    """唯讀的 list，與一般 list 比較相等；切片與 copy 回傳可修改的一般 list"""
+
+    __slots__ = ()
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("目錄資料為唯讀，請先以 copy.deepcopy 複製後再修改")
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _readonly
+    append = extend = insert = pop = remove = clear = sort = reverse = _readonly
+
+    def __copy__(self) -> List:
+        return list(self)
+
+    def __deepcopy__(self, memo) -> List:
+        return [_thaw(item) for item in self]
+
+    def __reduce__(self):
+        return (list, (list(self),))
+
+
+def freeze(value: Any) -> Any:
+    """遞迴轉為唯讀結構 (ReadOnlyDict / ReadOnlyList)；已凍結的物件原樣回傳"""
+    if isinstance(value, (ReadOnlyDict, ReadOnlyList)):
+        return value
+    if isinstance(value, dict):
+        return ReadOnlyDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return ReadOnlyList(freeze(item) for item in value)
+    return value
+
+
+def _thaw(value: Any) -> Any:
+    if isinstance(value, Mapping):
+        return {key: _thaw(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_thaw(item) for item in value]
+    return value
+
+
+# 目錄服務器項目的已知欄位，ServerRecord 以 __slots__ 儲存；其他欄位放在 _extra
+SERVER_FIELDS = (
+    "id", "name", "description", "category", "image", "environment_vars", "volumes", "security_level",
+    "docker_required", "best_practices", "default_ports", "official", "reference_url", "popularity",
+    "use_cases", "last_updated", "image_digest", "compressed_size", "layers", "architectures",
+)
+_SERVER_FIELD_SET = frozenset(SERVER_FIELDS)
+
+
+class Interner:
+    """flyweight 池：相等的字串與子物件 (best_practices、cap_drop 等) 共用同一個凍結實例"""
+
+    def __init__(self):
+        self._pool: Dict[Any, Any] = {}
+
+    def intern(self, value: Any) -> Any:
+        if isinstance(value, str):
+            return self._pool.setdefault(value, value)
+        if isinstance(value, (ReadOnlyDict, ReadOnlyList, ServerRecord)):
+            return value
+        if isinstance(value, dict):
+            items = [(self.intern(k), self.intern(v)) for k, v in value.items()]
+            # 子物件已先行 intern，相等的子物件必為同一物件，以 id 組成鍵即可精確比對
+            key = (ReadOnlyDict, tuple((k, id(v)) for k, v in items))
+            shared = self._pool.get(key)
+            return shared if shared is not None else self._pool.setdefault(key, ReadOnlyDict(items))
+        if isinstance(value, list):
+            items = [self.intern(v) for v in value]
+            key = (ReadOnlyList, tuple(id(v) for v in items))
+            shared = self._pool.get(key)
+            return shared if shared is not None else self._pool.setdefault(key, ReadOnlyList(items))
+        return value
+
+    def intern_keys(self, keys: Iterable[str]) -> Tuple[str, ...]:
+        keys = tuple(self.intern(k) for k in keys)
+        return self._pool.setdefault((tuple, tuple(map(id, keys))), keys)
+
+    def __len__(self) -> int:
+        return len(self._pool)
+
+
+class ServerRecord(Mapping):
+    """以 __slots__ 儲存的唯讀服務器項目，行為如同 dict (比較、get、items)；copy() 回傳一般 dict"""
+
+    __slots__ = ("_keys", "_extra") + SERVER_FIELDS
+
+    def __init__(self, data: Mapping, interner: Optional[Interner] = None):
+        interner = interner if interner is not None else Interner()
+        setattr_ = object.__setattr__
+        extra = {}
+        for key, value in data.items():
+            value = interner.intern(value)
+            if key in _SERVER_FIELD_SET:
+                setattr_(self, key, value)
+            else:
+                extra[key] = value
+        setattr_(self, "_keys", interner.intern_keys(data.keys()))
+        setattr_(self, "_extra", ReadOnlyDict(extra) if extra else None)
+
+    def __setattr__(self, name, value):
+        raise TypeError("目錄資料為唯讀，請先以 copy.deepcopy 複製後再修改")
+
+    __delattr__ = __setattr__
+
+    def __getitem__(self, key: str) -> Any:
+        if key in _SERVER_FIELD_SET:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __eq__(self, other) -> bool:
+        # 逐欄比較取代 Mapping 預設的先轉成兩個 dict，重新載入比對整份目錄時不建立暫存物件
+        if not isinstance(other, ServerRecord):
+            return dict(self.items()) == dict(other.items()) if isinstance(other, Mapping) else NotImplemented
+        if self is other:
+            return True
+        if self._keys != other._keys and set(self._keys) != set(other._keys):
+            return False
+        return all(self[key] == other[key] for key in self._keys)
+
+    __hash__ = None
+
+    def copy(self) -> Dict:
+        return dict(self)
+
+    __copy__ = copy
+
+    def __deepcopy__(self, memo) -> Dict:
+        return _thaw(self)
+
+    def __reduce__(self):
+        return (dict, (dict(self),))
+
+    def __repr__(self) -> str:
+        return f"ServerRecord({dict(self)!r})"
+
+
+def freeze_catalog(catalog: Dict, interner: Optional[Interner] = None) -> ReadOnlyDict:
+    """凍結整份目錄：服務器項目轉為 ServerRecord，重複的子物件共用同一實例"""
+    interner = interner if interner is not None else Interner()
+    servers = catalog.get("servers", {})
+    # 快照與資料庫的服務器對照表 (非 dict 的 Mapping) 本身即為唯讀且延遲載入，保持原樣
+    if isinstance(servers, dict):
+        frozen_servers = ReadOnlyDict(
+            (server_id, entry if isinstance(entry, ServerRecord) else ServerRecord(entry, interner))
+            for server_id, entry in servers.items()
+        )
+    elif isinstance(servers, OverlayServers):
+        frozen_servers = servers.freeze(interner)
+    else:
+        frozen_servers = servers
+    return ReadOnlyDict((key, frozen_servers if key == "servers" else freeze(value))
+                        for key, value in catalog.items())
+
+
+def normalize_catalog(data: Any) -> Dict:
+    """統一新舊格式：新格式為含 servers 的 dict，舊格式為帶 id 的服務器列表"""
+    if isinstance(data, dict) and isinstance(data.get("servers"), dict):
+        return data
+    if isinstance(data, list):
+        servers = {server["id"]: server for server in data if isinstance(server, dict) and "id" in server}
+        if data and not servers:
+            raise CatalogFormatError("mcp_catalog.json 檔案格式錯誤：列表中的項目無效。")
+        return {"servers": servers, "total_servers": len(servers)}
+    raise CatalogFormatError("mcp_catalog.json 檔案格式錯誤：結構無效，預期為列表或包含 'servers' 鍵的字典。")
+
+
+SNAPSHOT_MAGIC = b"MCPSNAP1"
+SNAPSHOT_FORMAT = 1
+# magic, 格式版本, 服務器數, JSON 大小, JSON mtime_ns, JSON SHA-256, meta 位移/長度, 索引位移, 順序表位移
+_SNAPSHOT_HEADER = struct.Struct("<8sIIQq32sQQQQ")
+# 依 id 位元組排序的固定寬度索引：id 位移, id 長度, 記錄位移, 記錄長度
+_SNAPSHOT_INDEX = struct.Struct("<QIQI")
+_SNAPSHOT_ORDER = struct.Struct("<I")
+
+
+def default_snapshot_path(path: str = DEFAULT_CATALOG_FILE) -> str:
+    """mcp_catalog.json 的二進位快照為同目錄的 mcp_catalog.snapshot"""
+    return os.path.splitext(os.path.abspath(path))[0] + ".snapshot"
+
+
+def write_snapshot(catalog: Dict, json_path: str = DEFAULT_CATALOG_FILE,
+                   snapshot_path: Optional[str] = None) -> str:
+    """將目錄編譯為可 mmap 的二進位快照，並記錄對應 JSON 檔案的大小、mtime 與雜湊
+
+    每個服務器存為一筆緊湊 JSON 記錄，載入時只讀標頭，記錄在第一次存取時才解析
+    """
+    snapshot_path = snapshot_path or default_snapshot_path(json_path)
+    st = os.stat(json_path)
+    json_digest = bytes.fromhex(file_sha256(json_path))
+    servers = normalize_catalog(catalog)["servers"]
+    ids = list(servers)
+    meta = json.dumps({k: v for k, v in catalog.items() if k != "servers"},
+                      ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def write_body(raw) -> None:
+        raw.write(b"\0" * _SNAPSHOT_HEADER.size)
+        offset = _SNAPSHOT_HEADER.size
+        slots = []
+        for server_id in ids:
+            key = server_id.encode("utf-8")
+            record = json.dumps(servers[server_id], ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            raw.write(key)
+            raw.write(record)
+            slots.append((key, offset, offset + len(key), len(record)))
+            offset += len(key) + len(record)
+        raw.write(meta)
+        meta_offset = offset
+        offset += len(meta)
+
+        sorted_positions = sorted(range(len(ids)), key=lambda i: slots[i][0])
+        index_offset = offset
+        for i in sorted_positions:
+            key, key_offset, record_offset, record_length = slots[i]
+            raw.write(_SNAPSHOT_INDEX.pack(key_offset, len(key), record_offset, record_length))
+        # 順序表：依原目錄順序列出索引位置，迭代時維持 JSON 中的服務器順序
+        rank = {position: slot for slot, position in enumerate(sorted_positions)}
+        order_offset = index_offset + len(ids) * _SNAPSHOT_INDEX.size
+        raw.write(b"".join(_SNAPSHOT_ORDER.pack(rank[i]) for i in range(len(ids))))
+
+        raw.seek(0)
+        raw.write(_SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_FORMAT, len(ids), st.st_size, st.st_mtime_ns,
+                                        json_digest, meta_offset, len(meta), index_offset, order_offset))
+        return None
+
+    _write_atomic(snapshot_path, write_body)
+    return snapshot_path
+
+
+class SnapshotServers(Mapping):
+    """以 mmap 讀取快照的唯讀服務器對照表，記錄在第一次存取時才解析並凍結"""
+
+    def __init__(self, buffer, count: int, index_offset: int, order_offset: int):
+        self._buffer = buffer
+        self._count = count
+        self._index_offset = index_offset
+        self._order_offset = order_offset
+        self._records: Dict[str, ServerRecord] = {}
+        self._interner = Interner()
+
+    def _slot(self, position: int) -> Tuple[int, int, int, int]:
+        return _SNAPSHOT_INDEX.unpack_from(self._buffer, self._index_offset + position * _SNAPSHOT_INDEX.size)
+
+    def _key(self, position: int) -> bytes:
+        key_offset, key_length, _, _ = self._slot(position)
+        return self._buffer[key_offset:key_offset + key_length]
+
+    def _find(self, key: bytes) -> Optional[int]:
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._key(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self._count and self._key(low) == key:
+            return low
+        return None
+
+    def __getitem__(self, server_id: str) -> ServerRecord:
+        record = self._records.get(server_id)
+        if record is not None:
+            return record
+        position = self._find(server_id.encode("utf-8")) if isinstance(server_id, str) else None
+        if position is None:
+            raise KeyError(server_id)
+        _, _, record_offset, record_length = self._slot(position)
+        record = ServerRecord(json.loads(self._buffer[record_offset:record_offset + record_length].decode("utf-8")),
+                              self._interner)
+        self._records[server_id] = record
+        return record
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(self._count):
+            (position,) = _SNAPSHOT_ORDER.unpack_from(self._buffer, self._order_offset + i * _SNAPSHOT_ORDER.size)
+            yield self._key(position).decode("utf-8")
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, server_id) -> bool:
+        return server_id in self._records or (isinstance(server_id, str)
+                                              and self._find(server_id.encode("utf-8")) is not None)
+
+
+def open_snapshot(json_path: str = DEFAULT_CATALOG_FILE, snapshot_path: Optional[str] = None) -> Optional[ReadOnlyDict]:
+    """開啟與 JSON 檔案相符的快照，回傳唯讀目錄 (servers 為延遲解析的 SnapshotServers)
+
+    JSON 的大小與 mtime 都與快照記錄相同時直接採用；只有 mtime 不同時 (例如 checkout 或複製) 才比對雜湊。
+    快照不存在、格式不符或已過期時回傳 None
+    """
+    snapshot_path = snapshot_path or default_snapshot_path(json_path)
+    try:
+        with open(snapshot_path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    if len(buffer) < _SNAPSHOT_HEADER.size:
+        buffer.close()
+        return None
+    (magic, fmt, count, json_size, json_mtime_ns, json_digest,
+     meta_offset, meta_length, index_offset, order_offset) = _SNAPSHOT_HEADER.unpack_from(buffer, 0)
+    st = os.stat(json_path)
+    if (magic != SNAPSHOT_MAGIC or fmt != SNAPSHOT_FORMAT or st.st_size != json_size
+            or (st.st_mtime_ns != json_mtime_ns and file_sha256(json_path) != json_digest.hex())):
+        buffer.close()
+        return None
+
+    catalog = json.loads(buffer[meta_offset:meta_offset + meta_length].decode("utf-8"))
+    catalog["servers"] = SnapshotServers(buffer, count, index_offset, order_offset)
+    return freeze_catalog(catalog)
+
+
+def snapshot_is_current(json_path: str = DEFAULT_CATALOG_FILE, snapshot_path: Optional[str] = None) -> bool:
+    return open_snapshot(json_path, snapshot_path) is not None
+
+
+# 程序內共用的目錄快取：realpath -> ((mtime_ns, size), 唯讀目錄)
+_catalog_cache: Dict[str, Tuple[Tuple[int, int], ReadOnlyDict]] = {}
+_catalog_cache_lock = threading.Lock()
+
+
+def load_catalog(path: Optional[str] = None) -> ReadOnlyDict:
+    """載入並快取唯讀目錄
+
+    未指定路徑時使用 MCP_CATALOG 環境變數，預設為 mcp_catalog.json。
+    以 realpath + mtime + 大小判斷是否需要重新載入；需要載入時依序嘗試：
+    mmap 二進位快照 (成本與服務器數無關)、套用 delta 串、重新解析整份 JSON。
+    副檔名為 .db / .sqlite 時改以唯讀模式開啟 SQLite 目錄，服務器項目按需查詢。
+    找不到檔案時引發 FileNotFoundError，格式錯誤時引發 CatalogFormatError
+    """
+    real_path = os.path.realpath(path or os.environ.get(CATALOG_PATH_ENV, DEFAULT_CATALOG_FILE))
+    st = os.stat(real_path)
+    key = (st.st_mtime_ns, st.st_size)
+    with _catalog_cache_lock:
+        cached = _catalog_cache.get(real_path)
+        if cached and cached[0] == key:
+            return cached[1]
+
+        from mcp_catalog_store import is_store_path, open_store_catalog
+
+        if is_store_path(real_path):
+            catalog = open_store_catalog(real_path)
+            _catalog_cache[real_path] = (key, catalog)
+            return catalog
+
+        catalog = open_snapshot(real_path)
+        if catalog is None and cached and "revision" in cached[1]:
+            # 只有 delta 串剛好到達檔案的修訂時才採用 (爬蟲先寫 delta 再替換目錄，較新的 delta 略過)；
+            # delta 缺漏、手動編輯或寫入中斷時重新解析整份 JSON
+            revision = read_catalog_revision(real_path)
+            chain = load_delta_chain(default_delta_dir(real_path), catalog_revision(cached[1]))
+            chain = [delta for delta in chain or [] if revision is not None and delta["revision"] <= revision]
+            if chain and chain[-1]["revision"] == revision:
+                catalog = cached[1]
+                for delta in chain:
+                    catalog = freeze_catalog(apply_delta(catalog, delta))
+        if catalog is None:
+            try:
+                catalog = freeze_catalog(normalize_catalog(read_catalog(real_path)))
+            except json.JSONDecodeError as e:
+                raise CatalogFormatError("mcp_catalog.json 檔案格式錯誤！") from e
+        _catalog_cache[real_path] = (key, catalog)
+        return catalog
+
+
+def load_servers(path: Optional[str] = None) -> Mapping[str, Mapping]:
+    """載入目錄中的服務器 (id -> 唯讀服務器項目)"""
+    return load_catalog(path)["servers"]
+
+
+def clear_catalog_cache():
+    with _catalog_cache_lock:
+        _catalog_cache.clear()
+
+
+STREAM_CHUNK_SIZE = 64 * 1024
+_JSON_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+class _JsonStream:
+    """分段讀取檔案並以 raw_decode 逐個解析 JSON 值，緩衝區只保留尚未解析的部分"""
+
+    def __init__(self, f, chunk_size: int):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """下一個非空白字元 (不消耗)"""
+        while True:
+            self.pos = _JSON_WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                raise CatalogFormatError("mcp_catalog.json 檔案格式錯誤！檔案不完整。")
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise CatalogFormatError(f"mcp_catalog.json 檔案格式錯誤！預期為 '{char}'。")
+        self.pos += 1
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError as e:
+                if self._fill():
+                    continue
+                raise CatalogFormatError("mcp_catalog.json 檔案格式錯誤！") from e
+            # 數字、true 等沒有結尾符號的值可能剛好在緩衝區邊界被截斷
+            if end == len(self.buffer) and self._fill():
+                continue
+            self.pos = end
+            return value
+
+    def members(self, close: str) -> Iterator[None]:
+        """走訪物件或陣列的每個成員；呼叫端在每次產生時自行解析成員內容"""
+        if self.peek() == close:
+            self.pos += 1
+            return
+        while True:
+            yield
+            if self.peek() == ",":
+                self.pos += 1
+                continue
+            self.expect(close)
+            return
+
+
+def iter_catalog_items(f, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[Tuple[bool, str, Any]]:
+    """串流解析目錄檔案，產生 (是否為服務器, 鍵, 值)；每個服務器項目完整後立即產生
+
+    支援新格式 ({"servers": {...}, ...}) 與舊格式 (帶 id 的服務器列表)，結構無效時引發 CatalogFormatError
+    """
+    stream = _JsonStream(f, chunk_size)
+    if stream.peek() == "[":
+        stream.expect("[")
+        seen = found = 0
+        for _ in stream.members("]"):
+            server = stream.value()
+            seen += 1
+            if isinstance(server, dict) and "id" in server:
+                found += 1
+                yield True, server["id"], server
+        if seen and not found:
+            raise CatalogFormatError("mcp_catalog.json 檔案格式錯誤：列表中的項目無效。")
+        yield False, "total_servers", found
+        return
+
+    has_servers = False
+    if stream.peek() == "{":
+        stream.expect("{")
+        for _ in stream.members("}"):
+            key = stream.value()
+            stream.expect(":")
+            if key == "servers" and stream.peek() == "{":
+                has_servers = True
+                stream.expect("{")
+                for _ in stream.members("}"):
+                    server_id = stream.value()
+                    stream.expect(":")
+                    yield True, server_id, stream.value()
+            else:
+                yield False, key, stream.value()
+    if not has_servers:
+        raise CatalogFormatError("mcp_catalog.json 檔案格式錯誤：結構無效，預期為列表或包含 'servers' 鍵的字典。")
+
+
+def stream_servers(path: Optional[str] = None, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[Tuple[str, Mapping]]:
+    """逐筆產生目錄中的服務器 (id, 唯讀項目)，讓 GUI 不必等整份目錄解析完成即可顯示
+
+    已快取、可由快照 / delta / SQLite 快速載入時直接走訪 load_catalog 的結果；否則串流解析 JSON，
+    每個項目完整後立即凍結並產生，全部解析完成後放入 load_catalog 的快取。
+    找不到檔案時在呼叫當下引發 FileNotFoundError，格式錯誤在走訪途中引發 CatalogFormatError
+    """
+    from mcp_catalog_store import is_store_path
+
+    real_path = os.path.realpath(path or os.environ.get(CATALOG_PATH_ENV, DEFAULT_CATALOG_FILE))
+    st = os.stat(real_path)
+    key = (st.st_mtime_ns, st.st_size)
+    with _catalog_cache_lock:
+        cached = _catalog_cache.get(real_path)
+    if cached or is_store_path(real_path) or snapshot_is_current(real_path):
+        return iter(load_catalog(real_path)["servers"].items())
+    return _stream_json_servers(real_path, key, chunk_size)
+
+
+def _stream_json_servers(real_path: str, key: Tuple[int, int], chunk_size: int) -> Iterator[Tuple[str, Mapping]]:
+    interner = Interner()
+    meta: Dict[str, Any] = {}
+    servers: Dict[str, ServerRecord] = {}
+    with open(real_path, "r", encoding="utf-8") as f:
+        for is_server, name, value in iter_catalog_items(f, chunk_size):
+            if not is_server:
+                meta[name] = value
+                continue
+            if not isinstance(value, dict):
+                raise CatalogFormatError(f"mcp_catalog.json 檔案格式錯誤：服務器 {name} 的項目無效。")
+            record = servers[name] = ServerRecord(value, interner)
+            yield name, record
+    meta["servers"] = servers
+    catalog = freeze_catalog(meta, interner)
+    # 解析期間檔案被替換時不放入快取，下次 load_catalog 會重新載入
+    st = os.stat(real_path)
+    if (st.st_mtime_ns, st.st_size) == key:
+        with _catalog_cache_lock:
+            _catalog_cache.setdefault(real_path, (key, catalog))
+
+
+def read_catalog_revision(path: str) -> Optional[int]:
+    """只解析 servers 之前的頂層欄位取得檔案的修訂號；revision 在 servers 之後、不存在或格式無效時回傳 None"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for is_server, name, value in iter_catalog_items(f):
+                if is_server:
+                    return None
+                if name == "revision":
+                    return int(value)
+    except (CatalogFormatError, TypeError, ValueError):
+        return None
+    return None
+
+
+def catalog_revision(catalog: Dict) -> int:
+    """目錄修訂號，每次內容變更遞增；舊版目錄沒有此欄位時視為 0"""
+    return int(catalog.get("revision", 0))
+
+
+def default_delta_dir(path: str = DEFAULT_CATALOG_FILE) -> str:
+    """mcp_catalog.json 的 delta 存放在同目錄的 mcp_catalog.deltas/"""
+    return os.path.splitext(os.path.abspath(path))[0] + ".deltas"
+
+
+def _diff_fields(old: Dict, new: Dict) -> Dict:
+    return {
+        "set": {k: v for k, v in new.items() if k not in old or old[k] != v},
+        "unset": [k for k in old if k not in new],
+    }
+
+
+def compute_delta(old: Dict, new: Dict) -> Dict:
+    """計算兩版目錄之間的 delta：新增 / 移除的服務器與變更服務器的欄位級修補"""
+    old_servers = old.get("servers", {})
+    new_servers = new.get("servers", {})
+    changed = {}
+    for server_id, entry in new_servers.items():
+        previous = old_servers.get(server_id)
+        if previous is not None and previous != entry:
+            changed[server_id] = _diff_fields(previous, entry)
+    return {
+        "base_revision": catalog_revision(old),
+        "revision": catalog_revision(new),
+        "catalog": _diff_fields({k: v for k, v in old.items() if k != "servers"},
+                                {k: v for k, v in new.items() if k != "servers"}),
+        "added": {server_id: entry for server_id, entry in new_servers.items() if server_id not in old_servers},
+        "removed": [server_id for server_id in old_servers if server_id not in new_servers],
+        "changed": changed,
+    }
+
+
+def diff_servers(old: Mapping[str, Mapping], new: Mapping[str, Mapping]) -> Tuple[List[str], List[str], List[str]]:
+    """比較兩份服務器對照表，回傳 (新增, 移除, 變更) 的 id，新增與變更依新目錄順序排列
+
+    套用 delta 載入的目錄中未變更的項目與舊目錄為同一物件，不需逐欄比較
+    """
+    added, changed = [], []
+    seen = set()
+    for server_id, entry in new.items():
+        seen.add(server_id)
+        previous = old.get(server_id)
+        if previous is None:
+            added.append(server_id)
+        elif previous is not entry and previous != entry:
+            changed.append(server_id)
+    removed = [server_id for server_id in old if server_id not in seen]
+    return added, removed, changed
+
+
+def catalog_changes(old: Mapping, new: Mapping, path: Optional[str] = None) -> Tuple[List[str], List[str], List[str]]:
+    """兩版目錄之間 (新增, 移除, 變更) 的服務器 id
+
+    兩版之間有連續的 delta 串時只查看 delta 提到的 id，成本與變更量成正比 (快照目錄也不必解析未變更的記錄)；
+    沒有修訂號或 delta 串中斷時改以 diff_servers 逐筆比較
+    """
+    old_servers, new_servers = old.get("servers", {}), new.get("servers", {})
+    if "revision" not in old or "revision" not in new:
+        return diff_servers(old_servers, new_servers)
+    new_revision = catalog_revision(new)
+    if catalog_revision(old) == new_revision:
+        return [], [], []
+    path = path or os.environ.get(CATALOG_PATH_ENV, DEFAULT_CATALOG_FILE)
+    chain = load_delta_chain(default_delta_dir(path), catalog_revision(old))
+    chain = [delta for delta in chain or [] if delta["revision"] <= new_revision]
+    if not chain or chain[-1]["revision"] != new_revision:
+        return diff_servers(old_servers, new_servers)
+    touched: Dict[str, None] = {}
+    for delta in chain:
+        for server_id in (*delta.get("added", {}), *delta.get("removed", []), *delta.get("changed", {})):
+            touched[server_id] = None
+    added, removed, changed = [], [], []
+    for server_id in touched:
+        if server_id not in new_servers:
+            if server_id in old_servers:
+                removed.append(server_id)
+        else:
+            (changed if server_id in old_servers else added).append(server_id)
+    return added, removed, changed
+
+
+def _apply_fields(target: Dict, patch: Dict) -> Dict:
+    patched = dict(target)
+    patched.update(patch.get("set", {}))
+    for key in patch.get("unset", []):
+        patched.pop(key, None)
+    return patched
+
+
+class OverlayServers(Mapping):
+    """唯讀的寫入時複製服務器對照表：基底 (dict 或延遲載入的快照) 加上 delta 新增或變更的項目、減去移除的項目，
+    套用 delta 的成本與變更量成正比；順序與對 dict 套用相同 (新增與重新加入的項目排在最後)"""
+
+    def __init__(self, base: Mapping, upserts: Dict[str, Mapping], removed: Set[str]):
+        self.base = base
+        self.upserts = upserts
+        self.removed = removed  # 基底中已移除的 id (重新加入時仍保留，項目放在 upserts)
+        self._extra = [server_id for server_id in upserts if server_id in removed or server_id not in base]
+
+    def __getitem__(self, server_id: str) -> Mapping:
+        if server_id in self.upserts:
+            return self.upserts[server_id]
+        if server_id in self.removed:
+            raise KeyError(server_id)
+        return self.base[server_id]
+
+    def __contains__(self, server_id) -> bool:
+        return server_id in self.upserts or (server_id not in self.removed and server_id in self.base)
+
+    def __iter__(self) -> Iterator[str]:
+        for server_id in self.base:
+            if server_id not in self.removed:
+                yield server_id
+        yield from self._extra
+
+    def __len__(self) -> int:
+        return len(self.base) - len(self.removed) + len(self._extra)
+
+    def freeze(self, interner: Interner) -> "OverlayServers":
+        upserts = {server_id: entry if isinstance(entry, ServerRecord) else ServerRecord(entry, interner)
+                   for server_id, entry in self.upserts.items()}
+        return OverlayServers(self.base, upserts, self.removed)
+
+
+def _apply_server_changes(servers: Mapping, delta: Dict) -> Mapping:
+    # 不複製基底，只記錄變更 (連續套用時沿用同一個基底)，凍結時也只需轉換變更的項目
+    if isinstance(servers, OverlayServers):
+        base, upserts, removed = servers.base, dict(servers.upserts), set(servers.removed)
+    else:
+        base, upserts, removed = servers, {}, set()
+    for server_id in delta.get("removed", []):
+        upserts.pop(server_id, None)
+        if server_id in base:
+            removed.add(server_id)
+    for server_id, patch in delta.get("changed", {}).items():
+        current = upserts.get(server_id)
+        if current is None:
+            current = {} if server_id in removed else base.get(server_id, {})
+        upserts[server_id] = _apply_fields(current, patch)
+    upserts.update(delta.get("added", {}))
+    return OverlayServers(base, upserts, removed)
+
+
+def apply_delta(catalog: Dict, delta: Dict) -> Dict:
+    """將 delta 套用到目錄，回傳新目錄 (不修改傳入的目錄，未變更的服務器項目共用同一物件)"""
+    if catalog_revision(catalog) != delta["base_revision"]:
+        raise ValueError(f"delta 基於修訂 {delta['base_revision']}，目錄為修訂 {catalog_revision(catalog)}")
+    servers = _apply_server_changes(catalog.get("servers", {}), delta)
+    updated = _apply_fields({k: v for k, v in catalog.items() if k != "servers"}, delta.get("catalog", {}))
+    updated["servers"] = servers
+    updated["revision"] = delta["revision"]
+    return updated
+
+
+def list_delta_revisions(delta_dir: str) -> List[int]:
+    """delta 目錄中所有 delta 的修訂號 (遞增排序)"""
+    try:
+        names = os.listdir(delta_dir)
+    except FileNotFoundError:
+        return []
+    return sorted(int(m.group(1)) for m in map(DELTA_FILE_PATTERN.match, names) if m)
+
+
+def write_delta(delta: Dict, delta_dir: str, history: int = DEFAULT_DELTA_HISTORY):
+    """以原子方式寫入 <revision>.json，並刪除超出保留數量的舊 delta"""
+    os.makedirs(delta_dir, exist_ok=True)
+    _write_json_atomic(delta, os.path.join(delta_dir, f"{delta['revision']}.json"), indent=None)
+    revisions = list_delta_revisions(delta_dir)
+    for revision in revisions[:max(len(revisions) - history, 0)]:
+        try:
+            os.unlink(os.path.join(delta_dir, f"{revision}.json"))
+        except FileNotFoundError:
+            pass
+
+
+def load_delta_chain(delta_dir: str, from_revision: int) -> Optional[List[Dict]]:
+    """讀取 from_revision 之後連續的 delta；缺少任一版本 (已被清除或尚未寫入) 時回傳 None"""
+    chain = []
+    expected = from_revision
+    for revision in list_delta_revisions(delta_dir):
+        if revision <= from_revision:
+            continue
+        try:
+            with open(os.path.join(delta_dir, f"{revision}.json"), "r", encoding="utf-8") as f:
+                delta = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if delta.get("base_revision") != expected:
+            return None
+        chain.append(delta)
+        expected = delta["revision"]
+    return chain
+
+
+def refresh_catalog(cached: Optional[Dict], path: str = DEFAULT_CATALOG_FILE,
+                    delta_dir: Optional[str] = None) -> Dict:
+    """以 delta 串將快取目錄更新到最新修訂
+
+    只讀取快取修訂之後的 delta，成本與變更量成正比；沒有快取或 delta 串中斷時重新讀取完整目錄
+    """
+    delta_dir = delta_dir or default_delta_dir(path)
+    if cached is None or not os.path.isdir(delta_dir):
+        return read_catalog(path)
+    chain = load_delta_chain(delta_dir, catalog_revision(cached))
+    if chain is None:
+        return read_catalog(path)
+    catalog = cached
+    for delta in chain:
+        catalog = apply_delta(catalog, delta)
+    return catalog
+
+
+@dataclass
+class ImagePull:
+    """安裝計畫中的一次 docker pull"""
+    image: str
+    server_names: List[str]
+    compressed_size: Optional[int] = None
+    new_bytes: Optional[int] = None  # 扣除計畫中較早映像已下載的共用層後，實際需下載的位元組
+    layers: List[Dict] = field(default_factory=list)
+
+
+def plan_image_pulls(servers: Iterable[Dict]) -> List[ImagePull]:
+    """合併重複映像並排定拉取順序
+
+    同一映像只拉取一次；有 manifest 資訊的映像依「扣除已下載共用層後的大小」由小到大貪婪排序，
+    讓進度盡早推進且共用層只計算一次；沒有大小資訊的映像維持原順序排在最後
+    """
+    pulls: Dict[str, ImagePull] = {}
+    for info in servers:
+        image = info.get("image")
+        if not image:
+            continue
+        if image in pulls:
+            pulls[image].server_names.append(info.get("name", image))
+            continue
+        pulls[image] = ImagePull(image, [info.get("name", image)], info.get("compressed_size"),
+                                 layers=list(info.get("layers") or []))
+
+    sized = [pull for pull in pulls.values() if pull.layers]
+    unsized = [pull for pull in pulls.values() if not pull.layers]
+
+    plan: List[ImagePull] = []
+    downloaded = set()
+    while sized:
+        for pull in sized:
+            pull.new_bytes = sum(layer["size"] for layer in pull.layers if layer["digest"] not in downloaded)
+        best = min(sized, key=lambda pull: pull.new_bytes)
+        sized.remove(best)
+        downloaded.update(layer["digest"] for layer in best.layers)
+        plan.append(best)
+    return plan + unsized
+
+
+def total_download_bytes(plan: Iterable[ImagePull]) -> Optional[int]:
+    """計畫的總下載量；任一映像缺少大小資訊時回傳 None"""
+    total = 0
+    for pull in plan:
+        if pull.new_bytes is None:
+            return None
+        total += pull.new_bytes
+    return total
+
+
+def format_size(size: Optional[int]) -> str:
+    """以 MB / KB 顯示位元組數"""
+    if size is None:
+        return "未知大小"
+    if size >= 1024 * 1024:
+        return f"{size / (1024 * 1024):.1f} MB"
+    return f"{size / 1024:.1f} KB"
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+MCP 目錄 SQLite 儲存
+可選的目錄儲存後端：服務器項目一列一筆，依 id 與目錄順序建有索引；
+爬蟲以批次交易 upsert 寫入，GUI 經由 mcp_catalog.load_catalog 以與 JSON 檔案相同的介面讀取
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+from mcp_catalog import CatalogFormatError, Interner, ReadOnlyDict, ServerRecord, freeze_catalog
+
+STORE_SUFFIXES = (".db", ".sqlite", ".sqlite3")
+SCHEMA_VERSION = 1
+DEFAULT_BATCH_SIZE = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS servers (
+    id TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS servers_position ON servers (position);
+"""
+
+# 內容與順序都未變的列不改寫，重新寫入相同目錄時資料庫檔案保持不變
+_UPSERT = """
+INSERT INTO servers (id, position, data) VALUES (?, ?, ?)
+ON CONFLICT (id) DO UPDATE SET position = excluded.position, data = excluded.data
+WHERE servers.data != excluded.data OR servers.position != excluded.position
+"""
+
+_UPSERT_META = """
+INSERT INTO meta (key, value) VALUES (?, ?)
+ON CONFLICT (key) DO UPDATE SET value = excluded.value WHERE meta.value != excluded.value
+"""
+
+
+def is_store_path(path: str) -> bool:
+    return path.lower().endswith(STORE_SUFFIXES)
+
+
+def _chunks(items: List, size: int) -> Iterator[List]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _server_row(server_id: str, position: int, entry: Mapping) -> Tuple:
+    return server_id, position, json.dumps(dict(entry), ensure_ascii=False, separators=(",", ":"))
+
+
+class CatalogStore:
+    """SQLite 目錄儲存；read_only 時以唯讀模式開啟，檔案不存在時引發 FileNotFoundError"""
+
+    def __init__(self, path: str, read_only: bool = False):
+        self.path = path
+        if read_only:
+            if not os.path.exists(path):
+                raise FileNotFoundError(path)
+            uri = "file:" + os.path.abspath(path).replace("?", "%3f").replace("#", "%23") + "?mode=ro"
+            self._conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        else:
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            with self._conn:
+                self._conn.executescript(_SCHEMA)
+                self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        # GUI 安裝流程在背景執行緒讀取，共用連線需自行加鎖
+        self._lock = threading.Lock()
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self) -> "CatalogStore":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _query(self, sql: str, params: Iterable = ()) -> List[Tuple]:
+        with self._lock:
+            return self._conn.execute(sql, tuple(params)).fetchall()
+
+    # 寫入
+    def upsert_servers(self, entries: Mapping[str, Mapping], batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+        """在單一交易中分批 upsert 服務器項目 (既有項目保留順序，新項目排在最後)，回傳實際變更的列數"""
+        items = list(entries.items())
+        with self._lock, self._conn:
+            next_position = self._conn.execute("SELECT COALESCE(MAX(position), -1) + 1 FROM servers").fetchone()[0]
+            changed = 0
+            for batch in _chunks(items, batch_size):
+                placeholders = ", ".join("?" * len(batch))
+                positions = dict(self._conn.execute(
+                    f"SELECT id, position FROM servers WHERE id IN ({placeholders})", [server_id for server_id, _ in batch]))
+                rows = []
+                for server_id, entry in batch:
+                    if server_id not in positions:
+                        positions[server_id] = next_position
+                        next_position += 1
+                    rows.append(_server_row(server_id, positions[server_id], entry))
+                changed += self._upsert_rows(rows, batch_size)
+            return changed
+
+    def _upsert_rows(self, rows: List[Tuple], batch_size: int) -> int:
+        changed = 0
+        for batch in _chunks(rows, batch_size):
+            changed += self._conn.executemany(_UPSERT, batch).rowcount
+        return changed
+
+    def delete_servers(self, server_ids: Iterable[str], batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+        ids = [(server_id,) for server_id in server_ids]
+        with self._lock, self._conn:
+            return self._delete_rows(ids, batch_size)
+
+    def _delete_rows(self, ids: List[Tuple[str]], batch_size: int) -> int:
+        deleted = 0
+        for batch in _chunks(ids, batch_size):
+            deleted += self._conn.executemany("DELETE FROM servers WHERE id = ?", batch).rowcount
+        return deleted
+
+    def write_catalog(self, catalog: Mapping, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+        """將整份目錄同步到資料庫 (單一交易)：新增或變更的列 upsert、移除的列刪除，回傳變更列數"""
+        servers = catalog.get("servers", {})
+        rows = [_server_row(server_id, i, entry) for i, (server_id, entry) in enumerate(servers.items())]
+        meta = [(key, json.dumps(value, ensure_ascii=False)) for key, value in catalog.items() if key != "servers"]
+        with self._lock, self._conn:
+            removed = [(server_id,) for (server_id,) in self._conn.execute("SELECT id FROM servers")
+                       if server_id not in servers]
+            changed = self._upsert_rows(rows, batch_size) + self._delete_rows(removed, batch_size)
+            self._conn.executemany(_UPSERT_META, meta)
+            stale = [(key,) for (key,) in self._conn.execute("SELECT key FROM meta") if key not in catalog]
+            self._conn.executemany("DELETE FROM meta WHERE key = ?", stale)
+        return changed
+
+    # 讀取
+    def meta(self) -> Dict[str, Any]:
+        return {key: json.loads(value) for key, value in self._query("SELECT key, value FROM meta")}
+
+    def count(self) -> int:
+        return self._query("SELECT COUNT(*) FROM servers")[0][0]
+
+    def ids(self) -> List[str]:
+        return [row[0] for row in self._query("SELECT id FROM servers ORDER BY position")]
+
+    def get(self, server_id: str) -> Optional[Dict]:
+        rows = self._query("SELECT data FROM servers WHERE id = ?", (server_id,))
+        return json.loads(rows[0][0]) if rows else None
+
+    def iter_rows(self, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[Tuple[str, Dict]]:
+        """依目錄順序分批讀出全部項目 (以 position 續查，不重複掃描前面的列)"""
+        position = -1
+        while True:
+            rows = self._query("SELECT id, data, position FROM servers WHERE position > ? ORDER BY position LIMIT ?",
+                               (position, batch_size))
+            for server_id, data, position in rows:
+                yield server_id, json.loads(data)
+            if len(rows) < batch_size:
+                return
+
+
+class StoreServers(Mapping):
+    """以 SQLite 查詢的唯讀服務器對照表；項目在第一次存取時才讀取並凍結"""
+
+    def __init__(self, store: CatalogStore):
+        self._store = store
+        self._ids: Optional[List[str]] = None
+        self._records: Dict[str, ServerRecord] = {}
+        self._interner = Interner()
+
+    def _record(self, server_id: str, entry: Dict) -> ServerRecord:
+        record = self._records.get(server_id)
+        if record is None:
+            record = self._records[server_id] = ServerRecord(entry, self._interner)
+        return record
+
+    def __getitem__(self, server_id: str) -> ServerRecord:
+        record = self._records.get(server_id)
+        if record is not None:
+            return record
+        entry = self._store.get(server_id) if isinstance(server_id, str) else None
+        if entry is None:
+            raise KeyError(server_id)
+        return self._record(server_id, entry)
+
+    def __iter__(self) -> Iterator[str]:
+        if self._ids is None:
+            self._ids = self._store.ids()
+        return iter(self._ids)
+
+    def __len__(self) -> int:
+        return len(self._ids) if self._ids is not None else self._store.count()
+
+    def __contains__(self, server_id) -> bool:
+        return server_id in self._records or (isinstance(server_id, str) and self._store.get(server_id) is not None)
+
+    def items(self) -> Iterator[Tuple[str, ServerRecord]]:
+        """逐批讀取全部項目 (建立搜尋索引等需要完整掃描時使用)，避免每筆各查詢一次"""
+        for server_id, entry in self._store.iter_rows():
+            yield server_id, self._record(server_id, entry)
+
+    def values(self) -> Iterator[ServerRecord]:
+        return (record for _, record in self.items())
+
+
+# 唯讀連線依路徑共用 (path -> (inode, store))：資料庫原地更新後重新載入時沿用同一連線，
+# 不會每次重新載入都多開一個連線；檔案被替換時才開新連線，舊連線在不再被任何目錄引用時隨物件釋放而關閉
+_read_stores: Dict[str, Tuple[int, CatalogStore]] = {}
+_read_stores_lock = threading.Lock()
+
+
+def _read_store(path: str) -> CatalogStore:
+    inode = os.stat(path).st_ino
+    with _read_stores_lock:
+        entry = _read_stores.get(path)
+        if entry is None or entry[0] != inode:
+            entry = _read_stores[path] = (inode, CatalogStore(path, read_only=True))
+        return entry[1]
+
+
+def open_store_catalog(path: str) -> ReadOnlyDict:
+    """以唯讀模式開啟 SQLite 目錄，回傳與 load_catalog 相同結構的唯讀目錄"""
+    try:
+        store = _read_store(path)
+        catalog = store.meta()
+    except sqlite3.DatabaseError as e:
+        with _read_stores_lock:
+            _read_stores.pop(path, None)
+        raise CatalogFormatError(f"目錄資料庫格式錯誤：{e}") from e
+    catalog["servers"] = StoreServers(store)
+    return freeze_catalog(catalog)
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+MCP 目錄檔案監看
+爬蟲更新目錄後通知 GUI 重新載入：Linux 以 inotify 監看目錄所在資料夾 (原子替換會換掉檔案 inode)，
+其他平台或 inotify 無法使用時改以 stat 輪詢；兩種方式都以 (inode, mtime, 大小) 確認檔案確實改變
+"""
+
+import ctypes
+import ctypes.util
+import logging
+import os
+import struct
+import sys
+from typing import Optional, Tuple
+
+from mcp_catalog import CATALOG_PATH_ENV, DEFAULT_CATALOG_FILE
+
+logger = logging.getLogger(__name__)
+
+# <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+_EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+
+
+def _file_key(path: str) -> Optional[Tuple[int, int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def _inotify_fd(directory: str) -> Optional[int]:
+    """建立非阻塞 inotify 並監看資料夾，平台不支援時回傳 None"""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+    except (OSError, AttributeError):
+        return None
+    if fd < 0:
+        return None
+    if libc.inotify_add_watch(fd, os.fsencode(directory), WATCH_MASK) < 0:
+        logger.debug(f"inotify 無法監看 {directory}: {os.strerror(ctypes.get_errno())}")
+        os.close(fd)
+        return None
+    return fd
+
+
+class CatalogWatcher:
+    """非阻塞的目錄變更偵測，GUI 以 root.after 定期呼叫 changed()，不需要背景執行緒"""
+
+    def __init__(self, path: Optional[str] = None, use_inotify: bool = True):
+        self.path = os.path.realpath(path or os.environ.get(CATALOG_PATH_ENV, DEFAULT_CATALOG_FILE))
+        self._name = os.fsencode(os.path.basename(self.path))
+        self._key = _file_key(self.path)
+        self._fd = _inotify_fd(os.path.dirname(self.path)) if use_inotify else None
+
+    @property
+    def uses_inotify(self) -> bool:
+        return self._fd is not None
+
+    def _drain_events(self) -> bool:
+        """讀出所有待處理事件，回傳是否有目錄檔案相關的事件"""
+        touched = False
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                return touched
+            offset = 0
+            while offset < len(data):
+                _, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b"\0")
+                offset += length
+                if name == self._name or mask & IN_Q_OVERFLOW:
+                    touched = True
+
+    def changed(self) -> bool:
+        """目錄檔案自上次呼叫後是否已改變 (寫入中途或刪除時不回報，等替換完成)"""
+        if self._fd is not None and not self._drain_events():
+            return False
+        key = _file_key(self.path)
+        if key is None or key == self._key:
+            return False
+        self._key = key
+        return True
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
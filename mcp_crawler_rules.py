@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+MCP 爬蟲分類規則引擎
+從 config/crawler_rules.json 載入規則，所有關鍵字編譯為單一正規表示式，每個倉庫只掃描一次文字
+"""
+
+import copy
+import json
+import os
+import re
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+DEFAULT_RULES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config", "crawler_rules.json")
+
+SCOPES = ("name", "name_or_description")
+
+
+class RuleFileError(ValueError):
+    """規則檔格式錯誤"""
+
+
+class KeywordRuleEngine:
+    """依規則表一次推導分類、安全級別、最佳實踐等所有欄位"""
+
+    def __init__(self, rules: Dict):
+        self.popularity_thresholds = sorted(
+            ((int(t["min_downloads"]), t["value"]) for t in rules.get("popularity", {}).get("thresholds", [])),
+            reverse=True
+        )
+        self.popularity_default = rules.get("popularity", {}).get("default", "低")
+        self.fields = self._load_fields(rules.get("fields", {}))
+        self._compile({kw for field in self.fields.values() for rule in field["rules"] for kw in rule["keywords"]})
+
+    @classmethod
+    def from_file(cls, path: str = DEFAULT_RULES_FILE) -> "KeywordRuleEngine":
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return cls(json.load(f))
+        except (OSError, json.JSONDecodeError) as e:
+            raise RuleFileError(f"無法載入規則檔 {path}: {e}") from e
+
+    @staticmethod
+    def _load_fields(fields: Dict) -> Dict[str, Dict]:
+        loaded = {}
+        for field_name, spec in fields.items():
+            scope = spec.get("scope", "name")
+            if scope not in SCOPES:
+                raise RuleFileError(f"欄位 {field_name} 的 scope 無效: {scope}")
+            if "default" not in spec:
+                raise RuleFileError(f"欄位 {field_name} 缺少 default")
+            rules = []
+            for rule in spec.get("rules", []):
+                keywords = [kw.lower() for kw in rule.get("keywords", []) if kw]
+                if not keywords or "value" not in rule:
+                    raise RuleFileError(f"欄位 {field_name} 的規則需要 keywords 與 value")
+                rules.append({"keywords": frozenset(keywords), "when": rule.get("when", {}), "value": rule["value"]})
+            loaded[field_name] = {"scope": scope, "rules": rules, "default": spec["default"], "base": spec.get("base")}
+        return loaded
+
+    def _compile(self, keywords: Set[str]):
+        """編譯多模式比對器
+
+        以零寬度前瞻在每個位置比對最長的關鍵字；同一位置較短的關鍵字必為其前綴，
+        因此預先算出每個關鍵字所含的關鍵字前綴即可得到完整的命中集合 (等同 `keyword in text`)
+        """
+        ordered = sorted(keywords, key=lambda kw: (-len(kw), kw))
+        self._pattern = re.compile("(?=(" + "|".join(re.escape(kw) for kw in ordered) + "))") if ordered else None
+        self._prefix_hits = {kw: frozenset(other for other in keywords if kw.startswith(other)) for kw in keywords}
+
+    def scan(self, name: str, description: str = "") -> Tuple[Set[str], Set[str]]:
+        """單次掃描，回傳 (名稱命中的關鍵字, 名稱或描述命中的關鍵字)"""
+        name_hits: Set[str] = set()
+        any_hits: Set[str] = set()
+        if self._pattern is None:
+            return name_hits, any_hits
+        name_lower = name.lower()
+        boundary = len(name_lower)
+        # 關鍵字不含 \0，因此不會跨越名稱與描述的邊界
+        for match in self._pattern.finditer(f"{name_lower}\0{description.lower()}"):
+            hits = self._prefix_hits[match.group(1)]
+            if match.start() < boundary:
+                name_hits |= hits
+            any_hits |= hits
+        return name_hits, any_hits
+
+    def derive(self, name: str, description: str = "", fields: Optional[Iterable[str]] = None,
+               context: Optional[Dict] = None) -> Dict:
+        """推導欄位值；context 可預先指定其他欄位的值 (供 when 條件使用)"""
+        name_hits, any_hits = self.scan(name, description)
+        derived = dict(context or {})
+        wanted = set(fields) if fields is not None else None
+        for field_name, spec in self.fields.items():
+            if field_name in derived:
+                continue
+            hits = name_hits if spec["scope"] == "name" else any_hits
+            value = spec["default"]
+            for rule in spec["rules"]:
+                if rule["keywords"] & hits and all(derived.get(k) == v for k, v in rule["when"].items()):
+                    value = rule["value"]
+                    break
+            if spec["base"] is not None:
+                merged = copy.deepcopy(spec["base"])
+                merged.update(copy.deepcopy(value))
+                value = merged
+            else:
+                value = copy.deepcopy(value)
+            derived[field_name] = value
+        if wanted is not None:
+            return {k: v for k, v in derived.items() if k in wanted}
+        return derived
+
+    def popularity(self, downloads: int) -> str:
+        """根據下載量確定熱門程度"""
+        for minimum, value in self.popularity_thresholds:
+            if downloads > minimum:
+                return value
+        return self.popularity_default
+
+    def field_names(self) -> List[str]:
+        return list(self.fields)
@@ -13,41 +13,50 @@ import os
 import webbrowser
 from datetime import datetime
 import platform
+import time
 import yaml
-
-# 全域變數用於儲存從 JSON 載入的伺服器數據
-MCP_SERVERS_DATA = []
+from concurrent.futures import ThreadPoolExecutor
+
+from mcp_catalog import (load_servers, load_catalog, stream_servers, catalog_changes, diff_servers, CatalogFormatError,
+                         plan_image_pulls, total_download_bytes, format_size)
+from mcp_catalog_watch import CatalogWatcher
+from mcp_search import SearchIndex, facet_label, server_matches
+from mcp_tree_rows import RowCache, create_tree_rows
+
+# 串流載入目錄時每批插入列的時間上限 (約一個畫面)，超過即交還事件迴圈
+STREAM_BATCH_SECONDS = 0.015
+# 停止輸入這麼久後才篩選，連續按鍵只觸發一次搜尋
+SEARCH_DEBOUNCE_MS = 150
+SEARCH_POLL_MS = 10
+# 檢查目錄檔案是否被爬蟲更新的間隔
+CATALOG_WATCH_INTERVAL_MS = 1000
 
 def load_mcp_servers_from_catalog():
-    """從 mcp_catalog.json 載入 MCP 伺服器數據"""
-    global MCP_SERVERS_DATA
+    """從 mcp_catalog.json 載入 MCP 伺服器數據 (程序內共用快取的唯讀資料)"""
     try:
-        with open('mcp_catalog.json', 'r', encoding='utf-8') as f:
-            catalog_data = json.load(f)
-        
-        # 檢查新格式 (version 2.0.0+)
-        if isinstance(catalog_data, dict) and 'servers' in catalog_data:
-            servers = catalog_data['servers']
-        # 檢查舊格式
-        elif isinstance(catalog_data, list):
-            # 舊格式兼容
-            servers = {server['id']: server for server in catalog_data}
-        # 結構無效
-        else:
-            messagebox.showerror("錯誤", "mcp_catalog.json 檔案格式錯誤：結構無效，預期為列表或包含 'servers' 鍵的字典。")
-            MCP_SERVERS_DATA = {}
-            return {}
-        
-        MCP_SERVERS_DATA = servers
-        return servers
+        return load_servers()
+    except FileNotFoundError:
+        messagebox.showerror("錯誤", "找不到 mcp_catalog.json 檔案！請確保該檔案存在於專案根目錄。")
+    except CatalogFormatError as e:
+        messagebox.showerror("錯誤", str(e))
+    return {}
+
+def stream_mcp_servers_from_catalog():
+    """開始串流載入 mcp_catalog.json 的 MCP 伺服器 (逐筆產生唯讀資料)，失敗時回傳 None"""
+    try:
+        return stream_servers()
     except FileNotFoundError:
         messagebox.showerror("錯誤", "找不到 mcp_catalog.json 檔案！請確保該檔案存在於專案根目錄。")
-        MCP_SERVERS_DATA = {}
-        return {}
-    except json.JSONDecodeError:
-        messagebox.showerror("錯誤", "mcp_catalog.json 檔案格式錯誤！")
-        MCP_SERVERS_DATA = {}
-        return {}
+    except CatalogFormatError as e:
+        messagebox.showerror("錯誤", str(e))
+    return None
+
+def load_catalog_changes(previous, servers):
+    """載入目前的目錄並與已顯示的版本比較，回傳 (目錄, (新增, 移除, 變更))"""
+    catalog = load_catalog()
+    if previous is None:
+        return catalog, diff_servers(servers, catalog["servers"])
+    return catalog, catalog_changes(previous, catalog)
 
 class MCPDockerConfigurator:
     def __init__(self, root):
@@ -58,14 +67,36 @@ class MCPDockerConfigurator:
         
         self.setup_styles()
         
-        self.mcp_servers = load_mcp_servers_from_catalog()
-        if not self.mcp_servers:
+        # 目錄以串流方式邊解析邊顯示；全部載入後在背景建立一次搜尋索引，輸入搜尋字詞時不再逐筆掃描
+        self.server_stream = stream_mcp_servers_from_catalog()
+        if self.server_stream is None:
             self.root.quit()
             return
+        self.mcp_servers = {}
+        self.catalog = None
+        self.search_index = None
+        # 列的顯示字串每個服務器只格式化一次，目錄項目變更時才重新產生
+        self.row_cache = RowCache(lambda server_id: self.format_server_row(server_id, self.mcp_servers[server_id]))
+        # 搜尋在背景執行緒執行，較新的搜尋取代尚未完成的搜尋；結果分批套用到列表
+        self.search_executor = ThreadPoolExecutor(max_workers=1)
+        self.search_after = None
+        self.search_future = None
+        self.search_pass = None
+        # 爬蟲更新目錄後自動重新載入，只更新有變更的列
+        self.catalog_watcher = CatalogWatcher()
+        self.reload_future = None
         
         # 核心狀態變數
         self.selected_servers = {}
         self.env_entries = {}
+        # 環境變數面板：每個選擇的服務器一個框架 (server_id -> (框架, 內容鍵, 輸入欄位鍵))，
+        # 釋放的輸入框放回共用池，取消選擇前輸入的值保留在 env_values
+        self.env_frames = {}
+        self.env_entry_pool = []
+        self.env_values = {}
+        self.env_next_row = 2
+        self.env_title_frame = None
+        self.env_help_widgets = ()
         self.volume_mounts = []
         self.transport_vars = {}  # 新增：傳輸協定變數
         
@@ -89,8 +120,10 @@ class MCPDockerConfigurator:
 
         # Defer data population and initial UI updates
         self.root.after(1, self.populate_server_list) 
+        self.root.after(1, self.load_servers_incrementally)
         self.root.after(1, self.update_env_config)
         self.root.after(1, self.update_config_preview) # Ensure initial state of preview panes
+        self.root.after(CATALOG_WATCH_INTERVAL_MS, self.watch_catalog)
 
         self.root.after(500, self.show_quick_start_guide)  # 延遲顯示指引
         
@@ -186,7 +219,7 @@ class MCPDockerConfigurator:
                 self.selected_servers[server_id] = True
         
         # 更新界面
-        self.populate_server_list()
+        self.tree_rows.update(recommended_servers)
         self.update_env_config()
         
         # 顯示提示
@@ -356,13 +389,19 @@ class MCPDockerConfigurator:
         filter_bar = ttk.Frame(parent_frame)
         filter_bar.grid(row=0, column=0, sticky=(tk.W, tk.E), pady=(0,15))
         
-        ttk.Label(filter_bar, text="分類:").pack(side=tk.LEFT, padx=(0,5))
-        categories = ["全部"] + sorted(list(set(s.get("category", "未分類") for s in self.mcp_servers.values())))
-        self.category_var = tk.StringVar(value="全部")
-        category_combo = ttk.Combobox(filter_bar, textvariable=self.category_var, values=categories, 
-                                      state="readonly", width=15, font=('Helvetica Neue', 10))
-        category_combo.pack(side=tk.LEFT, padx=(0,10))
-        category_combo.bind("<<ComboboxSelected>>", self.filter_servers)
+        # 多重篩選：分類、安全級別、Docker 需求、官方與熱門程度，選項後方顯示符合的數量
+        self.facet_vars = {}
+        self.facet_combos = {}
+        self.facet_choices = {}
+        for facet, title, width in (("category", "分類:", 15), ("security_level", "安全:", 11),
+                                    ("docker_required", "Docker:", 13), ("official", "來源:", 9),
+                                    ("popularity", "熱門:", 9)):
+            ttk.Label(filter_bar, text=title).pack(side=tk.LEFT, padx=(0,5))
+            self.facet_vars[facet] = tk.StringVar(value="全部")
+            self.facet_combos[facet] = ttk.Combobox(filter_bar, textvariable=self.facet_vars[facet], 
+                                                    state="readonly", width=width, font=('Helvetica Neue', 10))
+            self.facet_combos[facet].pack(side=tk.LEFT, padx=(0,10))
+            self.facet_combos[facet].bind("<<ComboboxSelected>>", self.filter_servers)
         
         ttk.Label(filter_bar, text="搜尋:").pack(side=tk.LEFT, padx=(0,5))
         self.search_var = tk.StringVar()
@@ -395,10 +434,17 @@ class MCPDockerConfigurator:
 
         # 讓描述欄位可以換行顯示 (透過 tag configure)
 
+        # 配置標籤顏色
+        self.server_tree.tag_configure("high_security", background="#ffe6e6")  # 淺紅色背景
+        self.server_tree.tag_configure("low_security", background="#e6ffe6")   # 淺綠色背景
+
 
         v_scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=self.server_tree.yview)
         h_scrollbar = ttk.Scrollbar(tree_frame, orient="horizontal", command=self.server_tree.xview)
         self.server_tree.configure(yscrollcommand=v_scrollbar.set, xscrollcommand=h_scrollbar.set)
+        # 列狀態模型：選擇切換只更新變更的儲存格，篩選改變時只處理差異的列；
+        # 虛擬列表只建立可見範圍的 Tk 項目，捲動時重新繫結 (接管垂直捲軸)
+        self.tree_rows = create_tree_rows(self.server_tree, self.server_row, columns, v_scrollbar)
         
         self.server_tree.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
         v_scrollbar.grid(row=1, column=1, sticky=(tk.N, tk.S))
@@ -678,79 +724,255 @@ class MCPDockerConfigurator:
         
     # 核心功能方法
     def populate_server_list(self):
-        """填充服務器列表"""
-        # 清除現有項目
-        for item in self.server_tree.get_children():
-            self.server_tree.delete(item)
+        """填充服務器列表 (只刪除、插入或重新排列與目前顯示不同的列)"""
+        self.search_after = None
+        if self.search_future is not None:
+            # 尚未開始的較舊搜尋直接取消，已在執行的搜尋結果會被忽略
+            self.search_future.cancel()
+            self.search_future = None
             
         # 應用篩選
-        category_filter = self.category_var.get() if hasattr(self, 'category_var') else "全部"
         search_term = self.search_var.get().lower() if hasattr(self, 'search_var') else ""
+        selected_facets = self.get_selected_facets()
         
-        for server_id, info in self.mcp_servers.items():
-            # 分類篩選
-            if category_filter != "全部" and info.get("category") != category_filter:
-                continue
-                
-            # 搜尋篩選  
-            if search_term and not any(search_term in text.lower() for text in [
-                server_id, info.get("name", ""), info.get("description", ""), info.get("category", "") , info.get("popularity", "")
-            ]):
-                continue
+        # 搜尋與多重篩選 (經由索引只取出命中的服務器，最相關的排在前面)；
+        # 目錄仍在串流載入或重新載入後索引尚未建立時，先逐筆比對已載入的服務器
+        if self.search_index is None:
+            self.show_search_results([server_id for server_id, info in self.mcp_servers.items()
+                                      if server_matches(server_id, info, search_term, selected_facets)])
+            return
+        index = self.search_index
+        self.search_future = self.search_executor.submit(
+            lambda: (index.facet_counts(search_term, selected_facets), index.filter(search_term, selected_facets)))
+        self.check_search_results(self.search_future, index, selected_facets)
+        
+    def check_search_results(self, future, index, selected_facets):
+        """背景搜尋完成後更新篩選選項數量並套用結果；已被較新的搜尋取代時直接結束"""
+        if future is not self.search_future:
+            return
+        if not future.done():
+            self.root.after(SEARCH_POLL_MS, lambda: self.check_search_results(future, index, selected_facets))
+            return
+        self.search_future = None
+        if index is not self.search_index:
+            # 搜尋期間目錄已重新載入
+            self.populate_server_list()
+            return
+        counts, server_ids = future.result()
+        self.show_facet_counts(counts, selected_facets)
+        self.show_search_results(server_ids)
+        
+    def show_search_results(self, server_ids):
+        self.search_pass = self.tree_rows.show_incrementally(server_ids)
+        self.apply_search_results(self.search_pass)
+        
+    def apply_search_results(self, steps):
+        """逐批套用搜尋結果，每批不超過一個畫面的時間；已有較新的搜尋時停止"""
+        if steps is not self.search_pass:
+            return
+        deadline = time.perf_counter() + STREAM_BATCH_SECONDS
+        for _ in steps:
+            if time.perf_counter() >= deadline:
+                self.root.after_idle(lambda: self.apply_search_results(steps))
+                return
+        self.search_pass = None
+        
+    def server_row(self, server_id):
+        """服務器列的顯示值與標籤：選擇標記加上快取的顯示字串 (插入新列與更新既有列共用)"""
+        values, tags = self.row_cache[server_id]
+        return ("✅" if server_id in self.selected_servers else "⬜",) + values, tags
+        
+    def format_server_row(self, server_id, info):
+        """服務器列中與選擇狀態無關的顯示值與標籤 (由 row_cache 快取)"""
+        # 創建精緻的標籤和顯示
+        # 安全級別標籤
+        security_level = info.get("security_level", "medium")
+        security_emoji = {"high": "🔒", "medium": "🔐", "low": "🔓"}.get(security_level, "🔐")
+        
+        # Docker 需求標籤
+        docker_required = info.get("docker_required", True)
+        docker_emoji = "🐳" if docker_required else "📦"
+        
+        # 熱門程度標籤
+        popularity = info.get("popularity", "中等")
+        popularity_emoji = {"極高": "🔥", "高": "⭐", "中等": "🌟", "低": "💫"}.get(popularity, "🌟")
+        
+        # 官方標籤
+        official_emoji = "🏛️" if info.get("official", False) else ""
+        
+        # 組合名稱顯示
+        name_with_tags = f"{info.get('name', 'N/A')} {security_emoji}{docker_emoji}{popularity_emoji}{official_emoji}"
+        
+        # 顯示應用場景 - 新增
+        use_cases = info.get("use_cases", [])
+        use_cases_str = "、".join(use_cases[:3])  # 只顯示前3個應用場景
+        if len(use_cases) > 3:
+            use_cases_str += "..."
+            
+        description_with_use_cases = f"{info.get('description', '')}\n🎯 應用: {use_cases_str}"
+
+        values = (
+            name_with_tags, 
+            info.get("category", "N/A"), 
+            description_with_use_cases,
+            info.get("image", "N/A")
+        )
+        
+        # 根據安全級別設定顏色
+        tags = {"high": ("high_security",), "low": ("low_security",)}.get(security_level, ())
+        return values, tags
+        
+    def load_servers_incrementally(self):
+        """在閒置時段逐批加入串流解析出的服務器，每批不超過一個畫面的時間，解析期間介面可正常操作"""
+        deadline = time.perf_counter() + STREAM_BATCH_SECONDS
+        search_term = self.search_var.get().lower()
+        selected_facets = self.get_selected_facets()
+        try:
+            for server_id, info in self.server_stream:
+                self.mcp_servers[server_id] = info
+                if server_matches(server_id, info, search_term, selected_facets):
+                    self.tree_rows.insert(server_id)
+                if time.perf_counter() >= deadline:
+                    self.status_var.set(f"載入目錄中... 已載入 {len(self.mcp_servers)} 個服務器")
+                    self.root.after_idle(self.load_servers_incrementally)
+                    return
+        except (CatalogFormatError, OSError) as e:
+            self.server_stream = None
+            messagebox.showerror("錯誤", str(e))
+            return
+        
+        # 改用共用快取中的唯讀目錄 (串流結束時已填入)；解析期間檔案被替換時一併補上差異
+        self.server_stream = None
+        self.reload_catalog(rebuild_index=True)
+        
+    def build_search_index(self):
+        """搜尋索引需要完整目錄，在背景執行緒建立，完成前搜尋改為逐筆比對"""
+        self.search_index = None
+        self.status_var.set(f"已載入 {len(self.mcp_servers)} 個服務器，建立搜尋索引中...")
+        executor = ThreadPoolExecutor(max_workers=1)
+        future = self.index_future = executor.submit(SearchIndex, self.mcp_servers)
+        executor.shutdown(wait=False)
+        self.root.after(50, lambda: self.check_search_index(future))
+        
+    def check_search_index(self, future):
+        """搜尋索引建立完成後啟用多重篩選；已有較新的建立 (目錄再次重新載入) 時忽略此結果"""
+        if future is not self.index_future:
+            return
+        if not future.done():
+            self.root.after(50, lambda: self.check_search_index(future))
+            return
+        try:
+            self.search_index = future.result()
+        except Exception as e:
+            # 沒有索引時搜尋維持逐筆比對
+            self.status_var.set(f"建立搜尋索引失敗，搜尋改為逐筆比對: {e}")
+            return
+        self.status_var.set(f"MCP Docker 配置器 - 共 {len(self.mcp_servers)} 個服務器")
+        # 沒有搜尋字詞時列表已是目錄順序，只需更新篩選選項的數量
+        if self.search_var.get():
+            self.populate_server_list()
+        else:
+            self.update_facet_counts("", self.get_selected_facets())
+        
+    def watch_catalog(self):
+        """定期檢查目錄檔案，爬蟲更新後自動套用變更 (串流載入或重新載入期間先不處理)"""
+        if self.server_stream is None and self.reload_future is None and self.catalog_watcher.changed():
+            self.reload_catalog()
+        self.root.after(CATALOG_WATCH_INTERVAL_MS, self.watch_catalog)
+        
+    def reload_catalog(self, rebuild_index=False):
+        """在背景執行緒重新載入目錄並計算差異 (沒有 delta 時需要解析整份 JSON)，完成後只更新變更的列"""
+        executor = ThreadPoolExecutor(max_workers=1)
+        self.reload_future = executor.submit(load_catalog_changes, self.catalog, self.mcp_servers)
+        executor.shutdown(wait=False)
+        self.root.after(50, lambda: self.check_catalog_reload(rebuild_index))
+        
+    def check_catalog_reload(self, rebuild_index):
+        """套用重新載入的目錄，選擇狀態保留；有變更時重新建立搜尋索引"""
+        if not self.reload_future.done():
+            self.root.after(50, lambda: self.check_catalog_reload(rebuild_index))
+            return
+        future, self.reload_future = self.reload_future, None
+        try:
+            catalog, (added, removed, changed) = future.result()
+        except (OSError, CatalogFormatError) as e:
+            self.status_var.set(f"目錄重新載入失敗: {e}")
+            return
+        self.catalog = catalog
+        self.mcp_servers = catalog["servers"]
+        if added or removed or changed:
+            self.apply_server_changes(added, removed, changed)
+            self.status_var.set(f"目錄已更新：新增 {len(added)}、移除 {len(removed)}、變更 {len(changed)} 個服務器")
+            rebuild_index = True
+        if rebuild_index:
+            self.build_search_index()
+        
+    def apply_server_changes(self, added, removed, changed):
+        """依目錄差異刪除、更新或插入列，未變更的列不重建"""
+        search_term = self.search_var.get().lower()
+        selected_facets = self.get_selected_facets()
+        selection_changed = False
+        self.row_cache.invalidate(removed)
+        self.row_cache.invalidate(changed)
+        
+        for server_id in removed:
+            selection_changed |= self.selected_servers.pop(server_id, None) is not None
+        self.tree_rows.delete(removed)
                 
-            # 創建精緻的標籤和顯示
-            selected = "✅" if server_id in self.selected_servers else "⬜"
-            
-            # 安全級別標籤
-            security_level = info.get("security_level", "medium")
-            security_emoji = {"high": "🔒", "medium": "🔐", "low": "🔓"}.get(security_level, "🔐")
-            
-            # Docker 需求標籤
-            docker_required = info.get("docker_required", True)
-            docker_emoji = "🐳" if docker_required else "📦"
-            
-            # 熱門程度標籤
-            popularity = info.get("popularity", "中等")
-            popularity_emoji = {"極高": "🔥", "高": "⭐", "中等": "🌟", "低": "💫"}.get(popularity, "🌟")
-            
-            # 官方標籤
-            official_emoji = "🏛️" if info.get("official", False) else ""
-            
-            # 組合名稱顯示
-            name_with_tags = f"{info.get('name', 'N/A')} {security_emoji}{docker_emoji}{popularity_emoji}{official_emoji}"
-            
-            # 顯示應用場景 - 新增
-            use_cases = info.get("use_cases", [])
-            use_cases_str = "、".join(use_cases[:3])  # 只顯示前3個應用場景
-            if len(use_cases) > 3:
-                use_cases_str += "..."
+        inserted = list(added)
+        for server_id in changed:
+            info = self.mcp_servers[server_id]
+            if server_id in self.selected_servers:
+                self.selected_servers[server_id] = info.copy()
+                selection_changed = True
+            if server_id not in self.tree_rows:
+                inserted.append(server_id)
+            elif server_matches(server_id, info, search_term, selected_facets):
+                self.tree_rows.update([server_id])
+            else:
+                self.tree_rows.delete([server_id])
                 
-            description_with_use_cases = f"{info.get('description', '')}\n🎯 應用: {use_cases_str}"
-
-            # 插入項目，包含精緻標籤
-            item_id = self.server_tree.insert("", tk.END, iid=server_id, values=(
-                selected, 
-                name_with_tags, 
-                info.get("category", "N/A"), 
-                description_with_use_cases,
-                info.get("image", "N/A")
-            ))
-            
-            # 根據安全級別設定顏色
-            if security_level == "high":
-                self.server_tree.set(item_id, "name", name_with_tags)
-                # 可以添加標籤來設定不同的顏色
-                self.server_tree.item(item_id, tags=("high_security",))
-            elif security_level == "low":
-                self.server_tree.item(item_id, tags=("low_security",))
-            
-        # 配置標籤顏色
-        self.server_tree.tag_configure("high_security", background="#ffe6e6")  # 淺紅色背景
-        self.server_tree.tag_configure("low_security", background="#e6ffe6")   # 淺綠色背景
+        # 爬蟲與 delta 都把新服務器接在目錄最後，未篩選時附加到末端即維持目錄順序；
+        # 篩選中的列表依相關度排列，新列先加在最後，索引建立完成後重新排序
+        for server_id in inserted:
+            info = self.mcp_servers[server_id]
+            if server_matches(server_id, info, search_term, selected_facets):
+                self.tree_rows.insert(server_id)
+                    
+        if selection_changed:
+            self.update_env_config()
+            self.update_config_preview()
         
     def filter_servers(self, event=None):
-        """篩選服務器列表"""
-        self.populate_server_list()
+        """篩選服務器列表 (合併連續輸入，停止輸入 SEARCH_DEBOUNCE_MS 後才篩選)"""
+        if self.search_after is not None:
+            self.root.after_cancel(self.search_after)
+        self.search_after = self.root.after(SEARCH_DEBOUNCE_MS, self.populate_server_list)
+        
+    def get_selected_facets(self):
+        """目前各篩選下拉選單選擇的值，"全部" 為 None"""
+        if not hasattr(self, 'facet_vars'):
+            return {}
+        return {facet: self.facet_choices.get(facet, {}).get(var.get())
+                for facet, var in self.facet_vars.items()}
+        
+    def update_facet_counts(self, search_term, selected_facets):
+        """依目前搜尋字詞與其他篩選條件更新每個選項的數量"""
+        if not hasattr(self, 'facet_vars') or self.search_index is None:
+            return
+        self.show_facet_counts(self.search_index.facet_counts(search_term, selected_facets), selected_facets)
+        
+    def show_facet_counts(self, counts, selected_facets):
+        """把各選項的數量顯示在篩選下拉選單"""
+        for facet, combo in self.facet_combos.items():
+            choices = {"全部": None}
+            for value, count in counts[facet].items():
+                label = f"{facet_label(facet, value)} ({count})"
+                choices[label] = value
+                if selected_facets.get(facet) == value:
+                    self.facet_vars[facet].set(label)
+            self.facet_choices[facet] = choices
+            combo["values"] = list(choices)
         
     def toggle_server_selection(self, event):
         """切換服務器選擇狀態"""
@@ -758,7 +980,9 @@ class MCPDockerConfigurator:
         if not selection:
             return
             
-        item_id = selection[0]
+        item_id = self.tree_rows.server_id(selection[0])
+        if not item_id:
+            return
         if item_id in self.selected_servers:
             del self.selected_servers[item_id]
             self.status_var.set(f"已取消選擇 {self.mcp_servers[item_id]['name']}")
@@ -766,7 +990,7 @@ class MCPDockerConfigurator:
             self.selected_servers[item_id] = self.mcp_servers[item_id].copy()
             self.status_var.set(f"已選擇 {self.mcp_servers[item_id]['name']}")
             
-        self.populate_server_list()
+        self.tree_rows.update([item_id])
         self.update_env_config()
         self.update_config_preview()
                 
@@ -780,7 +1004,7 @@ class MCPDockerConfigurator:
                 
     def show_server_context_menu(self, event):
         """顯示服務器右鍵選單"""
-        item = self.server_tree.identify_row(event.y)
+        item = self.tree_rows.server_id(self.server_tree.identify_row(event.y))
         if not item:
             return
             
@@ -821,48 +1045,63 @@ class MCPDockerConfigurator:
             del self.selected_servers[item_id]
         else:
             self.selected_servers[item_id] = self.mcp_servers[item_id].copy()
-        self.populate_server_list()
+        self.tree_rows.update([item_id])
         self.update_env_config()
         self.update_config_preview()
         
     def select_all(self):
         """全選可見的服務器"""
-        visible_servers = []
-        for child in self.server_tree.get_children():
-            visible_servers.append(child)
-            
-        for server_id in visible_servers:
-            if server_id not in self.selected_servers:
-                self.selected_servers[server_id] = self.mcp_servers[server_id].copy()
+        visible_servers = list(self.tree_rows)
+        newly_selected = [server_id for server_id in visible_servers if server_id not in self.selected_servers]
+        for server_id in newly_selected:
+            self.selected_servers[server_id] = self.mcp_servers[server_id].copy()
                 
-        self.populate_server_list()
+        self.tree_rows.update(newly_selected)
         self.update_env_config()
         self.update_config_preview()
         self.status_var.set(f"已選擇 {len(visible_servers)} 個服務器")
         
     def clear_selection(self):
         """清除所有選擇"""
+        cleared = list(self.selected_servers)
         self.selected_servers.clear()
-        self.populate_server_list()
+        self.tree_rows.update(cleared)
         self.update_env_config()
         self.update_config_preview()
         self.status_var.set("已清除所有選擇")
         
     def update_env_config(self):
-        """更新環境變數配置界面"""
-        # 清除現有組件
-        for widget in self.env_scroll_frame.winfo_children():
-            widget.destroy()
-            
-        self.env_entries.clear()
-        self.transport_vars.clear()
+        """更新環境變數配置界面：只新增或移除選擇有變更的服務器框架，其他服務器已輸入的值保留"""
+        if self.env_title_frame is None:
+            self.create_env_static_widgets()
+            
+        # 取消選擇或目錄項目已變更的服務器釋放框架 (輸入框回收到共用池)
+        for server_id, (_, frame_key, _) in list(self.env_frames.items()):
+            server_info = self.selected_servers.get(server_id)
+            if server_info is None or self.env_frame_key(server_info) != frame_key:
+                self.release_env_frame(server_id)
+                
+        for server_id, server_info in self.selected_servers.items():
+            if server_id not in self.env_frames:
+                self.create_env_frame(server_id, server_info)
+                
+        # 沒有選擇時顯示環境變數管理說明，否則顯示標題
+        if self.selected_servers:
+            for widget in self.env_help_widgets:
+                widget.grid_remove()
+            self.env_title_frame.grid()
+        else:
+            self.env_title_frame.grid_remove()
+            for widget in self.env_help_widgets:
+                widget.grid()
+                
+    def create_env_static_widgets(self):
+        """建立環境變數面板的說明與標題 (只建立一次，依選擇狀態顯示或隱藏)"""
+        # 顯示環境變數管理說明
+        info_frame = ttk.LabelFrame(self.env_scroll_frame, text="🔧 環境變數管理說明", padding=15)
+        info_frame.grid(row=0, column=0, sticky=(tk.W, tk.E), pady=10, padx=5)
         
-        if not self.selected_servers:
-            # 顯示環境變數管理說明
-            info_frame = ttk.LabelFrame(self.env_scroll_frame, text="🔧 環境變數管理說明", padding=15)
-            info_frame.grid(row=0, column=0, sticky=(tk.W, tk.E), pady=10, padx=5)
-            
-            info_text = """
+        info_text = """
 📋 環境變數儲存和管理方式：
 
 🔐 安全儲存：
@@ -887,63 +1126,93 @@ class MCPDockerConfigurator:
   • 不要在版本控制中提交敏感資訊
   • 使用最小權限原則設定 API 金鑰權限
   • 為不同環境（開發/測試/生產）使用不同的金鑰
-            """
-            
-            ttk.Label(info_frame, text=info_text, justify=tk.LEFT, 
-                     font=('Helvetica Neue', 10)).grid(row=0, column=0, sticky=tk.W)
-            
-            # 顯示選擇提示
-            select_frame = ttk.Frame(self.env_scroll_frame)
-            select_frame.grid(row=1, column=0, pady=20)
-            ttk.Label(select_frame, text="👈 請先在左側選擇 MCP 服務器開始配置", 
-                     style='Header.TLabel', font=('Helvetica Neue', 12)).pack()
-            return
-            
-        row = 0
+        """
+        
+        ttk.Label(info_frame, text=info_text, justify=tk.LEFT, 
+                 font=('Helvetica Neue', 10)).grid(row=0, column=0, sticky=tk.W)
+        
+        # 顯示選擇提示
+        select_frame = ttk.Frame(self.env_scroll_frame)
+        select_frame.grid(row=1, column=0, pady=20)
+        ttk.Label(select_frame, text="👈 請先在左側選擇 MCP 服務器開始配置", 
+                 style='Header.TLabel', font=('Helvetica Neue', 12)).pack()
+        self.env_help_widgets = (info_frame, select_frame)
+        
         # 添加環境變數管理說明標題
-        title_frame = ttk.Frame(self.env_scroll_frame)
-        title_frame.grid(row=row, column=0, sticky=(tk.W, tk.E), pady=(0, 10), padx=5)
-        ttk.Label(title_frame, text="🔧 環境變數配置", style='Category.TLabel').pack(side=tk.LEFT)
-        ttk.Button(title_frame, text="💡 管理說明", 
+        self.env_title_frame = ttk.Frame(self.env_scroll_frame)
+        self.env_title_frame.grid(row=0, column=0, sticky=(tk.W, tk.E), pady=(0, 10), padx=5)
+        ttk.Label(self.env_title_frame, text="🔧 環境變數配置", style='Category.TLabel').pack(side=tk.LEFT)
+        ttk.Button(self.env_title_frame, text="💡 管理說明", 
                   command=self.show_env_management_help).pack(side=tk.RIGHT)
-        row += 1
         
-        for server_id, server_info in self.selected_servers.items():
-            # 服務器標題
-            server_frame = ttk.LabelFrame(self.env_scroll_frame, 
-                                        text=f"{server_info['name']} ({server_info['image']})", 
-                                        padding="10")
-            server_frame.grid(row=row, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=10, padx=5)
-            
-            # 環境變數輸入
-            env_row = 0
-            if server_info.get("environment_vars"):
-                for env_var, default_value in server_info["environment_vars"].items():
-                    ttk.Label(server_frame, text=f"{env_var}:", style='Header.TLabel').grid(
-                        row=env_row, column=0, sticky=tk.W, pady=5)
-                    
-                    # 判斷是否為敏感資訊
-                    is_sensitive = any(keyword in env_var.lower() for keyword in ["token", "key", "secret", "password"])
-                    entry = ttk.Entry(server_frame, width=50, show="*" if is_sensitive else None)
-                    entry.grid(row=env_row, column=1, columnspan=2, sticky=(tk.W, tk.E), pady=5, padx=(10, 0))
-                    
-                    # 預填預設值（除了敏感資訊）
-                    if not is_sensitive and default_value and default_value != "your_token_here":
-                        entry.insert(0, default_value)
-                    
-                    self.env_entries[f"{server_id}.{env_var}"] = entry
-                    env_row += 1
-            
-            # 如果沒有環境變數需求，顯示提示
-            if env_row == 0:
-                ttk.Label(server_frame, text="✅ 此服務器無需環境變數配置", 
-                         style='Header.TLabel').grid(row=0, column=0, pady=10)
-                
-            server_frame.columnconfigure(1, weight=1)
-            row += 1
-            
         self.env_scroll_frame.columnconfigure(0, weight=1)
         
+    def env_frame_key(self, server_info):
+        """框架內容依據的欄位，目錄更新後不同時重建該服務器的框架"""
+        return (server_info.get('name'), server_info.get('image'),
+                tuple((server_info.get("environment_vars") or {}).items()))
+        
+    def create_env_frame(self, server_id, server_info):
+        """在面板最後加入一個服務器的環境變數框架"""
+        # 服務器標題
+        server_frame = ttk.LabelFrame(self.env_scroll_frame, 
+                                    text=f"{server_info['name']} ({server_info['image']})", 
+                                    padding="10")
+        server_frame.grid(row=self.env_next_row, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=10, padx=5)
+        self.env_next_row += 1
+        
+        # 環境變數輸入
+        env_row = 0
+        entry_keys = []
+        for env_var, default_value in (server_info.get("environment_vars") or {}).items():
+            ttk.Label(server_frame, text=f"{env_var}:", style='Header.TLabel').grid(
+                row=env_row, column=0, sticky=tk.W, pady=5)
+            
+            # 判斷是否為敏感資訊
+            is_sensitive = any(keyword in env_var.lower() for keyword in ["token", "key", "secret", "password"])
+            entry = self.acquire_env_entry(server_frame, env_row, is_sensitive)
+            
+            # 還原取消選擇前輸入的值，否則預填預設值（除了敏感資訊）
+            key = f"{server_id}.{env_var}"
+            value = self.env_values.pop(key, None)
+            if value is None and not is_sensitive and default_value and default_value != "your_token_here":
+                value = default_value
+            if value:
+                entry.insert(0, value)
+            
+            self.env_entries[key] = entry
+            entry_keys.append(key)
+            env_row += 1
+        
+        # 如果沒有環境變數需求，顯示提示
+        if env_row == 0:
+            ttk.Label(server_frame, text="✅ 此服務器無需環境變數配置", 
+                     style='Header.TLabel').grid(row=0, column=0, pady=10)
+            
+        server_frame.columnconfigure(1, weight=1)
+        self.env_frames[server_id] = (server_frame, self.env_frame_key(server_info), entry_keys)
+        
+    def acquire_env_entry(self, server_frame, row, is_sensitive):
+        """從共用池取出輸入框 (沒有時建立) 並放到服務器框架中"""
+        # 輸入框屬於 env_scroll_frame，以 grid in_ 放進各服務器框架，框架釋放後可重複使用
+        entry = self.env_entry_pool.pop() if self.env_entry_pool else ttk.Entry(self.env_scroll_frame, width=50)
+        entry.configure(show="*" if is_sensitive else "")
+        entry.grid(in_=server_frame, row=row, column=1, columnspan=2, sticky=(tk.W, tk.E), pady=5, padx=(10, 0))
+        entry.lift(server_frame)
+        return entry
+        
+    def release_env_frame(self, server_id):
+        """移除服務器框架，輸入框清空後回收到共用池；已輸入的值保留到重新選擇時還原"""
+        server_frame, _, entry_keys = self.env_frames.pop(server_id)
+        for key in entry_keys:
+            entry = self.env_entries.pop(key)
+            if entry.get():
+                self.env_values[key] = entry.get()
+            entry.delete(0, tk.END)
+            entry.grid_forget()
+            self.env_entry_pool.append(entry)
+        server_frame.destroy()
+        
     def show_env_management_help(self):
         """顯示環境變數管理幫助"""
         help_window = tk.Toplevel(self.root)
@@ -1092,9 +1361,19 @@ class MCPDockerConfigurator:
             
         return configs
         
+    def security_option(self, name, default=False):
+        """讀取安全選項；選項尚未建立時回傳預設值 (不另外建立 Tk 變數)"""
+        var = self.security_vars.get(name)
+        return var.get() if var is not None else default
+        
     def generate_claude_config(self):
         """生成 Claude Desktop 配置"""
         config = {"mcpServers": {}}
+        # 所有服務器共用的選項只讀取一次
+        read_only = self.security_option("read_only")
+        no_privileges = self.security_option("no_privileges")
+        memory_limit = self.memory_limit_var.get()
+        cpu_limit = self.cpu_limit_var.get()
         
         for server_id, server_info in self.selected_servers.items():
             server_config = {
@@ -1103,18 +1382,16 @@ class MCPDockerConfigurator:
             }
             
             # 安全選項
-            if self.security_vars.get("read_only", tk.BooleanVar(value=False)).get():
+            if read_only:
                 server_config["args"].extend(["--read-only"])
-            if self.security_vars.get("no_privileges", tk.BooleanVar(value=False)).get():
+            if no_privileges:
                 server_config["args"].extend(["--security-opt", "no-new-privileges"])
             
             # 記憶體限制
-            memory_limit = self.memory_limit_var.get()
             if memory_limit and memory_limit != "":
                 server_config["args"].extend(["--memory", memory_limit])
             
             # CPU 限制  
-            cpu_limit = self.cpu_limit_var.get()
             if cpu_limit and cpu_limit != "":
                 server_config["args"].extend(["--cpus", cpu_limit])
                 
@@ -1145,6 +1422,7 @@ class MCPDockerConfigurator:
         """生成 VS Code 配置"""
         inputs = []
         servers = {}
+        read_only = self.security_option("read_only")
         
         # 收集所有環境變數輸入
         for server_id, server_info in self.selected_servers.items():
@@ -1166,7 +1444,7 @@ class MCPDockerConfigurator:
             }
             
             # 安全選項
-            if self.security_vars.get("read_only", tk.BooleanVar(value=False)).get():
+            if read_only:
                 server_config["args"].extend(["--read-only"])
                 
             # 環境變數處理
@@ -1229,6 +1507,9 @@ class MCPDockerConfigurator:
                 }
             }
         }
+        read_only = self.security_option("read_only")
+        no_privileges = self.security_option("no_privileges")
+        memory_limit = self.security_option("memory_limit", "")
         
         for server_id, server_info in self.selected_servers.items():
             service_config = {
@@ -1242,18 +1523,17 @@ class MCPDockerConfigurator:
             
             # 安全選項
             security_opts = []
-            if self.security_vars.get("no_privileges", tk.BooleanVar(value=False)).get():
+            if no_privileges:
                 security_opts.append("no-new-privileges:true")
                 
             if security_opts:
                 service_config["security_opt"] = security_opts
                 
-            if self.security_vars.get("read_only", tk.BooleanVar(value=False)).get():
+            if read_only:
                 service_config["read_only"] = True
                 service_config["tmpfs"] = ["/tmp"]
                 
             # 資源限制
-            memory_limit = self.security_vars.get("memory_limit", tk.StringVar()).get()
             if memory_limit and memory_limit.strip():
                 service_config["mem_limit"] = memory_limit
             elif self.memory_limit_var.get():
@@ -1284,7 +1564,7 @@ class MCPDockerConfigurator:
             
             # 卷掛載
             if server_info.get("volumes"):
-                service_config["volumes"] = server_info["volumes"]
+                service_config["volumes"] = list(server_info["volumes"])
                 
             config["services"][f"{server_id}-mcp"] = service_config
             
@@ -1338,18 +1618,23 @@ class MCPDockerConfigurator:
         if not self.check_docker_status():
             return
             
-        # 確認安裝
-        server_list = "\n".join([f"• {info['name']} ({info['image']})" 
-                                for info in self.selected_servers.values()])
+        # 確認安裝：相同映像只拉取一次，依目錄中的 manifest 大小排序並扣除共用層
+        plan = plan_image_pulls(self.selected_servers.values())
+        server_list = "\n".join([f"• {', '.join(pull.server_names)} ({pull.image}, {format_size(pull.new_bytes)})" 
+                                for pull in plan])
+        total_bytes = total_download_bytes(plan)
+        size_note = f"預估下載量: {format_size(total_bytes)}\n\n" if total_bytes is not None else ""
         
         if not messagebox.askyesno("確認安裝", 
-                                  f"即將下載以下 Docker 映像:\n\n{server_list}\n\n這可能需要一些時間。是否繼續?"):
+                                  f"即將下載以下 Docker 映像:\n\n{server_list}\n\n{size_note}這可能需要一些時間。是否繼續?"):
             return
             
-        self.show_installation_progress()
+        self.show_installation_progress(plan)
         
-    def show_installation_progress(self):
+    def show_installation_progress(self, plan=None):
         """顯示安裝進度視窗"""
+        if plan is None:
+            plan = plan_image_pulls(self.selected_servers.values())
         progress_window = tk.Toplevel(self.root)
         progress_window.title("安裝進度")
         progress_window.geometry("500x400")
@@ -1363,7 +1648,7 @@ class MCPDockerConfigurator:
         
         # 進度條
         progress_bar = ttk.Progressbar(progress_window, mode='determinate', 
-                                     maximum=len(self.selected_servers))
+                                     maximum=len(plan))
         progress_bar.pack(pady=10, padx=20, fill=tk.X)
         
         # 詳細日誌
@@ -1378,16 +1663,18 @@ class MCPDockerConfigurator:
             success_count = 0
             total_count = len(self.selected_servers)
             
-            for i, (server_id, server_info) in enumerate(self.selected_servers.items()):
-                progress_label.config(text=f"正在安裝 {server_info['name']}... ({i+1}/{total_count})")
-                log_text.insert(tk.END, f"\n🚀 開始下載 {server_info['image']}...\n")
+            for i, pull in enumerate(plan):
+                # 共用同一映像的服務器只需拉取一次
+                server_names = ", ".join(pull.server_names)
+                progress_label.config(text=f"正在安裝 {server_names}... ({i+1}/{len(plan)})")
+                log_text.insert(tk.END, f"\n🚀 開始下載 {pull.image} ({format_size(pull.new_bytes)})...\n")
                 log_text.see(tk.END)
                 progress_window.update()
                 
                 try:
                     # 執行 docker pull
                     process = subprocess.Popen(
-                        ["docker", "pull", server_info['image']],
+                        ["docker", "pull", pull.image],
                         stdout=subprocess.PIPE,
                         stderr=subprocess.STDOUT,
                         text=True,
@@ -1404,10 +1691,10 @@ class MCPDockerConfigurator:
                     process.wait(timeout=300) # Add a timeout (e.g., 5 minutes per image)
                     
                     if process.returncode == 0:
-                        log_text.insert(tk.END, f"✅ {server_info['name']} ({server_info['image']}) 安裝成功!\n")
-                        success_count += 1
+                        log_text.insert(tk.END, f"✅ {server_names} ({pull.image}) 安裝成功!\n")
+                        success_count += len(pull.server_names)
                     else:
-                        log_text.insert(tk.END, f"❌ {server_info['name']} ({server_info['image']}) 安裝失敗! Docker 返回碼: {process.returncode}\n")
+                        log_text.insert(tk.END, f"❌ {server_names} ({pull.image}) 安裝失敗! Docker 返回碼: {process.returncode}\n")
                         
                 except FileNotFoundError:
                     log_text.insert(tk.END, f"❌ Docker 命令 'docker pull' 未找到。請檢查 Docker 是否正確安裝。\n")
@@ -1415,10 +1702,10 @@ class MCPDockerConfigurator:
                     progress_label.config(text="Docker 命令未找到")
                     break 
                 except subprocess.TimeoutExpired:
-                    log_text.insert(tk.END, f"❌ {server_info['name']} ({server_info['image']}) 安裝超時。\n")
+                    log_text.insert(tk.END, f"❌ {server_names} ({pull.image}) 安裝超時。\n")
                     if process: process.kill() # Ensure the process is killed on timeout
                 except Exception as e:
-                    log_text.insert(tk.END, f"❌ {server_info['name']} ({server_info['image']}) 安裝時發生未預期錯誤: {str(e)}\n")
+                    log_text.insert(tk.END, f"❌ {server_names} ({pull.image}) 安裝時發生未預期錯誤: {str(e)}\n")
                     
                 progress_bar['value'] = i + 1
                 log_text.see(tk.END)
@@ -1539,19 +1826,22 @@ class MCPDockerConfigurator:
     def clear_all_selections(self):
         """清除所有選擇和配置"""
         if messagebox.askyesno("確認", "這將清除所有選擇和配置，是否繼續?"):
+            cleared = list(self.selected_servers)
             self.selected_servers.clear()
-            self.env_entries.clear()
             self.transport_vars.clear()
             
+            # 重置篩選
+            for var in self.facet_vars.values():
+                var.set("全部")
+            self.search_var.set("")
+            
             # 重置UI
+            self.tree_rows.update(cleared)
             self.populate_server_list()
             self.update_env_config()
+            self.env_values.clear()
             self.update_config_preview()
             
-            # 重置篩選
-            self.category_var.set("全部")
-            self.search_var.set("")
-            
             self.status_var.set("已清除所有選擇")
             
     def export_settings(self):
@@ -1632,6 +1922,7 @@ class MCPDockerConfigurator:
         # Proceed with applying settings if loading was successful
         try:
             # 清除現有選擇
+            previous = list(self.selected_servers)
             self.selected_servers.clear()
             
             # 匯入服務器選擇
@@ -1656,7 +1947,7 @@ class MCPDockerConfigurator:
             self.network_mode_var.set(resource_settings.get("network", "bridge"))
             
             # 更新UI
-            self.populate_server_list()
+            self.tree_rows.update(previous + list(self.selected_servers))
             self.update_env_config()
             self.update_config_preview()
             
@@ -1985,6 +2276,7 @@ def main():
     # 設定關閉事件
     def on_closing():
         if messagebox.askokcancel("退出", "確定要退出 MCP Docker 配置器嗎?"):
+            app.catalog_watcher.close()
             root.destroy()
     
     root.protocol("WM_DELETE_WINDOW", on_closing)
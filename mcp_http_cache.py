@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+MCP 爬蟲 HTTP 回應快取
+以 ETag / Last-Modified 發送條件式請求，304 回應直接由磁碟快取提供
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "mcp_docker_crawler", "http")
+DEFAULT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# 快取時保留的回應標頭
+_STORED_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+
+
+class ResponseCache:
+    """以磁碟儲存 GET 回應，依總大小做 LRU 淘汰"""
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, int]" = OrderedDict()  # key -> 檔案大小，依最近使用排序
+        self._total_bytes = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load_index()
+
+    def _load_index(self):
+        """依檔案修改時間重建 LRU 順序"""
+        files = []
+        for filename in os.listdir(self.cache_dir):
+            if not filename.endswith(".cache"):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, filename))
+            except OSError:
+                continue
+            files.append((stat.st_mtime, filename[:-len(".cache")], stat.st_size))
+        for _, key, size in sorted(files):
+            self._entries[key] = size
+            self._total_bytes += size
+
+    @staticmethod
+    def make_key(url: str, accept: Optional[str] = None) -> str:
+        return hashlib.sha256(f"{url}\n{accept or ''}".encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.cache")
+
+    def get(self, key: str) -> Optional[Tuple[Dict, bytes]]:
+        """讀取快取項目 (標頭資訊, 內容)，不存在時回傳 None"""
+        with self._lock:
+            if key not in self._entries:
+                return None
+        try:
+            with open(self._path(key), "rb") as f:
+                meta = json.loads(f.readline().decode("utf-8"))
+                body = f.read()
+        except (OSError, ValueError):
+            self._discard(key)
+            return None
+        return meta, body
+
+    def touch(self, key: str):
+        """標記為最近使用"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+        try:
+            os.utime(self._path(key))
+        except OSError:
+            pass
+
+    def store(self, key: str, url: str, headers: Dict[str, str], body: bytes):
+        """寫入快取項目並淘汰最久未使用的項目"""
+        meta = {"url": url, "headers": headers}
+        data = json.dumps(meta, ensure_ascii=False).encode("utf-8") + b"\n" + body
+        if len(data) > self.max_bytes:
+            return
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            logger.warning(f"寫入 HTTP 快取失敗: {e}")
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            return
+
+        with self._lock:
+            self._total_bytes -= self._entries.pop(key, 0)
+            self._entries[key] = len(data)
+            self._total_bytes += len(data)
+            evicted = []
+            while self._total_bytes > self.max_bytes and self._entries:
+                old_key, size = self._entries.popitem(last=False)
+                self._total_bytes -= size
+                evicted.append(old_key)
+        for old_key in evicted:
+            try:
+                os.unlink(self._path(old_key))
+            except OSError:
+                pass
+
+    def _discard(self, key: str):
+        with self._lock:
+            self._total_bytes -= self._entries.pop(key, 0)
+        try:
+            os.unlink(self._path(key))
+        except OSError:
+            pass
+
+    def record(self, hit: bool, size: int = 0):
+        with self._lock:
+            if hit:
+                self.hits += 1
+                self.bytes_saved += size
+            else:
+                self.misses += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "bytes_saved": self.bytes_saved,
+                "entries": len(self._entries),
+                "size_bytes": self._total_bytes,
+            }
+
+
+class CachingHTTPAdapter(HTTPAdapter):
+    """為 GET 請求加上 If-None-Match / If-Modified-Since，並以快取回應 304"""
+
+    def __init__(self, cache: ResponseCache, **kwargs):
+        super().__init__(**kwargs)
+        self.cache = cache
+
+    def send(self, request, **kwargs):
+        if request.method != "GET":
+            return super().send(request, **kwargs)
+
+        key = self.cache.make_key(request.url, request.headers.get("Accept"))
+        cached = self.cache.get(key)
+        if cached:
+            cached_headers = cached[0]["headers"]
+            if cached_headers.get("ETag"):
+                request.headers["If-None-Match"] = cached_headers["ETag"]
+            if cached_headers.get("Last-Modified"):
+                request.headers["If-Modified-Since"] = cached_headers["Last-Modified"]
+
+        response = super().send(request, **kwargs)
+
+        if response.status_code == 304 and cached:
+            meta, body = cached
+            self.cache.touch(key)
+            self.cache.record(hit=True, size=len(body))
+            return self._build_cached_response(request, response, meta, body)
+
+        self.cache.record(hit=False)
+        if response.status_code == 200:
+            headers = {name: response.headers[name] for name in _STORED_HEADERS if name in response.headers}
+            if "ETag" in headers or "Last-Modified" in headers:
+                self.cache.store(key, request.url, headers, response.content)
+        return response
+
+    def _build_cached_response(self, request, not_modified, meta: Dict, body: bytes) -> requests.Response:
+        """以快取內容組成 200 回應，並保留 304 回應帶回的新標頭 (例如速率限制資訊)"""
+        not_modified.close()
+        headers = CaseInsensitiveDict(meta["headers"])
+        for name, value in not_modified.headers.items():
+            if name.lower() not in ("content-length", "content-encoding", "transfer-encoding"):
+                headers[name] = value
+
+        response = requests.Response()
+        response.status_code = 200
+        response.reason = "OK"
+        response.headers = headers
+        response._content = body
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        response.elapsed = not_modified.elapsed
+        response.encoding = requests.utils.get_encoding_from_headers(headers)
+        response.from_cache = True
+        return response
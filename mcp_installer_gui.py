@@ -13,53 +13,39 @@ import os
 import webbrowser
 from datetime import datetime
 import platform
+import time
 import yaml # 新增，用於生成 docker-compose.yml
+from concurrent.futures import ThreadPoolExecutor
 
-# 全域變數用於儲存從 JSON 載入的伺服器數據
-MCP_SERVERS_DATA = []
+from mcp_catalog import load_servers, stream_servers, CatalogFormatError, plan_image_pulls, total_download_bytes, format_size
+from mcp_search import SearchIndex, facet_label, server_matches
+from mcp_tree_rows import RowCache, create_tree_rows
+
+# 串流載入目錄時每批插入列的時間上限 (約一個畫面)，超過即交還事件迴圈
+STREAM_BATCH_SECONDS = 0.015
+# 停止輸入這麼久後才篩選，連續按鍵只觸發一次搜尋
+SEARCH_DEBOUNCE_MS = 150
+SEARCH_POLL_MS = 10
 
 def load_mcp_servers_from_catalog():
-    """從 mcp_catalog.json 載入 MCP 伺服器數據"""
-    global MCP_SERVERS_DATA
+    """從 mcp_catalog.json 載入 MCP 伺服器數據 (程序內共用快取的唯讀資料)"""
     try:
-        with open('mcp_catalog.json', 'r', encoding='utf-8') as f:
-            catalog_data = json.load(f) # Load into a temporary variable
-
-        if isinstance(catalog_data, dict) and 'servers' in catalog_data:
-            # New format: catalog_data is a dict with a 'servers' key
-            actual_servers_dict = catalog_data['servers']
-            MCP_SERVERS_DATA = actual_servers_dict 
-            return actual_servers_dict
-        elif isinstance(catalog_data, list):
-            # Old format: catalog_data is a list of server objects
-            # Ensure each item is a dict with an 'id' before processing
-            actual_servers_dict = {
-                server['id']: server 
-                for server in catalog_data 
-                if isinstance(server, dict) and 'id' in server
-            }
-            # Check if the conversion resulted in an empty dict from a non-empty list,
-            # which might indicate malformed list items.
-            if not actual_servers_dict and catalog_data:
-                 messagebox.showerror("錯誤", "mcp_catalog.json 檔案格式錯誤：列表中的項目無效。")
-                 MCP_SERVERS_DATA = {}
-                 return {}
-            MCP_SERVERS_DATA = actual_servers_dict
-            return actual_servers_dict
-        else:
-            # Invalid structure
-            messagebox.showerror("錯誤", "mcp_catalog.json 檔案格式錯誤：結構無效，預期為列表或包含 'servers' 鍵的字典。")
-            MCP_SERVERS_DATA = {}
-            return {}
+        return load_servers()
+    except FileNotFoundError:
+        messagebox.showerror("錯誤", "找不到 mcp_catalog.json 檔案！請確保該檔案存在於專案根目錄。")
+    except CatalogFormatError as e:
+        messagebox.showerror("錯誤", str(e))
+    return {}
 
+def stream_mcp_servers_from_catalog():
+    """開始串流載入 mcp_catalog.json 的 MCP 伺服器 (逐筆產生唯讀資料)，失敗時回傳 None"""
+    try:
+        return stream_servers()
     except FileNotFoundError:
         messagebox.showerror("錯誤", "找不到 mcp_catalog.json 檔案！請確保該檔案存在於專案根目錄。")
-        MCP_SERVERS_DATA = {}
-        return {}
-    except json.JSONDecodeError:
-        messagebox.showerror("錯誤", "mcp_catalog.json 檔案格式錯誤！")
-        MCP_SERVERS_DATA = {}
-        return {}
+    except CatalogFormatError as e:
+        messagebox.showerror("錯誤", str(e))
+    return None
 
 class MCPInstallerGUI:
     def __init__(self, root):
@@ -69,16 +55,33 @@ class MCPInstallerGUI:
         
         self.setup_styles()
         
-        self.mcp_servers = load_mcp_servers_from_catalog()
-        if not self.mcp_servers:
+        # 目錄以串流方式邊解析邊顯示；全部載入後在背景建立一次搜尋索引，輸入搜尋字詞時不再逐筆掃描
+        self.server_stream = stream_mcp_servers_from_catalog()
+        if self.server_stream is None:
             self.root.quit()
             return
+        self.mcp_servers = {}
+        self.search_index = None
+        # 列的顯示字串每個服務器只格式化一次
+        self.row_cache = RowCache(lambda server_id: self.format_server_row(server_id, self.mcp_servers[server_id]))
+        # 搜尋在背景執行緒執行，較新的搜尋取代尚未完成的搜尋；結果分批套用到列表
+        self.search_executor = ThreadPoolExecutor(max_workers=1)
+        self.search_after = None
+        self.search_future = None
+        self.search_pass = None
         
         self.selected_servers = {}
         self.env_entries = {}
+        # 環境變數面板：每個服務器一個框架 (server_id -> (框架, 輸入欄位鍵))，釋放的輸入框放回共用池，
+        # 取消選擇前輸入的值保留在 env_values
+        self.env_frames = {}
+        self.env_entry_pool = []
+        self.env_values = {}
+        self.env_container = None
         
         self.create_widgets()
         self.update_status_bar("就緒")
+        self.root.after_idle(self.load_servers_incrementally)
 
     def setup_styles(self):
         style = ttk.Style(self.root)
@@ -214,17 +217,28 @@ class MCPInstallerGUI:
         filter_bar = ttk.Frame(server_list_lf)
         filter_bar.grid(row=0, column=0, sticky=(tk.W, tk.E), pady=(0,10))
         
-        ttk.Label(filter_bar, text="分類:").pack(side=tk.LEFT, padx=(0,5))
-        categories = ["全部"] + sorted(list(set(s.get("category", "未分類") for s in self.mcp_servers.values())))
-        self.category_var = tk.StringVar(value="全部")
-        category_combo = ttk.Combobox(filter_bar, textvariable=self.category_var, values=categories, 
-                                      state="readonly", width=15, font=('Arial', 10))
-        category_combo.pack(side=tk.LEFT, padx=(0,10))
-        category_combo.bind("<<ComboboxSelected>>", self.filter_servers)
-        
-        ttk.Label(filter_bar, text="搜尋:").pack(side=tk.LEFT, padx=(0,5))
+        search_bar = ttk.Frame(filter_bar)
+        search_bar.pack(side=tk.TOP, fill=tk.X)
+        facet_bar = ttk.Frame(filter_bar)
+        facet_bar.pack(side=tk.TOP, fill=tk.X, pady=(5,0))
+        
+        # 多重篩選：分類在第一列，其餘條件在第二列，選項後方顯示符合的數量
+        self.facet_vars = {}
+        self.facet_combos = {}
+        self.facet_choices = {}
+        for facet, title, width, bar in (("category", "分類:", 15, search_bar), ("security_level", "安全:", 10, facet_bar),
+                                         ("docker_required", "Docker:", 12, facet_bar), ("official", "來源:", 8, facet_bar),
+                                         ("popularity", "熱門:", 8, facet_bar)):
+            ttk.Label(bar, text=title).pack(side=tk.LEFT, padx=(0,5))
+            self.facet_vars[facet] = tk.StringVar(value="全部")
+            self.facet_combos[facet] = ttk.Combobox(bar, textvariable=self.facet_vars[facet], 
+                                                    state="readonly", width=width, font=('Arial', 10))
+            self.facet_combos[facet].pack(side=tk.LEFT, padx=(0,10))
+            self.facet_combos[facet].bind("<<ComboboxSelected>>", self.filter_servers)
+        
+        ttk.Label(search_bar, text="搜尋:").pack(side=tk.LEFT, padx=(0,5))
         self.search_var = tk.StringVar()
-        search_entry = ttk.Entry(filter_bar, textvariable=self.search_var, width=25, font=('Arial', 10))
+        search_entry = ttk.Entry(search_bar, textvariable=self.search_var, width=25, font=('Arial', 10))
         search_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
         search_entry.bind("<KeyRelease>", self.filter_servers)
 
@@ -246,6 +260,9 @@ class MCPInstallerGUI:
 
         vsb = ttk.Scrollbar(server_list_lf, orient=tk.VERTICAL, command=self.server_tree.yview)
         self.server_tree.configure(yscrollcommand=vsb.set)
+        # 列狀態模型：選擇切換只更新變更的儲存格，篩選改變時只處理差異的列；
+        # 虛擬列表只建立可見範圍的 Tk 項目，捲動時重新繫結 (接管垂直捲軸)
+        self.tree_rows = create_tree_rows(self.server_tree, self.server_row, columns, vsb)
         self.server_tree.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
         vsb.grid(row=1, column=1, sticky=(tk.N, tk.S))
         self.server_tree.bind("<Double-1>", self.toggle_server_selection_event)
@@ -345,55 +362,148 @@ class MCPInstallerGUI:
         self.root.update_idletasks()
         
     def populate_server_list(self):
-        for item in self.server_tree.get_children():
-            self.server_tree.delete(item)
+        self.search_after = None
+        if self.search_future is not None:
+            # 尚未開始的較舊搜尋直接取消，已在執行的搜尋結果會被忽略
+            self.search_future.cancel()
+            self.search_future = None
             
-        category_filter = self.category_var.get()
         search_term = self.search_var.get().lower()
+        selected_facets = self.get_selected_facets()
         
-        for server_id, info in self.mcp_servers.items():
-            if category_filter != "全部" and info.get("category") != category_filter:
-                continue
+        # 目錄仍在串流載入時索引尚未建立，先以子字串比對已載入的服務器
+        if self.search_index is None:
+            self.show_search_results([server_id for server_id, info in self.mcp_servers.items()
+                                      if server_matches(server_id, info, search_term, selected_facets)])
+            return
+        index = self.search_index
+        self.search_future = self.search_executor.submit(
+            lambda: (index.facet_counts(search_term, selected_facets), index.filter(search_term, selected_facets)))
+        self.check_search_results(self.search_future, selected_facets)
+        
+    def check_search_results(self, future, selected_facets):
+        """背景搜尋完成後更新篩選選項數量並套用結果；已被較新的搜尋取代時直接結束"""
+        if future is not self.search_future:
+            return
+        if not future.done():
+            self.root.after(SEARCH_POLL_MS, lambda: self.check_search_results(future, selected_facets))
+            return
+        self.search_future = None
+        counts, server_ids = future.result()
+        self.show_facet_counts(counts, selected_facets)
+        self.show_search_results(server_ids)
+        
+    def show_search_results(self, server_ids):
+        self.search_pass = self.tree_rows.show_incrementally(server_ids)
+        self.apply_search_results(self.search_pass)
+        
+    def apply_search_results(self, steps):
+        """逐批套用搜尋結果，每批不超過一個畫面的時間；已有較新的搜尋時停止"""
+        if steps is not self.search_pass:
+            return
+        deadline = time.perf_counter() + STREAM_BATCH_SECONDS
+        for _ in steps:
+            if time.perf_counter() >= deadline:
+                self.root.after_idle(lambda: self.apply_search_results(steps))
+                return
+        self.search_pass = None
+        self.update_status_bar(f"顯示 {len(self.tree_rows)} 個服務器")
             
-            name_lower = info.get("name", "").lower()
-            desc_lower = info.get("description", "").lower()
-            cat_lower = info.get("category", "").lower()
-            pop_lower = info.get("popularity", "").lower()
-            use_cases_lower = " ".join(info.get("use_cases", [])).lower()
-
-            if search_term and not (
-                search_term in server_id.lower() or 
-                search_term in name_lower or 
-                search_term in desc_lower or 
-                search_term in cat_lower or 
-                search_term in pop_lower or
-                search_term in use_cases_lower
-            ):
-                continue
-                
-            selected_char = "✔" if server_id in self.selected_servers else "▫"
-            popularity_str = f" ({info.get('popularity', 'N/A')})"
+    def server_row(self, server_id):
+        """回傳服務器列的顯示值與標籤 (選擇標記加上快取的顯示字串)"""
+        values, tags = self.row_cache[server_id]
+        return ("✔" if server_id in self.selected_servers else "▫",) + values, tags
             
-            description_display = info.get('description', '')
-            use_cases_display = ", ".join(info.get("use_cases", []))
-            if use_cases_display:
-                description_display += f"\n應用: {use_cases_display}"
+    def format_server_row(self, server_id, info):
+        """服務器列中與選擇狀態無關的顯示值與標籤 (由 row_cache 快取)"""
+        popularity_str = f" ({info.get('popularity', 'N/A')})"
+        
+        description_display = info.get('description', '')
+        use_cases_display = ", ".join(info.get("use_cases", []))
+        if use_cases_display:
+            description_display += f"\n應用: {use_cases_display}"
+        
+        item_tags = ('wrap',)
+        return (
+            info.get("name", "N/A") + popularity_str, 
+            info.get("category", "N/A"), 
+            description_display, 
+            info.get("image", "N/A")
+        ), item_tags
             
-            item_tags = ('wrap',)
-            self.server_tree.insert("", tk.END, iid=server_id, values=(
-                selected_char, 
-                info.get("name", "N/A") + popularity_str, 
-                info.get("category", "N/A"), 
-                description_display, 
-                info.get("image", "N/A")
-            ), tags=item_tags)
-        self.update_status_bar(f"顯示 {len(self.server_tree.get_children())} 個服務器")
+    def load_servers_incrementally(self):
+        """在閒置時段逐批加入串流解析出的服務器，每批不超過一個畫面的時間，解析期間介面可正常操作"""
+        deadline = time.perf_counter() + STREAM_BATCH_SECONDS
+        search_term = self.search_var.get().lower()
+        selected_facets = self.get_selected_facets()
+        try:
+            for server_id, info in self.server_stream:
+                self.mcp_servers[server_id] = info
+                if server_matches(server_id, info, search_term, selected_facets):
+                    self.tree_rows.insert(server_id)
+                if time.perf_counter() >= deadline:
+                    self.update_status_bar(f"載入目錄中... 已載入 {len(self.mcp_servers)} 個服務器")
+                    self.root.after_idle(self.load_servers_incrementally)
+                    return
+        except (CatalogFormatError, OSError) as e:
+            self.server_stream = None
+            self.update_status_bar(f"載入目錄失敗，已載入 {len(self.mcp_servers)} 個服務器")
+            messagebox.showerror("錯誤", str(e))
+            return
+        
+        # 搜尋索引需要完整目錄，在背景執行緒建立，完成前搜尋以子字串比對
+        self.update_status_bar(f"已載入 {len(self.mcp_servers)} 個服務器，建立搜尋索引中...")
+        executor = ThreadPoolExecutor(max_workers=1)
+        self.index_future = executor.submit(SearchIndex, self.mcp_servers)
+        executor.shutdown(wait=False)
+        self.root.after(50, self.check_search_index)
+        
+    def check_search_index(self):
+        """搜尋索引建立完成後啟用多重篩選"""
+        if not self.index_future.done():
+            self.root.after(50, self.check_search_index)
+            return
+        try:
+            self.search_index = self.index_future.result()
+        except Exception as e:
+            # 沒有索引時搜尋維持逐筆比對
+            self.update_status_bar(f"建立搜尋索引失敗，搜尋改為逐筆比對: {e}")
+            return
+        # 沒有搜尋字詞時列表已是完整目錄，只需更新篩選選項的數量
+        if self.search_var.get():
+            self.populate_server_list()
+        else:
+            self.update_facet_counts("", self.get_selected_facets())
+            self.update_status_bar(f"顯示 {len(self.tree_rows)} 個服務器")
             
     def filter_servers(self, event=None):
-        self.populate_server_list()
+        """合併連續輸入，停止輸入 SEARCH_DEBOUNCE_MS 後才篩選"""
+        if self.search_after is not None:
+            self.root.after_cancel(self.search_after)
+        self.search_after = self.root.after(SEARCH_DEBOUNCE_MS, self.populate_server_list)
+        
+    def get_selected_facets(self):
+        return {facet: self.facet_choices.get(facet, {}).get(var.get())
+                for facet, var in self.facet_vars.items()}
+        
+    def update_facet_counts(self, search_term, selected_facets):
+        if self.search_index is None:
+            return
+        self.show_facet_counts(self.search_index.facet_counts(search_term, selected_facets), selected_facets)
+        
+    def show_facet_counts(self, counts, selected_facets):
+        for facet, combo in self.facet_combos.items():
+            choices = {"全部": None}
+            for value, count in counts[facet].items():
+                label = f"{facet_label(facet, value)} ({count})"
+                choices[label] = value
+                if selected_facets.get(facet) == value:
+                    self.facet_vars[facet].set(label)
+            self.facet_choices[facet] = choices
+            combo["values"] = list(choices)
         
     def toggle_server_selection_event(self, event):
-        item_id = self.server_tree.identify_row(event.y)
+        item_id = self.tree_rows.server_id(self.server_tree.identify_row(event.y))
         if item_id:
             self.toggle_selection(item_id)
 
@@ -402,7 +512,7 @@ class MCPInstallerGUI:
         if region == "cell":
             column = self.server_tree.identify_column(event.x)
             if column == "#1": 
-                item_id = self.server_tree.identify_row(event.y)
+                item_id = self.tree_rows.server_id(self.server_tree.identify_row(event.y))
                 if item_id:
                     self.toggle_selection(item_id)
     
@@ -411,44 +521,68 @@ class MCPInstallerGUI:
             del self.selected_servers[server_id]
         else:
             self.selected_servers[server_id] = self.mcp_servers[server_id]
-        self.populate_server_list() 
+        self.tree_rows.update([server_id])
         self.update_env_config_display()
         self.generate_configs() # Selection change should also trigger re-generation if a type is selected
         self.update_status_bar(f"{len(self.selected_servers)} 個服務器已選擇")
 
     def update_env_config_display(self):
-        for widget in self.env_scrollable_frame.winfo_children():
-            widget.destroy()
-        self.env_entries.clear()
-        
-        if not self.selected_servers:
-            ttk.Label(self.env_scrollable_frame, text="← 請先在左側選擇服務器", 
-                      font=('Arial', 11, 'italic'), padding=(10,20)).pack(anchor=tk.CENTER, pady=20)
-            return
-
-        container_frame = ttk.Frame(self.env_scrollable_frame)
-        container_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-
+        """只新增或移除選擇有變更的服務器框架，其他服務器已輸入的值保留"""
+        if self.env_container is None:
+            self.env_container = ttk.Frame(self.env_scrollable_frame)
+            self.env_container.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+            self.env_hint_label = ttk.Label(self.env_scrollable_frame, font=('Arial', 11, 'italic'), padding=(10,20))
+            
+        for server_id in list(self.env_frames):
+            if server_id not in self.selected_servers:
+                self.release_env_frame(server_id)
+                
         for server_id in self.selected_servers:
             server_info = self.mcp_servers.get(server_id)
-            if not server_info or not server_info.get("env_vars"):
+            if server_id in self.env_frames or not server_info or not server_info.get("env_vars"):
                 continue
+            self.create_env_frame(server_id, server_info)
+        
+        if not self.selected_servers:
+            self.env_hint_label.config(text="← 請先在左側選擇服務器")
+            self.env_hint_label.pack(anchor=tk.CENTER, pady=20)
+        elif not self.env_entries: # Selected servers but none need env vars
+            self.env_hint_label.config(text="選定的服務器無需額外環境變數")
+            self.env_hint_label.pack(anchor=tk.CENTER, pady=20)
+        else:
+            self.env_hint_label.pack_forget()
             
-            server_lf = ttk.LabelFrame(container_frame, text=f"🔧 {server_info.get('name')} ({server_info.get('image')})", padding=10)
-            server_lf.pack(fill=tk.X, expand=True, pady=(0,10))
-            # server_lf.columnconfigure(1, weight=1)
-
-            for i, env_var in enumerate(server_info.get("env_vars", [])):
-                ttk.Label(server_lf, text=f"{env_var}:").grid(row=i, column=0, sticky=tk.W, padx=5, pady=3)
-                is_sensitive = "token" in env_var.lower() or "key" in env_var.lower() or "secret" in env_var.lower()
-                entry = ttk.Entry(server_lf, width=45, show="*" if is_sensitive else None, font=('Arial', 10))
-                entry.grid(row=i, column=1, sticky=tk.EW, padx=5, pady=3)
-                server_lf.columnconfigure(1, weight=1) # Make entry expand
-                self.env_entries[f"{server_id}.{env_var}"] = entry
-        
-        if not self.env_entries and self.selected_servers: # Selected servers but none need env vars
-             ttk.Label(self.env_scrollable_frame, text="選定的服務器無需額外環境變數", 
-                      font=('Arial', 11, 'italic'), padding=(10,20)).pack(anchor=tk.CENTER, pady=20)
+    def create_env_frame(self, server_id, server_info):
+        server_lf = ttk.LabelFrame(self.env_container, text=f"🔧 {server_info.get('name')} ({server_info.get('image')})", padding=10)
+        server_lf.pack(fill=tk.X, expand=True, pady=(0,10))
+        # server_lf.columnconfigure(1, weight=1)
+
+        entry_keys = []
+        for i, env_var in enumerate(server_info.get("env_vars", [])):
+            ttk.Label(server_lf, text=f"{env_var}:").grid(row=i, column=0, sticky=tk.W, padx=5, pady=3)
+            is_sensitive = "token" in env_var.lower() or "key" in env_var.lower() or "secret" in env_var.lower()
+            # 輸入框屬於 env_container，以 grid in_ 放進服務器框架，框架移除後回收到共用池重複使用
+            entry = self.env_entry_pool.pop() if self.env_entry_pool else ttk.Entry(self.env_container, width=45, font=('Arial', 10))
+            entry.configure(show="*" if is_sensitive else "")
+            entry.grid(in_=server_lf, row=i, column=1, sticky=tk.EW, padx=5, pady=3)
+            entry.lift(server_lf)
+            server_lf.columnconfigure(1, weight=1) # Make entry expand
+            key = f"{server_id}.{env_var}"
+            entry.insert(0, self.env_values.pop(key, ""))  # 還原取消選擇前輸入的值
+            self.env_entries[key] = entry
+            entry_keys.append(key)
+        self.env_frames[server_id] = (server_lf, entry_keys)
+        
+    def release_env_frame(self, server_id):
+        server_lf, entry_keys = self.env_frames.pop(server_id)
+        for key in entry_keys:
+            entry = self.env_entries.pop(key)
+            if entry.get():
+                self.env_values[key] = entry.get()
+            entry.delete(0, tk.END)
+            entry.grid_forget()
+            self.env_entry_pool.append(entry)
+        server_lf.destroy()
             
     def generate_configs(self):
         if not self.selected_servers:
@@ -689,9 +823,13 @@ class MCPInstallerGUI:
         if not self.selected_servers:
             messagebox.showwarning("無選擇", "請先選擇要安裝的 MCP 服務器映像。", parent=self.root)
             return
-        server_list_str = "\n".join([f"- {self.mcp_servers[s_id].get('name')} ({self.mcp_servers[s_id].get('image')})" 
-                                    for s_id in self.selected_servers])
-        if not messagebox.askyesno("確認安裝", f"即將拉取以下 Docker 映像：\n{server_list_str}\n\n是否繼續？", parent=self.root):
+        # 相同映像只拉取一次，依目錄中的 manifest 大小排序並扣除共用層
+        plan = plan_image_pulls(self.mcp_servers[s_id] for s_id in self.selected_servers)
+        server_list_str = "\n".join([f"- {', '.join(pull.server_names)} ({pull.image}, {format_size(pull.new_bytes)})" 
+                                    for pull in plan])
+        total_bytes = total_download_bytes(plan)
+        size_note = f"\n預估下載量：{format_size(total_bytes)}" if total_bytes is not None else ""
+        if not messagebox.askyesno("確認安裝", f"即將拉取以下 Docker 映像：\n{server_list_str}{size_note}\n\n是否繼續？", parent=self.root):
             return
             
         self.update_status_bar("開始安裝服務器映像...")
@@ -709,12 +847,12 @@ class MCPInstallerGUI:
         self.root.update_idletasks()
         
         installed_count, failed_count = 0,0
-        total_servers = len(self.selected_servers)
-        for i, server_id in enumerate(self.selected_servers.keys()):
-            server_info = self.mcp_servers[server_id]
-            image_to_pull = server_info.get("image")
+        total_pulls = len(plan)
+        for i, pull in enumerate(plan):
+            server_names = ", ".join(pull.server_names)
+            image_to_pull = pull.image
             log_area.config(state=tk.NORMAL)
-            log_area.insert(tk.END, f"\n[{i+1}/{total_servers}] 拉取 {server_info.get('name')} ({image_to_pull})...\n")
+            log_area.insert(tk.END, f"\n[{i+1}/{total_pulls}] 拉取 {server_names} ({image_to_pull}, {format_size(pull.new_bytes)})...\n")
             log_area.see(tk.END)
             log_area.config(state=tk.DISABLED)
             progress_popup.update()
@@ -726,11 +864,11 @@ class MCPInstallerGUI:
                     log_area.config(state=tk.DISABLED); progress_popup.update()
                 process.wait()
                 if process.returncode == 0:
-                    log_area.config(state=tk.NORMAL); log_area.insert(tk.END, f"✓ {server_info.get('name')} 拉取成功！\n"); installed_count += 1
+                    log_area.config(state=tk.NORMAL); log_area.insert(tk.END, f"✓ {server_names} 拉取成功！\n"); installed_count += len(pull.server_names)
                 else:
-                    log_area.config(state=tk.NORMAL); log_area.insert(tk.END, f"✗ {server_info.get('name')} 拉取失敗 (碼: {process.returncode})\n"); failed_count += 1
+                    log_area.config(state=tk.NORMAL); log_area.insert(tk.END, f"✗ {server_names} 拉取失敗 (碼: {process.returncode})\n"); failed_count += len(pull.server_names)
             except Exception as e:
-                log_area.config(state=tk.NORMAL); log_area.insert(tk.END, f"✗ 拉取 {server_info.get('name')} 錯誤: {e}\n"); failed_count += 1
+                log_area.config(state=tk.NORMAL); log_area.insert(tk.END, f"✗ 拉取 {server_names} 錯誤: {e}\n"); failed_count += len(pull.server_names)
             finally:
                 log_area.see(tk.END); log_area.config(state=tk.DISABLED); progress_popup.update()
         final_msg = f"安裝完成！成功: {installed_count}, 失敗: {failed_count}"
@@ -741,14 +879,15 @@ class MCPInstallerGUI:
         
     def clear_all(self):
         if messagebox.askyesno("確認清除", "是否清除所有選擇和配置?", parent=self.root):
+            cleared = list(self.selected_servers)
             self.selected_servers.clear()
-            self.env_entries.clear()
             self.config_text_area.config(state=tk.NORMAL)
             self.config_text_area.delete(1.0, tk.END)
             self.config_text_area.insert(tk.INSERT, "選擇已清除。請重新選擇服務器和配置類型。")
             self.config_text_area.config(state=tk.DISABLED)
-            self.populate_server_list()
+            self.tree_rows.update(cleared)
             self.update_env_config_display()
+            self.env_values.clear()
             self.update_status_bar("所有選擇已清除")
             
     def show_help_popup(self):
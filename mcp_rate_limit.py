@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+MCP 爬蟲請求排程器
+依 Docker Hub 速率限制標頭調整請求速率，429 時以帶抖動的指數退避重試並動態降低並行數
+"""
+
+import email.utils
+import logging
+import random
+import threading
+import time
+from typing import Callable, Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+# 可重試的 HTTP 狀態碼
+RETRY_STATUSES = (429, 502, 503, 504)
+
+
+class RateLimitError(RuntimeError):
+    """重試用盡後仍被 Docker Hub 限流"""
+
+
+def _parse_int_header(value: Optional[str]) -> Optional[int]:
+    """解析 '180' 或 '100;w=21600' 形式的標頭值"""
+    if not value:
+        return None
+    try:
+        return int(float(value.split(";", 1)[0].strip()))
+    except ValueError:
+        return None
+
+
+def parse_retry_after(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """解析 Retry-After (秒數或 HTTP 日期)，回傳需等待的秒數"""
+    if not value:
+        return None
+    now = time.time() if now is None else now
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - now)
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """令牌桶，速率可依伺服器回報的剩餘配額即時調整"""
+
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """取得一個令牌，不足時阻塞等待"""
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._refill(now)
+                if now >= self._blocked_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                if now < self._blocked_until:
+                    wait = self._blocked_until - now
+                else:
+                    wait = (1 - self.tokens) / self.rate
+            self._sleep(wait)
+
+    def block_for(self, seconds: float):
+        """在指定秒數內暫停發放令牌"""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, self._clock() + seconds)
+
+    def update_quota(self, remaining: int, reset_in: float):
+        """依剩餘配額與重置時間，將剩餘請求平均分配到重置前"""
+        with self._lock:
+            self._refill(self._clock())
+            self.tokens = min(self.tokens, float(remaining))
+            if remaining <= 0:
+                self._blocked_until = max(self._blocked_until, self._clock() + reset_in)
+            else:
+                self.rate = max(remaining / max(reset_in, 1.0), 0.01)
+
+
+class AdaptiveConcurrency:
+    """加法遞增、乘法遞減 (AIMD) 的並行數閘門"""
+
+    def __init__(self, maximum: int, minimum: int = 1):
+        self.maximum = maximum
+        self.minimum = minimum
+        self.limit = float(maximum)
+        self.active = 0
+        self._cond = threading.Condition()
+
+    def __enter__(self):
+        with self._cond:
+            while self.active >= int(self.limit):
+                self._cond.wait()
+            self.active += 1
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        with self._cond:
+            self.active -= 1
+            self._cond.notify_all()
+
+    def on_success(self):
+        with self._cond:
+            self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            self._cond.notify_all()
+
+    def on_throttled(self):
+        with self._cond:
+            self.limit = max(self.minimum, self.limit / 2)
+
+
+class RequestScheduler:
+    """爬蟲所有請求共用的排程器"""
+
+    def __init__(self, max_concurrency: int = 8, rate: float = 10.0, max_retries: int = 5,
+                 backoff_base: float = 1.0, backoff_max: float = 60.0,
+                 sleep: Callable[[float], None] = time.sleep, quota_headers: bool = True):
+        self.bucket = TokenBucket(rate, capacity=max(max_concurrency, 1), sleep=sleep)
+        self.concurrency = AdaptiveConcurrency(max_concurrency)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._sleep = sleep
+        # registry 的 RateLimit-* 是映像拉取配額而非 API 速率，該排程器不應據此調整令牌桶
+        self.quota_headers = quota_headers
+        self.throttled = 0
+        self.retries = 0
+
+    def backoff_delay(self, attempt: int) -> float:
+        """完整抖動 (full jitter) 的指數退避"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def observe(self, response: requests.Response):
+        """讀取 X-RateLimit-* 標頭更新令牌桶"""
+        headers = response.headers
+        remaining = _parse_int_header(headers.get("X-RateLimit-Remaining") or headers.get("RateLimit-Remaining"))
+        if remaining is None:
+            return
+        reset = _parse_int_header(headers.get("X-RateLimit-Reset") or headers.get("RateLimit-Reset"))
+        now = time.time()
+        if reset is None:
+            reset_in = 60.0
+        elif reset > 1_000_000_000:  # Unix 時間戳
+            reset_in = max(reset - now, 0.0)
+        else:
+            reset_in = float(reset)
+        self.bucket.update_quota(remaining, reset_in)
+
+    def request(self, session, method: str, url: str, **kwargs) -> requests.Response:
+        """經由令牌桶與並行閘門送出請求，遇到 429 / 5xx 時退避重試"""
+        attempt = 0
+        while True:
+            self.bucket.acquire()
+            try:
+                with self.concurrency:
+                    response = session.request(method, url, **kwargs)
+            except requests.ConnectionError:
+                if attempt >= self.max_retries:
+                    raise
+                self.retries += 1
+                self._sleep(self.backoff_delay(attempt))
+                attempt += 1
+                continue
+
+            if self.quota_headers:
+                self.observe(response)
+            if response.status_code not in RETRY_STATUSES:
+                self.concurrency.on_success()
+                return response
+
+            if response.status_code == 429:
+                self.throttled += 1
+                self.concurrency.on_throttled()
+
+            if attempt >= self.max_retries:
+                if response.status_code == 429:
+                    raise RateLimitError(f"{url} 重試 {attempt} 次後仍被限流")
+                return response
+
+            delay = parse_retry_after(response.headers.get("Retry-After"))
+            if delay is None:
+                delay = self.backoff_delay(attempt)
+            else:
+                delay = min(delay, self.backoff_max)
+            if response.status_code == 429:
+                self.bucket.block_for(delay)
+                logger.warning(f"Docker Hub 限流 ({url})，{delay:.1f} 秒後重試，"
+                               f"並行數降為 {int(self.concurrency.limit)}")
+            self.retries += 1
+            response.close()
+            self._sleep(delay)
+            attempt += 1
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+MCP 映像 registry 探測模組
+以 registry v2 API 的 manifest HEAD / GET 取得映像摘要、壓縮大小、層摘要與架構，不下載任何映像層
+"""
+
+import hashlib
+import logging
+import re
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import requests
+
+from mcp_rate_limit import RequestScheduler
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REGISTRY_URL = "https://registry-1.docker.io"
+
+# 依偏好順序宣告可接受的 manifest 格式，多架構映像會回傳 index / manifest list
+INDEX_MEDIA_TYPES = (
+    "application/vnd.oci.image.index.v1+json",
+    "application/vnd.docker.distribution.manifest.list.v2+json",
+)
+IMAGE_MEDIA_TYPES = (
+    "application/vnd.oci.image.manifest.v1+json",
+    "application/vnd.docker.distribution.manifest.v2+json",
+)
+MANIFEST_ACCEPT = ", ".join(INDEX_MEDIA_TYPES + IMAGE_MEDIA_TYPES)
+
+# 寫入目錄項目的欄位
+MANIFEST_FIELDS = ("image_digest", "compressed_size", "layers", "architectures")
+
+
+def parse_bearer_challenge(value: Optional[str]) -> Optional[Dict[str, str]]:
+    """解析 WWW-Authenticate: Bearer realm="...",service="...",scope="..." """
+    if not value or not value.lower().startswith("bearer "):
+        return None
+    return dict(re.findall(r'(\w+)="([^"]*)"', value))
+
+
+def split_image_reference(image: str) -> Tuple[str, str]:
+    """將 'mcp/time:1.0' 拆為 ('mcp/time', '1.0')，未指定標籤時為 latest"""
+    if "@" in image:
+        repository, reference = image.split("@", 1)
+        return repository, reference
+    repository, _, tag = image.rpartition(":")
+    if not repository or "/" in tag:
+        return image, "latest"
+    return repository, tag
+
+
+def _platform_name(platform: Dict) -> str:
+    name = f"{platform.get('os', '')}/{platform.get('architecture', '')}"
+    if platform.get("variant"):
+        name += f"/{platform['variant']}"
+    return name
+
+
+class RegistryClient:
+    """registry v2 manifest 探測器，自動處理 Bearer token 流程"""
+
+    def __init__(self, scheduler: RequestScheduler, registry_url: str = DEFAULT_REGISTRY_URL,
+                 platform: str = "linux/amd64"):
+        self.scheduler = scheduler
+        self.registry_url = registry_url.rstrip("/")
+        self.platform = platform
+        self._tokens: Dict[str, Tuple[str, float]] = {}  # scope -> (token, 到期時間)
+        self._manifests: Dict[str, Dict] = {}  # 映像摘要 -> 探測結果
+        self._lock = threading.Lock()
+
+    def remember(self, entries: Iterable[Dict]):
+        """以既有目錄項目預先填入摘要快取，摘要未變的映像只需一次 HEAD"""
+        with self._lock:
+            for entry in entries:
+                digest = entry.get("image_digest")
+                if digest and all(name in entry for name in MANIFEST_FIELDS):
+                    self._manifests[digest] = {name: entry[name] for name in MANIFEST_FIELDS}
+
+    def _cached_token(self, scope: str) -> Optional[str]:
+        with self._lock:
+            token, expires = self._tokens.get(scope, (None, 0.0))
+        return token if token and expires > time.monotonic() else None
+
+    def _fetch_token(self, session, challenge: Dict[str, str], scope: str) -> Optional[str]:
+        params = {"scope": challenge.get("scope", scope)}
+        if challenge.get("service"):
+            params["service"] = challenge["service"]
+        response = self.scheduler.request(session, "GET", challenge["realm"], params=params)
+        response.raise_for_status()
+        data = response.json()
+        token = data.get("token") or data.get("access_token")
+        if token:
+            # 提前 10 秒視為過期，避免請求途中 token 失效
+            expires = time.monotonic() + max(int(data.get("expires_in", 60)) - 10, 1)
+            with self._lock:
+                self._tokens[scope] = (token, expires)
+        return token
+
+    def _request(self, session, method: str, repository: str, path: str, accept: str) -> requests.Response:
+        """送出 registry 請求，收到 401 Bearer 挑戰時取得匿名 token 後重送一次"""
+        url = f"{self.registry_url}/v2/{repository}/{path}"
+        scope = f"repository:{repository}:pull"
+        headers = {"Accept": accept}
+        token = self._cached_token(scope)
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        response = self.scheduler.request(session, method, url, headers=headers)
+        if response.status_code == 401:
+            challenge = parse_bearer_challenge(response.headers.get("WWW-Authenticate"))
+            if challenge and challenge.get("realm"):
+                response.close()
+                token = self._fetch_token(session, challenge, scope)
+                if token:
+                    headers["Authorization"] = f"Bearer {token}"
+                response = self.scheduler.request(session, method, url, headers=headers)
+        return response
+
+    def _get_manifest(self, session, repository: str, reference: str) -> Tuple[Dict, str]:
+        response = self._request(session, "GET", repository, f"manifests/{reference}", MANIFEST_ACCEPT)
+        response.raise_for_status()
+        digest = response.headers.get("Docker-Content-Digest") or "sha256:" + hashlib.sha256(response.content).hexdigest()
+        return response.json(), digest
+
+    def _config_platforms(self, session, repository: str, config: Dict) -> List[str]:
+        """單一架構映像的架構記錄在 config blob (數 KB 的 JSON，不是映像層)"""
+        if not config.get("digest"):
+            return []
+        response = self._request(session, "GET", repository, f"blobs/{config['digest']}",
+                                 config.get("mediaType", "application/json"))
+        if response.status_code != 200:
+            return []
+        return [_platform_name(response.json())]
+
+    def probe(self, session, image: str) -> Optional[Dict]:
+        """探測映像 manifest，回傳 MANIFEST_FIELDS 欄位；映像不存在時回傳 None"""
+        repository, reference = split_image_reference(image)
+        head = self._request(session, "HEAD", repository, f"manifests/{reference}", MANIFEST_ACCEPT)
+        head.close()
+        if head.status_code == 404:
+            return None
+        head.raise_for_status()
+
+        digest = head.headers.get("Docker-Content-Digest")
+        with self._lock:
+            cached = self._manifests.get(digest) if digest else None
+        if cached:
+            return {name: (list(value) if isinstance(value, list) else value) for name, value in cached.items()}
+
+        manifest, digest = self._get_manifest(session, repository, reference)
+        if "manifests" in manifest:
+            platforms = [m for m in manifest["manifests"]
+                         if m.get("platform", {}).get("os") not in (None, "unknown")]
+            architectures = sorted({_platform_name(m["platform"]) for m in platforms})
+            chosen = next((m for m in platforms if _platform_name(m["platform"]) == self.platform),
+                          platforms[0] if platforms else None)
+            if chosen is None:
+                return None
+            image_manifest, _ = self._get_manifest(session, repository, chosen["digest"])
+        else:
+            image_manifest = manifest
+            architectures = self._config_platforms(session, repository, manifest.get("config", {}))
+
+        layers = [{"digest": layer["digest"], "size": int(layer.get("size", 0))}
+                  for layer in image_manifest.get("layers", [])]
+        info = {
+            "image_digest": digest,
+            "compressed_size": sum(layer["size"] for layer in layers),
+            "layers": layers,
+            "architectures": architectures,
+        }
+        with self._lock:
+            self._manifests[digest] = info
+        return {name: (list(value) if isinstance(value, list) else value) for name, value in info.items()}
@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+"""
+MCP 服務器搜尋索引
+目錄載入時建立一次三連字 (trigram) 倒排索引，子字串搜尋只驗證 posting list 命中的服務器，不再逐筆掃描；
+結果依名稱、描述與應用場景的欄位加權 BM25 分數 (加上熱門程度先驗) 排序；
+分類、安全級別等篩選欄位每個值一個 bitset，多重篩選與各選項數量都是整數位元運算
+"""
+
+import heapq
+import math
+import re
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+# 搜尋涵蓋的欄位 (id 另外加入)，與 GUI 原本逐筆比對的欄位相同
+SEARCH_FIELDS = ("name", "description", "category", "popularity")
+GRAM_SIZE = 3
+
+# BM25F 參數：欄位權重、詞頻飽和 k1 與長度正規化 b
+RANK_FIELDS = {"name": 3.0, "use_cases": 1.5, "description": 1.0}
+BM25_K1 = 1.2
+BM25_B = 0.75
+# 熱門程度先驗，加在 BM25 分數上
+POPULARITY_PRIOR = {"極高": 1.0, "高": 0.75, "中等": 0.5, "低": 0.25}
+PRIOR_WEIGHT = 0.5
+RANK_LIMIT = 50
+# 最後一個查詢詞視為前綴，最多展開為文件頻率最高的幾個詞
+MAX_PREFIX_TERMS = 32
+
+# 篩選欄位與缺少欄位時的預設值 (與 GUI 顯示一致)
+FACET_FIELDS = ("category", "security_level", "docker_required", "official", "popularity")
+FACET_DEFAULTS = {"category": "未分類", "security_level": "medium", "docker_required": True,
+                  "official": False, "popularity": "中等"}
+FACET_VALUE_LABELS = {
+    "security_level": {"high": "高安全", "medium": "中安全", "low": "低安全"},
+    "docker_required": {True: "需要 Docker", False: "不需 Docker"},
+    "official": {True: "官方", False: "社群"},
+}
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+|[\u3400-\u9fff\uf900-\ufaff]+")
+
+
+def server_search_text(server_id: str, info: Mapping) -> str:
+    """組合並轉小寫的搜尋文字；欄位以 \\0 分隔，查詢不會跨欄位命中"""
+    fields = [server_id] + [str(info.get(name) or "") for name in SEARCH_FIELDS]
+    fields.append(" ".join(info.get("use_cases") or ()))
+    return "\0".join(fields).lower()
+
+
+def tokenize(text: str) -> List[str]:
+    """英數字以單字切分，中日韓文字切為相鄰兩字 (單字則保留)"""
+    tokens = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        if token[0].isascii() or len(token) == 1:
+            tokens.append(token)
+        else:
+            tokens.extend(token[i:i + 2] for i in range(len(token) - 1))
+    return tokens
+
+
+class BM25Ranker:
+    """欄位加權 BM25 (BM25F)；建立時預先算好每個詞在每份文件的分數，查詢時只需相加"""
+
+    def __init__(self):
+        self._fields: List[Tuple[Tuple[Counter, int], ...]] = []
+        self.priors = array("f")
+        self.terms: List[str] = []
+        # 詞 -> (文件編號遞增, 對應分數, 依分數加先驗遞減的位置)
+        self.postings: Dict[str, Tuple[array, array, array]] = {}
+
+    def add(self, info: Mapping):
+        """依文件編號順序加入一筆服務器"""
+        fields = []
+        for name in RANK_FIELDS:
+            value = info.get(name) or ""
+            tokens = tokenize(" ".join(value) if isinstance(value, (list, tuple)) else str(value))
+            fields.append((Counter(tokens), len(tokens)))
+        self._fields.append(tuple(fields))
+        self.priors.append(PRIOR_WEIGHT * POPULARITY_PRIOR.get(info.get("popularity"), 0.0))
+
+    def finalize(self):
+        """計算各詞的 idf 與飽和後的加權詞頻，之後不再需要原始詞頻"""
+        count = len(self._fields)
+        weights = list(RANK_FIELDS.values())
+        average = [max(sum(fields[i][1] for fields in self._fields) / max(count, 1), 1.0)
+                   for i in range(len(weights))]
+        raw: Dict[str, Tuple[array, array]] = {}
+        for doc, fields in enumerate(self._fields):
+            weighted: Dict[str, float] = {}
+            for weight, avg, (counts, length) in zip(weights, average, fields):
+                norm = weight / (1 - BM25_B + BM25_B * length / avg)
+                for term, tf in counts.items():
+                    weighted[term] = weighted.get(term, 0.0) + tf * norm
+            for term, tf in weighted.items():
+                posting = raw.get(term)
+                if posting is None:
+                    posting = raw[term] = (array("I"), array("f"))
+                posting[0].append(doc)
+                posting[1].append(tf)
+        postings = {}
+        priors = self.priors
+        for term, (docs, tfs) in raw.items():
+            idf = math.log(1 + (count - len(docs) + 0.5) / (len(docs) + 0.5))
+            scores = array("f", [idf * tf * (BM25_K1 + 1) / (tf + BM25_K1) for tf in tfs])
+            # 依分數加先驗遞減排列 (同分時文件編號遞增)，單一詞查詢只需依序取前 k 筆
+            order = array("I", sorted(range(len(scores)), key=lambda i: -(scores[i] + priors[docs[i]])))
+            postings[term] = (docs, scores, order)
+        self.postings = postings
+        self.terms = sorted(postings)
+        self._fields = []
+
+    def expand(self, query: str) -> List[List[str]]:
+        """將查詢切為詞組；最後一個詞以前綴展開 (逐字輸入)，最多取文件頻率最高的幾個詞"""
+        tokens = tokenize(query)
+        groups = []
+        for position, token in enumerate(tokens):
+            if position == len(tokens) - 1 and not query[-1:].isspace():
+                begin = bisect_left(self.terms, token)
+                end = bisect_left(self.terms, token + "\uffff", begin)
+                terms = self.terms[begin:end]
+                if len(terms) > MAX_PREFIX_TERMS:
+                    terms = heapq.nlargest(MAX_PREFIX_TERMS, terms, key=lambda t: len(self.postings[t][0]))
+            else:
+                terms = [token] if token in self.postings else []
+            groups.append(terms)
+        return groups
+
+    def score(self, doc: int, groups: List[List[str]]) -> float:
+        """以二分搜尋取得單一文件的分數；同一詞組展開的多個詞只取最高分"""
+        total = 0.0
+        for terms in groups:
+            best = 0.0
+            for term in terms:
+                docs, scores, _ = self.postings[term]
+                i = bisect_left(docs, doc)
+                if i < len(docs) and docs[i] == doc and scores[i] > best:
+                    best = scores[i]
+            total += best
+        return total
+
+    def _impacts(self, terms: List[str]):
+        """依分數加先驗遞減產生 (排序值, -文件編號)，合併同一詞組展開的多個詞"""
+        priors = self.priors
+
+        def impacts(docs, scores, order):
+            for i in order:
+                doc = docs[i]
+                yield scores[i] + priors[doc], -doc
+
+        return heapq.merge(*(impacts(*self.postings[term]) for term in terms), reverse=True)
+
+    def top(self, query: str, candidates: Sequence[int], accept: Callable[[int], bool],
+            limit: int) -> List[int]:
+        """在 candidates (accept 為真者) 中取相關度最高的 limit 份文件，無文字分數者不列入"""
+        groups = self.expand(query)
+        if len(groups) == 1 and len(candidates) > limit:
+            # 單一詞：posting 已依排序值遞減，依序取前 k 筆符合的文件即可，不需看完整個 posting
+            best: List[int] = []
+            seen = set()
+            for _, doc in self._impacts(groups[0]):
+                doc = -doc
+                # 同一文件在多個展開詞中出現時，第一次出現的分數最高
+                if doc in seen:
+                    continue
+                seen.add(doc)
+                if accept(doc):
+                    best.append(doc)
+                    if len(best) == limit:
+                        break
+            return best
+        # 多個詞時子字串結果通常很少，直接逐筆計分並以 heap 保留前 k 筆
+        priors = self.priors
+        heap: List[Tuple[float, int]] = []
+        for doc in candidates:
+            score = self.score(doc, groups)
+            if score <= 0:
+                continue
+            item = (score + priors[doc], -doc)
+            if len(heap) < limit:
+                heapq.heappush(heap, item)
+            elif item > heap[0]:
+                heapq.heapreplace(heap, item)
+        # 同分時維持目錄順序
+        return [-doc for _, doc in sorted(heap, reverse=True)]
+
+
+def facet_value(info: Mapping, facet: str) -> Any:
+    return info.get(facet, FACET_DEFAULTS.get(facet))
+
+
+def server_matches(server_id: str, info: Mapping, query: str, selected: Optional[Mapping[str, Any]] = None) -> bool:
+    """逐筆判斷服務器是否符合搜尋字詞與篩選條件 (索引尚未建立或只需檢查少數服務器時使用)"""
+    if query and query.lower() not in server_search_text(server_id, info):
+        return False
+    return all(value is None or facet_value(info, facet) == value for facet, value in (selected or {}).items())
+
+
+def facet_label(facet: str, value: Any) -> str:
+    """篩選值的顯示名稱"""
+    return FACET_VALUE_LABELS.get(facet, {}).get(value, str(value))
+
+
+def _facet_order(facet: str, value: Any) -> Tuple[int, str]:
+    """已知的值依定義順序 (高到低) 排列，其餘依字串排序"""
+    known = list(POPULARITY_PRIOR) if facet == "popularity" else list(FACET_VALUE_LABELS.get(facet, ()))
+    return (known.index(value), "") if value in known else (len(known), str(value))
+
+
+def docs_to_bitset(docs: Iterable[int]) -> int:
+    """文件編號轉為 bitset (第 n 位代表第 n 份文件)"""
+    bits = bytearray()
+    for doc in docs:
+        index = doc >> 3
+        if index >= len(bits):
+            bits.extend(bytes(index + 1 - len(bits)))
+        bits[index] |= 1 << (doc & 7)
+    return int.from_bytes(bits, "little")
+
+
+def bitset_to_docs(bitset: int) -> List[int]:
+    """bitset 轉為遞增的文件編號"""
+    bits = bin(bitset)[:1:-1]
+    return [doc for doc, bit in enumerate(bits) if bit == "1"]
+
+
+class FacetIndex:
+    """每個篩選欄位的每個值對應一個 bitset (Python 整數)，條件組合以 AND 計算"""
+
+    def __init__(self, servers: Mapping[str, Mapping]):
+        docs: Dict[str, Dict[Any, List[int]]] = {facet: {} for facet in FACET_FIELDS}
+        size = 0
+        for size, info in enumerate(servers.values(), 1):
+            for facet in FACET_FIELDS:
+                docs[facet].setdefault(facet_value(info, facet), []).append(size - 1)
+        self.size = size
+        self.all = (1 << size) - 1
+        self.bitsets: Dict[str, Dict[Any, int]] = {
+            facet: {value: docs_to_bitset(values[value]) for value in sorted(values, key=lambda v: _facet_order(facet, v))}
+            for facet, values in docs.items()
+        }
+
+    def values(self, facet: str) -> List[Any]:
+        return list(self.bitsets[facet])
+
+    def mask(self, selected: Mapping[str, Any], exclude: Optional[str] = None, base: Optional[int] = None) -> int:
+        """符合所有已選條件的 bitset；值為 None 的欄位不篩選，exclude 欄位略過 (計算該欄位的數量用)"""
+        mask = self.all if base is None else base
+        for facet, value in selected.items():
+            if value is None or facet == exclude:
+                continue
+            mask &= self.bitsets[facet].get(value, 0)
+        return mask
+
+    def counts(self, selected: Mapping[str, Any], base: Optional[int] = None) -> Dict[str, Dict[Any, int]]:
+        """各欄位每個值在其他欄位條件下的數量，選擇該值後會顯示的服務器數"""
+        result = {}
+        for facet, values in self.bitsets.items():
+            mask = self.mask(selected, exclude=facet, base=base)
+            result[facet] = {value: (bitset & mask).bit_count() for value, bitset in values.items()}
+        return result
+
+
+class SearchIndex:
+    """服務器 id、名稱、描述、分類、熱門程度與應用場景的子字串搜尋索引"""
+
+    def __init__(self, servers: Mapping[str, Mapping]):
+        self.ids: List[str] = []
+        self.texts: List[str] = []
+        postings: Dict[str, array] = {}
+        self.ranker = BM25Ranker()
+        for doc, (server_id, info) in enumerate(servers.items()):
+            self.ranker.add(info)
+            text = server_search_text(server_id, info)
+            self.ids.append(server_id)
+            self.texts.append(text)
+            for gram in {text[i:i + GRAM_SIZE] for i in range(len(text) - GRAM_SIZE + 1)}:
+                posting = postings.get(gram)
+                if posting is None:
+                    posting = postings[gram] = array("I")
+                posting.append(doc)
+        # posting list 依文件編號遞增 (即目錄順序)
+        self.postings = postings
+        self.ranker.finalize()
+        self.facets = FacetIndex(servers)
+        self._last = ("", [])
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def candidates(self, query: str) -> Optional[Sequence[int]]:
+        """取得可能包含 query 的文件編號；查詢短於三個字元時回傳 None (需全部驗證)"""
+        grams = {query[i:i + GRAM_SIZE] for i in range(len(query) - GRAM_SIZE + 1)}
+        if not grams:
+            return None
+        shortest = None
+        for gram in grams:
+            posting = self.postings.get(gram)
+            if posting is None:
+                return ()
+            if shortest is None or len(posting) < len(shortest):
+                shortest = posting
+        # 只取最短的 posting list：其餘三連字的交集交給子字串驗證完成，
+        # 在 CPython 中 `in` 比對比逐一二分搜尋其他 posting list 快得多
+        return shortest
+
+    def _match(self, query: str) -> List[int]:
+        last_query, last_docs = self._last
+        if query == last_query:
+            return last_docs
+        texts = self.texts
+        docs = self.candidates(query)
+        # 逐字輸入時新查詢通常包含上一次的查詢，上一次的結果也是候選範圍
+        if last_query and last_query in query and (docs is None or len(last_docs) < len(docs)):
+            docs = last_docs
+        if docs is None:
+            docs = range(len(texts))
+        # 三連字命中只代表可能包含，最後以子字串比對確認
+        matched = [doc for doc in docs if query in texts[doc]]
+        self._last = (query, matched)
+        return matched
+
+    def search(self, query: str) -> List[str]:
+        """回傳名稱等欄位包含 query (不分大小寫) 的服務器 id，維持目錄順序"""
+        query = query.lower()
+        if not query:
+            return list(self.ids)
+        ids = self.ids
+        return [ids[doc] for doc in self._match(query)]
+
+    def _ranked(self, query: str, limit: int, mask: Optional[int] = None) -> List[int]:
+        matched = self._match(query)
+        texts = self.texts
+        if mask is None:
+            def accept(doc):
+                return query in texts[doc]
+        else:
+            # 篩選條件先套用再排名，前 limit 筆都是符合條件的服務器
+            allowed = mask.to_bytes((len(texts) + 7) // 8, "little")
+            matched = [doc for doc in matched if allowed[doc >> 3] >> (doc & 7) & 1]
+
+            def accept(doc):
+                return allowed[doc >> 3] >> (doc & 7) & 1 and query in texts[doc]
+        best = self.ranker.top(query, matched, accept, limit)
+        if len(best) < limit:
+            # 文字分數不足 limit 筆時，以熱門程度補足 (例如只命中 id、分類或單字中間)
+            priors = self.ranker.priors
+            chosen = set(best)
+            rest = ((priors[doc], -doc) for doc in matched if doc not in chosen)
+            best += [-doc for _, doc in heapq.nlargest(limit - len(best), rest)]
+        chosen = set(best)
+        return best + [doc for doc in matched if doc not in chosen]
+
+    def ranked_search(self, query: str, limit: int = RANK_LIMIT) -> List[str]:
+        """與 search 相同的結果，但前 limit 筆依相關度排序，其餘維持目錄順序"""
+        query = query.lower()
+        if not query.strip():
+            return self.search(query)
+        ids = self.ids
+        return [ids[doc] for doc in self._ranked(query, limit)]
+
+    def match_bitset(self, query: str) -> int:
+        """搜尋結果的 bitset，沒有搜尋字詞時為全部"""
+        query = query.lower()
+        return docs_to_bitset(self._match(query)) if query else self.facets.all
+
+    def filter(self, query: str, selected: Optional[Mapping[str, Any]] = None,
+               limit: int = RANK_LIMIT) -> List[str]:
+        """搜尋字詞加上多重篩選條件的結果；有搜尋字詞時前 limit 筆依相關度排序"""
+        mask = self.facets.mask(selected or {})
+        ids = self.ids
+        if not query:
+            return [ids[doc] for doc in bitset_to_docs(mask)]
+        docs = self._ranked(query.lower(), limit, None if mask == self.facets.all else mask)
+        return [ids[doc] for doc in docs]
+
+    def facet_counts(self, query: str, selected: Optional[Mapping[str, Any]] = None) -> Dict[str, Dict[Any, int]]:
+        """目前搜尋字詞下各篩選值的數量"""
+        base = self.match_bitset(query) if query else None
+        return self.facets.counts(selected or {}, base)
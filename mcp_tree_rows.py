@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+MCP 服務器列表列狀態
+記錄 Treeview 目前顯示的列 (依顯示順序) 與每列已送出的顯示值：切換選擇等操作只把變更的儲存格
+以 set / item 送到 Tk；篩選結果改變時只刪除、插入或重新排列有差異的列，不再清空整個列表。
+虛擬列表模式只把可見範圍的列建立為 Tk 項目，捲動時重新繫結項目內容，大型目錄的記憶體與重繪成本固定
+"""
+
+import os
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+# (各欄顯示值, 標籤)
+Row = Tuple[Tuple, Tuple]
+
+# 設為 0 時停用虛擬列表，每個顯示的服務器各建立一個 Tk 項目
+VIRTUAL_LIST_ENV = "MCP_VIRTUAL_LIST"
+# 可見範圍前後額外建立的列數，小幅捲動不需重新繫結
+VIRTUAL_OVERSCAN = 20
+# show_incrementally 每刪除或插入這麼多列產出一次
+SHOW_CHUNK_SIZE = 100
+
+
+def _send_row(tree, iid: str, columns: Sequence[str], old: Optional[Row], new: Row):
+    """只送出與上次不同的顯示值：單一儲存格以 set，多個儲存格或標籤以一次 item 呼叫"""
+    if old is None:
+        tree.item(iid, values=new[0], tags=new[1])
+        return
+    changed = [(column, after) for column, before, after in zip(columns, old[0], new[0]) if before != after]
+    options = {}
+    if len(changed) > 1:
+        options["values"] = new[0]
+    elif changed:
+        tree.set(iid, *changed[0])
+    if new[1] != old[1]:
+        options["tags"] = new[1]
+    if options:
+        tree.item(iid, **options)
+
+
+class RowCache:
+    """服務器列中與選擇狀態無關的顯示值 (values, tags) 快取：每個服務器第一次顯示時格式化一次，
+    之後重建列表只需查表；目錄項目改變時由呼叫端 invalidate"""
+
+    def __init__(self, format_row: Callable[[str], Row]):
+        self.format_row = format_row
+        self._rows: Dict[str, Row] = {}
+
+    def __getitem__(self, server_id: str) -> Row:
+        row = self._rows.get(server_id)
+        if row is None:
+            row = self._rows[server_id] = self.format_row(server_id)
+        return row
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def invalidate(self, server_ids: Iterable[str]):
+        for server_id in server_ids:
+            self._rows.pop(server_id, None)
+
+    def clear(self):
+        self._rows.clear()
+
+
+class TreeRows:
+    """Treeview 列的狀態模型；render(server_id) 回傳該列目前應顯示的 (values, tags)"""
+
+    def __init__(self, tree, render: Callable[[str], Row], columns: Sequence[str]):
+        self.tree = tree
+        self.render = render
+        self.columns = tuple(columns)
+        self._rows: Dict[str, Row] = {}
+
+    def __contains__(self, server_id) -> bool:
+        return server_id in self._rows
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._rows)
+
+    def server_id(self, item: str) -> Optional[str]:
+        """Tk 項目對應的服務器 id (identify_row、selection 的結果)"""
+        return item or None
+
+    def insert(self, server_id: str):
+        """在列表末端插入一列"""
+        row = self._rows[server_id] = self.render(server_id)
+        self.tree.insert("", "end", iid=server_id, values=row[0], tags=row[1])
+
+    def delete(self, server_ids: Iterable[str]):
+        """刪除目前顯示中的列 (一次 Tk 呼叫)"""
+        shown = [server_id for server_id in server_ids if self._rows.pop(server_id, None) is not None]
+        if shown:
+            self.tree.delete(*shown)
+
+    def update(self, server_ids: Iterable[str]):
+        """重新產生顯示值，只送出有變更的儲存格與標籤；未顯示的列略過"""
+        for server_id in server_ids:
+            old = self._rows.get(server_id)
+            if old is None:
+                continue
+            new = self.render(server_id)
+            if new != old:
+                _send_row(self.tree, server_id, self.columns, old, new)
+                self._rows[server_id] = new
+
+    def show(self, server_ids: Sequence[str]):
+        """讓列表依序顯示 server_ids：保留仍符合的列，只刪除與插入差異的列，順序不同時一次重新排列"""
+        for _ in self.show_incrementally(server_ids):
+            pass
+
+    def show_incrementally(self, server_ids: Sequence[str], chunk_size: int = SHOW_CHUNK_SIZE) -> Iterator[None]:
+        """show 的分段版本：每刪除或插入 chunk_size 列產出一次，呼叫端可在產出之間讓出事件迴圈；
+        中途放棄時列狀態仍與 Tk 一致 (已插入的列接在既有列後面)"""
+        server_ids = list(server_ids)
+        wanted = set(server_ids)
+        unwanted = [server_id for server_id in self._rows if server_id not in wanted]
+        for start in range(0, len(unwanted), chunk_size):
+            self.delete(unwanted[start:start + chunk_size])
+            yield
+        inserted = 0
+        for server_id in server_ids:
+            if server_id not in self._rows:
+                self.insert(server_id)
+                inserted += 1
+                if inserted % chunk_size == 0:
+                    yield
+        # 既有列在前、新列接在後面的順序與要求相同時不需搬移；分段期間串流加入的列保留在最後
+        order = server_ids + [server_id for server_id in self._rows if server_id not in wanted]
+        if len(order) > 1 and list(self._rows) != order:
+            self.tree.set_children("", *order)
+        self._rows = {server_id: self._rows[server_id] for server_id in order}
+
+    def clear(self):
+        self.delete(list(self._rows))
+
+
+class VirtualTreeRows:
+    """虛擬列表：與 TreeRows 相同的介面，但只有可見範圍加上前後 overscan 列是 Tk 項目 (固定的 slot)，
+    捲動時重新繫結 slot 的內容；垂直捲軸改由本類別依完整列表的位置設定"""
+
+    def __init__(self, tree, render: Callable[[str], Row], columns: Sequence[str], scrollbar,
+                 overscan: int = VIRTUAL_OVERSCAN):
+        self.tree = tree
+        self.render = render
+        self.columns = tuple(columns)
+        self.scrollbar = scrollbar
+        self.overscan = overscan
+        self._ids: List[str] = []
+        self._index: Dict[str, int] = {}
+        self._slots: List[str] = []
+        self._slot_index: Dict[str, int] = {}
+        self._cells: List[Optional[Row]] = []
+        self._start = 0  # 第一個 slot 對應的列表位置
+        self._top = 0  # 可見範圍第一列的列表位置
+        self._visible = int(tree.cget("height"))
+        self._scrollbar_pending = False
+        tree.configure(yscrollcommand=self._on_tree_scroll)
+        scrollbar.configure(command=self.yview)
+
+    def __contains__(self, server_id) -> bool:
+        return server_id in self._index
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._ids)
+
+    def server_id(self, item: str) -> Optional[str]:
+        k = self._slot_index.get(item)
+        if k is None or self._start + k >= len(self._ids):
+            return None
+        return self._ids[self._start + k]
+
+    def _window_size(self) -> int:
+        return min(len(self._ids), self._visible + 2 * self.overscan)
+
+    def _send(self, k: int):
+        new = self.render(self._ids[self._start + k])
+        _send_row(self.tree, self._slots[k], self.columns, self._cells[k], new)
+        self._cells[k] = new
+
+    def _add_slot(self):
+        slot = f"slot{len(self._slots)}"
+        self.tree.insert("", "end", iid=slot, values=(), tags=())
+        self._slot_index[slot] = len(self._slots)
+        self._slots.append(slot)
+        self._cells.append(None)
+
+    def _marked_ids(self) -> Tuple[List[str], Optional[str]]:
+        """目前選取與取得焦點的服務器 (slot 重新繫結前記錄，之後讓 Tk 狀態跟著服務器移動)"""
+        return [self.server_id(item) for item in self.tree.selection()], self.server_id(self.tree.focus())
+
+    def _layout(self, marked: Optional[Tuple[List[str], Optional[str]]] = None):
+        """依列表長度增減 slot，重新繫結全部 slot"""
+        size = self._window_size()
+        extra = self._slots[size:]
+        if extra:
+            self.tree.delete(*extra)
+            for slot in extra:
+                del self._slot_index[slot]
+            del self._slots[size:], self._cells[size:]
+        while len(self._slots) < size:
+            self._add_slot()
+        self._scroll(self._top, rebind=True, marked=marked)
+
+    def _scroll(self, top: int, rebind: bool = False, marked: Optional[Tuple[List[str], Optional[str]]] = None):
+        """讓可見範圍從列表位置 top 開始；可見範圍接近 slot 邊緣時重新繫結 slot，置中於 top。
+        Tk 的選取與焦點跟著服務器移動 (列表改變時由呼叫端傳入改變前的狀態)"""
+        size = len(self._slots)
+        top = max(0, min(top, len(self._ids) - self._visible))
+        self._top = top
+        start = max(0, min(top - self.overscan, len(self._ids) - size))
+        inside = self._start <= top and top + min(self._visible, size) <= self._start + size
+        if rebind or not inside or abs(start - self._start) > self.overscan // 2:
+            selected, focus = marked if marked is not None else self._marked_ids()
+            self._start = start
+            for k in range(size):
+                self._send(k)
+            if selected:
+                self.tree.selection_set([self._slots[self._index[server_id] - start] for server_id in selected
+                                         if start <= self._index.get(server_id, -1) < start + size])
+            if start <= self._index.get(focus, -1) < start + size:
+                self.tree.focus(self._slots[self._index[focus] - start])
+        if size:
+            self.tree.yview_moveto((top - self._start) / size)
+        self._schedule_scrollbar()
+
+    def _schedule_scrollbar(self):
+        # 串流載入時每列都會呼叫，合併為閒置時的一次更新
+        if not self._scrollbar_pending:
+            self._scrollbar_pending = True
+            self.tree.after_idle(self._update_scrollbar)
+
+    def _update_scrollbar(self):
+        self._scrollbar_pending = False
+        total = len(self._ids)
+        if total <= self._visible:
+            self.scrollbar.set(0.0, 1.0)
+        else:
+            self.scrollbar.set(self._top / total, (self._top + self._visible) / total)
+
+    def _on_tree_scroll(self, first, last):
+        """Treeview 自行捲動 (滑鼠滾輪、方向鍵) 時換算為列表位置"""
+        size = len(self._slots)
+        if not size:
+            self._schedule_scrollbar()
+            return
+        first, last = float(first), float(last)
+        visible = round((last - first) * size)
+        top = self._start + round(first * size)
+        if 0 < visible != self._visible and (visible < size or size < len(self._ids)):
+            # 視窗大小改變
+            self._visible = visible
+            self._top = top
+            self._layout(self._marked_ids())
+        elif top != self._top:
+            self._scroll(top)
+
+    def yview(self, *args):
+        """垂直捲軸的 command"""
+        if not args:
+            return
+        if args[0] == "moveto":
+            self._scroll(int(float(args[1]) * len(self._ids)))
+        elif args[0] == "scroll":
+            step = self._visible if args[2] == "pages" else 1
+            self._scroll(self._top + int(args[1]) * step)
+
+    def insert(self, server_id: str):
+        """在列表末端加入一列；可見範圍已滿時只記錄位置，不建立 Tk 項目"""
+        self._index[server_id] = len(self._ids)
+        self._ids.append(server_id)
+        if len(self._slots) < self._window_size():
+            self._layout()
+        else:
+            self._schedule_scrollbar()
+
+    def delete(self, server_ids: Iterable[str]):
+        removed = {server_id for server_id in server_ids if server_id in self._index}
+        if removed:
+            marked = self._marked_ids()
+            self._set_ids([server_id for server_id in self._ids if server_id not in removed])
+            self._layout(marked)
+
+    def update(self, server_ids: Iterable[str]):
+        """重新產生顯示值；只有繫結在 slot 上的列需要送出"""
+        for server_id in server_ids:
+            k = self._index.get(server_id, -1) - self._start
+            if 0 <= k < len(self._slots):
+                self._send(k)
+
+    def show(self, server_ids: Sequence[str]):
+        """顯示新的列表，內容改變時回到頂端"""
+        server_ids = list(server_ids)
+        if server_ids != self._ids:
+            marked = self._marked_ids()
+            self._set_ids(server_ids)
+            self._top = self._start = 0
+            self._layout(marked)
+
+    def show_incrementally(self, server_ids: Sequence[str]) -> Iterator[None]:
+        """虛擬列表只重新繫結可見範圍，呼叫時即完成"""
+        self.show(server_ids)
+        return iter(())
+
+    def _set_ids(self, server_ids: List[str]):
+        self._ids = server_ids
+        self._index = {server_id: i for i, server_id in enumerate(server_ids)}
+
+    def clear(self):
+        self.show([])
+
+
+def create_tree_rows(tree, render: Callable[[str], Row], columns: Sequence[str], scrollbar):
+    """服務器列表的列狀態模型：預設為虛擬列表，MCP_VIRTUAL_LIST=0 時每列各建立一個 Tk 項目"""
+    if os.environ.get(VIRTUAL_LIST_ENV, "1") == "0":
+        return TreeRows(tree, render, columns)
+    return VirtualTreeRows(tree, render, columns, scrollbar)
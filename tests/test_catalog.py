@@ -1,5 +1,17 @@
+import copy
+import io
 import json
+import os
+
+import pytest
+
 from mcp_docker_configurator import load_mcp_servers_from_catalog
+from mcp_catalog import (CatalogFormatError, OverlayServers, ServerRecord, SnapshotServers, apply_delta,
+                         catalog_changes, clear_catalog_cache, compute_delta, default_delta_dir, diff_servers,
+                         freeze_catalog, iter_catalog_items, load_catalog, load_servers, open_snapshot,
+                         plan_image_pulls, read_catalog, refresh_catalog, stream_servers, total_download_bytes,
+                         write_catalog, write_delta, write_snapshot)
+from mcp_catalog_watch import CatalogWatcher
 
 
 def test_load_mcp_servers_from_catalog(tmp_path, monkeypatch):
@@ -13,3 +25,260 @@ def test_load_mcp_servers_from_catalog(tmp_path, monkeypatch):
     servers = load_mcp_servers_from_catalog()
     assert isinstance(servers, dict)
     assert "filesystem" in servers
+
+
+def test_write_catalog_is_atomic_and_skips_unchanged_content(tmp_path):
+    catalog_path = tmp_path / "mcp_catalog.json"
+    catalog = {"version": "2.0.0", "servers": {"time": {"id": "time", "name": "Time"}}}
+
+    assert write_catalog(catalog, str(catalog_path)) is True
+    first_inode = catalog_path.stat().st_ino
+    assert json.loads(catalog_path.read_text(encoding="utf-8")) == catalog
+
+    # 內容相同時不替換檔案
+    assert write_catalog(catalog, str(catalog_path)) is False
+    assert catalog_path.stat().st_ino == first_inode
+
+    catalog["servers"]["git"] = {"id": "git", "name": "Git"}
+    assert write_catalog(catalog, str(catalog_path)) is True
+    assert "git" in json.loads(catalog_path.read_text(encoding="utf-8"))["servers"]
+    assert [p.name for p in tmp_path.iterdir()] == ["mcp_catalog.json"]
+
+
+def test_plan_image_pulls_dedupes_images_and_shared_layers():
+    base = {"digest": "sha256:base", "size": 100}
+    servers = [
+        {"name": "Big", "image": "mcp/big", "compressed_size": 1100,
+         "layers": [base, {"digest": "sha256:big", "size": 1000}]},
+        {"name": "Unknown", "image": "mcp/unknown"},
+        {"name": "Small", "image": "mcp/small", "compressed_size": 110,
+         "layers": [base, {"digest": "sha256:small", "size": 10}]},
+        {"name": "Small Again", "image": "mcp/small"},
+    ]
+
+    plan = plan_image_pulls(servers)
+
+    assert [pull.image for pull in plan] == ["mcp/small", "mcp/big", "mcp/unknown"]
+    assert plan[0].server_names == ["Small", "Small Again"]
+    # 共用基底層只計入第一個拉取的映像
+    assert [pull.new_bytes for pull in plan[:2]] == [110, 1000]
+    assert total_download_bytes(plan) is None
+    assert total_download_bytes(plan[:2]) == 1110
+
+
+def test_refresh_catalog_applies_delta_chain(tmp_path):
+    path = tmp_path / "mcp_catalog.json"
+    delta_dir = tmp_path / "mcp_catalog.deltas"
+    v0 = {"version": "2.0.0", "servers": {
+        "time": {"id": "time", "image": "mcp/time", "popularity": "低"},
+        "git": {"id": "git", "image": "mcp/git", "volumes": ["./:/workspace"]},
+    }}
+    v1 = {"version": "2.0.0", "revision": 1, "servers": {
+        "time": {"id": "time", "image": "mcp/time", "popularity": "高"},
+        "git": {"id": "git", "image": "mcp/git"},
+        "fetch": {"id": "fetch", "image": "mcp/fetch"},
+    }}
+    v2 = {"version": "2.0.0", "revision": 2, "servers": {
+        "time": v1["servers"]["time"], "fetch": v1["servers"]["fetch"],
+    }}
+
+    delta = compute_delta(v0, v1)
+    assert delta["added"] == {"fetch": v1["servers"]["fetch"]}
+    assert delta["changed"] == {"time": {"set": {"popularity": "高"}, "unset": []},
+                                "git": {"set": {}, "unset": ["volumes"]}}
+    assert apply_delta(v0, delta) == v1
+    assert v0["servers"]["time"]["popularity"] == "低"
+    # 基底不複製：未變更的項目直接從原目錄讀取
+    servers = apply_delta(v0, delta)["servers"]
+    assert servers.base is v0["servers"] and list(servers.upserts) == ["time", "git", "fetch"]
+
+    write_delta(delta, str(delta_dir))
+    write_delta(compute_delta(v1, v2), str(delta_dir))
+    write_catalog(v2, str(path))
+
+    assert refresh_catalog(v0, str(path)) == v2
+    assert refresh_catalog(v1, str(path)) == v2
+    assert refresh_catalog(None, str(path)) == read_catalog(str(path))
+
+    # delta 被清除而串接中斷時改讀完整目錄
+    write_delta(dict(compute_delta(v1, v2), base_revision=1, revision=3), str(delta_dir), history=1)
+    assert sorted(p.name for p in delta_dir.iterdir()) == ["3.json"]
+    assert refresh_catalog(v0, str(path)) == v2
+
+
+def test_load_catalog_caches_read_only_views_and_reloads_on_change(tmp_path):
+    clear_catalog_cache()
+    path = tmp_path / "mcp_catalog.json"
+    path.write_text(json.dumps([{"id": "time", "name": "Time", "volumes": ["./data:/data"]}]), encoding="utf-8")
+
+    # 舊的列表格式正規化為 servers 字典，重複載入回傳同一物件
+    servers = load_servers(str(path))
+    assert servers is load_servers(str(path))
+    assert load_catalog(str(path))["total_servers"] == 1
+    with pytest.raises(TypeError):
+        servers["time"]["name"] = "Changed"
+    editable = copy.deepcopy(servers["time"])
+    editable["volumes"].append("./logs:/logs")
+    assert servers["time"]["volumes"] == ["./data:/data"]
+
+    path.write_text(json.dumps({"servers": {"fetch": {"id": "fetch"}}}), encoding="utf-8")
+    os.utime(path, ns=(1, 1))
+    assert list(load_servers(str(path))) == ["fetch"]
+
+    path.write_text("{}", encoding="utf-8")
+    with pytest.raises(CatalogFormatError):
+        load_catalog(str(path))
+
+
+def test_snapshot_loads_lazily_and_tracks_json_content(tmp_path):
+    clear_catalog_cache()
+    path = tmp_path / "mcp_catalog.json"
+    catalog = {"version": "2.0.0", "servers": {
+        f"server-{i}": {"id": f"server-{i}", "name": f"Server {i}", "volumes": [f"./{i}:/data"]}
+        for i in range(2000, 0, -1)
+    }}
+    write_catalog(catalog, str(path))
+    write_snapshot(catalog, str(path))
+
+    servers = load_servers(str(path))
+    assert isinstance(servers, SnapshotServers)
+    assert len(servers) == 2000 and servers._records == {}
+    assert servers["server-7"]["volumes"] == ["./7:/data"]
+    assert list(servers._records) == ["server-7"]
+    assert "server-2001" not in servers
+    assert list(servers)[:2] == ["server-2000", "server-1999"]
+    assert dict(servers.items()) == catalog["servers"]
+
+    # 只有 mtime 改變 (內容相同) 時以雜湊確認後仍採用快照；內容改變則判定過期
+    os.utime(path, ns=(1, 1))
+    assert open_snapshot(str(path)) is not None
+    catalog["servers"]["server-1"]["name"] = "Renamed"
+    write_catalog(catalog, str(path))
+    assert open_snapshot(str(path)) is None
+    assert load_servers(str(path))["server-1"]["name"] == "Renamed"
+
+
+def test_load_catalog_applies_delta_chain_only_up_to_file_revision(tmp_path):
+    clear_catalog_cache()
+    path = tmp_path / "mcp_catalog.json"
+    delta_dir = str(tmp_path / "mcp_catalog.deltas")
+    v1 = {"servers": {"a": {"id": "a"}, "b": {"id": "b", "name": "B"}}, "revision": 1}
+    v2 = {"revision": 2, "servers": {"a": {"id": "a"}, "b": {"id": "b", "name": "B2"}, "c": {"id": "c"}}}
+    write_catalog(v1, str(path))
+    write_snapshot(v1, str(path))
+    # servers 寫在最後，修訂號不需解析服務器即可讀取
+    assert list(json.loads(path.read_text(encoding="utf-8"))) == ["revision", "servers"]
+    base = load_catalog(str(path))["servers"]
+
+    # 快照過期後以 delta 更新：只記錄變更，未變更的項目仍從快照延遲讀取
+    write_delta(compute_delta(v1, v2), delta_dir)
+    write_catalog(v2, str(path))
+    catalog = load_catalog(str(path))
+    servers = catalog["servers"]
+    assert isinstance(servers, OverlayServers) and servers.base is base
+    assert catalog["revision"] == 2 and list(servers) == ["a", "b", "c"]
+    assert list(base._records) == ["b"]
+    assert dict(servers.items()) == v2["servers"]
+
+    # 檔案的修訂沒有對應的 delta (寫入中斷、delta 被清除或手動編輯) 時重新解析整份 JSON
+    v3 = dict(v2, revision=3, servers={"a": {"id": "a"}})
+    write_delta(compute_delta(v2, v3), delta_dir)
+    write_catalog({"revision": 4, "servers": {"c": {"id": "c"}}}, str(path))
+    os.utime(path, ns=(1, 1))
+    catalog = load_catalog(str(path))
+    assert catalog["revision"] == 4 and list(catalog["servers"]) == ["c"]
+
+
+def test_loader_shares_equal_sub_objects_between_server_records(tmp_path):
+    clear_catalog_cache()
+    practices = {"read_only": True, "security_opt": ["no-new-privileges:true"], "cap_drop": ["ALL"]}
+    path = tmp_path / "mcp_catalog.json"
+    write_catalog({"servers": {
+        "time": {"id": "time", "category": "工具", "best_practices": practices, "extra": {"a": 1}},
+        "fetch": {"id": "fetch", "category": "工具", "best_practices": dict(practices, read_only=False)},
+        "git": {"id": "git", "category": "工具", "best_practices": practices},
+    }}, str(path))
+
+    servers = load_servers(str(path))
+    time, fetch, git = servers["time"], servers["fetch"], servers["git"]
+    assert isinstance(time, ServerRecord) and not hasattr(time, "__dict__")
+    assert time["best_practices"] is git["best_practices"]
+    assert fetch["best_practices"]["cap_drop"] is time["best_practices"]["cap_drop"]
+    assert time["category"] is fetch["category"]
+    assert time == {"id": "time", "category": "工具", "best_practices": practices, "extra": {"a": 1}}
+    assert list(time) == ["id", "category", "best_practices", "extra"]
+    assert "volumes" not in time and time.get("volumes", []) == []
+    assert time.copy()["extra"] == {"a": 1}
+
+
+def test_stream_servers_matches_full_load_and_primes_cache(tmp_path):
+    clear_catalog_cache()
+    path = tmp_path / "mcp_catalog.json"
+    catalog = {"version": "2.0.0", "servers": {
+        f"server-{i}": {"id": f"server-{i}", "name": f"伺服器 {i}", "use_cases": ["檔案", "時間"],
+                        "env_vars": {"TOKEN": {"required": i % 2 == 0}}}
+        for i in range(50)
+    }, "total_servers": 50}
+    write_catalog(catalog, str(path))
+
+    # 任意區塊大小 (含在字串與數字中間切斷) 的結果都與一次解析相同
+    text = path.read_text(encoding="utf-8")
+    for chunk_size in (1, 7, 64):
+        items = list(iter_catalog_items(io.StringIO(text), chunk_size))
+        assert {key: value for is_server, key, value in items if is_server} == catalog["servers"]
+        assert [key for is_server, key, _ in items if not is_server] == ["version", "total_servers"]
+
+    streamed = stream_servers(str(path), chunk_size=16)
+    first_id, first = next(streamed)
+    assert first_id == "server-0" and first == catalog["servers"]["server-0"]
+    assert [server_id for server_id, _ in streamed] == [f"server-{i}" for i in range(1, 50)]
+    # 串流結束後共用快取已填入，load_catalog 不再重新解析
+    loaded = load_catalog(str(path))
+    assert loaded == catalog
+    assert dict(stream_servers(str(path))) == catalog["servers"]
+
+    legacy = list(iter_catalog_items(io.StringIO(json.dumps([{"id": "time"}, {"name": "no id"}])), 4))
+    assert legacy == [(True, "time", {"id": "time"}), (False, "total_servers", 1)]
+    with pytest.raises(CatalogFormatError):
+        list(iter_catalog_items(io.StringIO('{"version": "1"}'), 4))
+    with pytest.raises(FileNotFoundError):
+        stream_servers(str(tmp_path / "missing.json"))
+
+
+def test_catalog_changes_reads_delta_chain_and_falls_back_to_diff(tmp_path):
+    path = tmp_path / "mcp_catalog.json"
+    v1 = {"revision": 1, "servers": {"time": {"id": "time"}, "git": {"id": "git"}, "fetch": {"id": "fetch"}}}
+    v2 = {"revision": 2, "servers": {"time": {"id": "time", "name": "Time"}, "git": {"id": "git"}}}
+    v3 = {"revision": 3, "servers": dict(v2["servers"], slack={"id": "slack"})}
+    write_delta(compute_delta(v1, v2), default_delta_dir(str(path)))
+    write_delta(compute_delta(v2, v3), default_delta_dir(str(path)))
+
+    assert catalog_changes(v1, v3, str(path)) == (["slack"], ["fetch"], ["time"])
+    assert catalog_changes(v1, v2, str(path)) == ([], ["fetch"], ["time"])
+    assert catalog_changes(v3, v3, str(path)) == ([], [], [])
+    # 缺少 delta 時逐筆比較，ServerRecord 與一般 dict 比較結果相同
+    frozen = freeze_catalog(v1)
+    assert catalog_changes(frozen, dict(v3, revision=4), str(path)) == (["slack"], ["fetch"], ["time"])
+    assert diff_servers(frozen["servers"], freeze_catalog(v1)["servers"]) == ([], [], [])
+    assert frozen["servers"]["time"] == {"id": "time"} and frozen["servers"]["time"] != {"id": "time", "name": "x"}
+
+
+def test_catalog_watcher_reports_replaced_catalog_once(tmp_path):
+    path = tmp_path / "mcp_catalog.json"
+    write_catalog({"servers": {"time": {"id": "time"}}}, str(path))
+    for use_inotify in (True, False):
+        watcher = CatalogWatcher(str(path), use_inotify=use_inotify)
+        try:
+            assert watcher.changed() is False
+            (tmp_path / "other.json").write_text("{}", encoding="utf-8")
+            assert watcher.changed() is False
+            # 原子替換 (新 inode) 與就地改寫都會偵測到，每次變更只回報一次
+            write_catalog({"servers": {"git": {"id": "git"}, "use_inotify": {"id": str(use_inotify)}}}, str(path))
+            assert watcher.changed() is True
+            assert watcher.changed() is False
+            with open(path, "a", encoding="utf-8") as f:
+                f.write("\n")
+            os.utime(path, ns=(1, 1))
+            assert watcher.changed() is True
+        finally:
+            watcher.close()
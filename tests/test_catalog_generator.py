@@ -0,0 +1,49 @@
+import json
+
+from benchmarks.bench_load_path import compare
+from benchmarks.catalog_generator import generate_catalog, validate_catalog
+
+
+def test_generated_catalog_is_valid_and_deterministic():
+    catalog = generate_catalog(300, seed=7)
+
+    assert validate_catalog(catalog) == []
+    assert catalog["total_servers"] == len(catalog["servers"]) == 300
+    assert generate_catalog(300, seed=7) == catalog
+    assert generate_catalog(300, seed=8)["servers"] != catalog["servers"]
+    # 部分項目帶有 registry manifest 資訊，基底層在映像之間共用
+    with_layers = [entry for entry in catalog["servers"].values() if "layers" in entry]
+    assert 0 < len(with_layers) < 300
+    assert with_layers[0]["layers"][0] == with_layers[1]["layers"][0]
+
+
+def test_validate_catalog_reports_schema_errors():
+    with open("mcp_catalog.json", "r", encoding="utf-8") as f:
+        assert validate_catalog(json.load(f)) == []
+
+    catalog = generate_catalog(3)
+    first, second, third = catalog["servers"]
+    catalog["servers"][first]["security_level"] = "extreme"
+    del catalog["servers"][second]["image"]
+    catalog["servers"][third]["official"] = "yes"
+    catalog["total_servers"] = 4
+    errors = validate_catalog(catalog)
+    assert len(errors) == 4
+    assert any("extreme" in error for error in errors)
+    assert any(second in error and "image" in error for error in errors)
+
+
+def test_compare_flags_only_regressions_beyond_tolerance_and_noise_floor():
+    baseline = [{"servers": 100, "load_json_ms": 10.0, "search_p99_ms": 0.5, "config_servers": 100,
+                 "config_claude_ms": 20.0}]
+    results = [{"servers": 100, "load_json_ms": 14.0, "search_p99_ms": 1.5, "config_servers": 100,
+                "config_claude_ms": 21.0},
+               {"servers": 1000, "load_json_ms": 500.0}]
+
+    regressions = compare(results, baseline, tolerance=0.25)
+    # 搜尋雖然慢了 3 倍但只差 1 ms (雜訊範圍)，1000 個服務器沒有基準
+    assert len(regressions) == 1 and "load_json_ms" in regressions[0]
+    assert compare(results, baseline, tolerance=0.5) == []
+    # 配置生成的選取數不同時不比較配置指標
+    results[0].update(config_servers=50, config_claude_ms=90.0, load_json_ms=10.0)
+    assert compare(results, baseline, tolerance=0.25) == []
@@ -0,0 +1,74 @@
+import json
+import os
+
+import pytest
+
+from mcp_catalog import CatalogFormatError, load_catalog, load_servers
+from mcp_catalog_store import CatalogStore
+
+
+def _catalog():
+    with open("mcp_catalog.json", "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_store_round_trips_catalog_through_load_catalog(tmp_path, monkeypatch):
+    catalog = _catalog()
+    db_path = tmp_path / "mcp_catalog.db"
+    with CatalogStore(str(db_path)) as store:
+        assert store.write_catalog(catalog, batch_size=7) == len(catalog["servers"])
+
+    loaded = load_catalog(str(db_path))
+    assert loaded == catalog
+    assert list(loaded["servers"]) == list(catalog["servers"])
+    with pytest.raises(TypeError):
+        loaded["servers"]["filesystem"]["name"] = "x"
+
+    # GUI 以環境變數指定目錄，介面與 JSON 相同
+    monkeypatch.setenv("MCP_CATALOG", str(db_path))
+    assert load_servers()["filesystem"] == catalog["servers"]["filesystem"]
+
+
+def test_store_upserts_only_changed_rows(tmp_path):
+    catalog = _catalog()
+    db_path = str(tmp_path / "mcp_catalog.db")
+    with CatalogStore(db_path) as store:
+        store.write_catalog(catalog)
+        mtime = (tmp_path / "mcp_catalog.db").stat().st_mtime_ns
+        assert store.write_catalog(catalog) == 0
+        assert (tmp_path / "mcp_catalog.db").stat().st_mtime_ns == mtime
+
+        ids = list(catalog["servers"])
+        assert store.ids() == ids and store.count() == len(ids)
+
+        catalog["servers"]["filesystem"] = dict(catalog["servers"]["filesystem"], description="changed")
+        del catalog["servers"][ids[-1]]
+        assert store.write_catalog(catalog) == 2
+        assert store.get("filesystem")["description"] == "changed"
+        assert store.get(ids[-1]) is None
+
+        assert store.upsert_servers({"new-server": {"id": "new-server", "name": "New"}}) == 1
+        assert store.ids()[-1] == "new-server"
+
+
+def test_reloading_store_catalog_reuses_read_connection(tmp_path):
+    catalog = _catalog()
+    db_path = tmp_path / "mcp_catalog.db"
+    with CatalogStore(str(db_path)) as store:
+        store.write_catalog(catalog)
+    servers = load_servers(str(db_path))
+
+    # 原地更新後重新載入：讀到新內容，但不另開連線
+    with CatalogStore(str(db_path)) as store:
+        store.delete_servers(["filesystem"])
+    os.utime(db_path, ns=(1, 1))
+    reloaded = load_servers(str(db_path))
+    assert reloaded is not servers and "filesystem" not in reloaded
+    assert reloaded._store is servers._store
+
+
+def test_load_catalog_rejects_invalid_database(tmp_path):
+    db_path = tmp_path / "broken.db"
+    db_path.write_bytes(b"not a database" * 100)
+    with pytest.raises(CatalogFormatError):
+        load_catalog(str(db_path))
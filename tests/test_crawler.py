@@ -0,0 +1,220 @@
+import asyncio
+import json
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from mcp_catalog import load_catalog, read_catalog, refresh_catalog
+from mcp_docker_crawler import IncompleteListingError, MCPDockerCrawler
+from mcp_rate_limit import RequestScheduler
+from benchmarks.hub_emulator import DockerHubEmulator
+
+
+class FakeResponse:
+    def __init__(self, payload, status_code=200, headers=None):
+        self.payload = payload
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    def close(self):
+        pass
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+    def json(self):
+        return self.payload
+
+
+class FakeHubSession:
+    """以記憶體資料模擬 Docker Hub API"""
+
+    def __init__(self, repos, page_size=2, throttled=None, failing_pages=()):
+        self.repos = repos
+        self.page_size = page_size
+        self.throttled = dict(throttled or {})  # 倉庫名稱 -> 回應 429 的次數
+        self.failing_pages = set(failing_pages)  # 一律回應 503 的列表頁碼
+        self.headers = {}
+        self.listing_calls = 0
+        self.repository_calls = 0
+
+    def request(self, method, url, params=None, **kwargs):
+        return self.get(url, params=params, **kwargs)
+
+    def get(self, url, params=None, **kwargs):
+        parts = urlsplit(url)
+        if "/v2/repositories/mcp/" not in parts.path:
+            # registry manifest 探測：假 Hub 沒有映像
+            return FakeResponse({}, status_code=404)
+        path = parts.path.split("/v2/repositories/mcp/", 1)[1]
+        if path == "":
+            self.listing_calls += 1
+            page = int(parse_qs(parts.query).get("page", ["1"])[0])
+            if page in self.failing_pages:
+                return FakeResponse({}, status_code=503)
+            start = (page - 1) * self.page_size
+            next_url = None
+            if start + self.page_size < len(self.repos):
+                next_url = f"https://hub.test/v2/repositories/mcp/?page={page + 1}"
+            return FakeResponse({"results": self.repos[start:start + self.page_size], "next": next_url})
+        self.repository_calls += 1
+        name, _, rest = path.partition("/")
+        if self.throttled.get(name):
+            self.throttled[name] -= 1
+            return FakeResponse({}, status_code=429, headers={"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "0"})
+        if rest == "tags/":
+            return FakeResponse({"results": [{"name": "latest"}]})
+        return FakeResponse({"name": name, "pull_count": len(name) * 5000})
+
+
+REPOS = [
+    {"name": "filesystem", "description": "Local files", "last_updated": "2025-05-01"},
+    {"name": "github", "description": "GitHub API", "last_updated": "2025-05-02"},
+    {"name": "time", "description": "", "last_updated": "2025-05-03"},
+]
+
+
+def test_async_crawl_matches_sequential_crawl():
+    crawler = MCPDockerCrawler(max_concurrency=4, cache_dir=None)
+    crawler.session = FakeHubSession(REPOS)
+
+    sequential = crawler.crawl_all_servers()
+    concurrent = asyncio.run(crawler.crawl_all_servers_async())
+
+    assert concurrent == sequential
+    assert list(concurrent) == ["filesystem", "github", "time"]
+    assert concurrent["time"]["description"] == "time MCP 服務器"
+
+
+def test_repository_iterator_follows_next_links():
+    crawler = MCPDockerCrawler(cache_dir=None)
+    crawler.session = FakeHubSession(REPOS, page_size=1)
+
+    names = [repo["name"] for repo in crawler.iter_mcp_user_repositories()]
+
+    assert names == ["filesystem", "github", "time"]
+    assert crawler.session.listing_calls == 3
+
+
+def test_failed_listing_page_aborts_crawl_without_writing_catalog(tmp_path):
+    output = tmp_path / "mcp_catalog.json"
+    crawler = MCPDockerCrawler(cache_dir=None)
+    crawler.scheduler = RequestScheduler(max_retries=1, backoff_base=0.001)
+    crawler.session = FakeHubSession(REPOS, page_size=1)
+    crawler.update_catalog(str(output))
+    before = output.read_bytes()
+    delta_dir = tmp_path / "mcp_catalog.deltas"
+    deltas = sorted(p.name for p in delta_dir.iterdir())
+
+    # 第 2 頁重試後仍失敗：不可回傳只有第 1 頁的結果
+    crawler.session = FakeHubSession(REPOS, page_size=1, failing_pages={2})
+    with pytest.raises(IncompleteListingError):
+        crawler.crawl_all_servers()
+    with pytest.raises(IncompleteListingError):
+        asyncio.run(crawler.crawl_all_servers_async())
+
+    # update_catalog 略過寫入，目錄與 delta 維持上一次成功的爬取
+    crawler.update_catalog(str(output))
+    assert output.read_bytes() == before
+    assert read_catalog(str(output))["revision"] == 1
+    assert sorted(p.name for p in delta_dir.iterdir()) == deltas
+
+
+def test_incremental_crawl_skips_unchanged_repositories():
+    crawler = MCPDockerCrawler(cache_dir=None)
+    crawler.session = FakeHubSession(REPOS)
+    known = crawler.crawl_all_servers()
+    known["github"]["last_updated"] = "2025-04-01"
+
+    crawler.session = FakeHubSession(REPOS)
+    servers = crawler.crawl_all_servers(known_servers=known)
+
+    # 只有 github 重新抓取詳細資訊與標籤
+    assert crawler.session.repository_calls == 2
+    assert servers["github"]["last_updated"] == "2025-05-02"
+    assert servers["filesystem"] is known["filesystem"]
+
+    crawler.session = FakeHubSession(REPOS)
+    concurrent = asyncio.run(crawler.crawl_all_servers_async(known_servers=servers))
+    assert crawler.session.repository_calls == 0
+    assert concurrent == servers
+
+
+def test_throttled_repository_is_retried_and_never_recorded_with_zero_downloads():
+    crawler = MCPDockerCrawler(cache_dir=None)
+    crawler.scheduler = RequestScheduler(max_concurrency=4, rate=1000, max_retries=2, backoff_base=0.001)
+
+    crawler.session = FakeHubSession(REPOS, throttled={"github": 2})
+    servers = crawler.crawl_all_servers()
+    assert servers["github"]["popularity"] == "高"
+    assert crawler.scheduler.throttled == 2
+    assert crawler.scheduler.concurrency.limit < 4
+
+    # 重試用盡時略過該倉庫，update_catalog 會保留既有項目
+    crawler.session = FakeHubSession(REPOS, throttled={"github": 10})
+    servers = crawler.crawl_all_servers()
+    assert "github" not in servers
+    assert set(servers) == {"filesystem", "time"}
+
+
+def test_rule_engine_derives_all_fields_in_one_pass(tmp_path):
+    crawler = MCPDockerCrawler(cache_dir=None)
+    derived = crawler.rules.derive("github", "Tools for the GitHub API")
+
+    # 'git' 與 'github' 在同一位置重疊，兩者都必須命中
+    assert derived["category"] == "檔案系統"
+    assert derived["security_level"] == "high"
+    assert derived["best_practices"]["cap_add"] == ["CHOWN", "DAC_OVERRIDE"]
+    assert derived["environment_vars"]["GITHUB_API_VERSION"] == "2022-11-28"
+    assert crawler.rules.derive("time", "")["docker_required"] is False
+
+    rules_file = tmp_path / "rules.json"
+    rules_file.write_text(json.dumps({
+        "fields": {
+            "category": {"scope": "name_or_description",
+                         "rules": [{"keywords": ["kube"], "value": "雲端"}],
+                         "default": "其他"}
+        }
+    }), encoding="utf-8")
+    custom = MCPDockerCrawler(cache_dir=None, rules_file=str(rules_file))
+    assert custom.classify_server_category("k8s", "Kubernetes kube API") == "雲端"
+
+
+def test_crawl_against_local_hub_emulator():
+    with DockerHubEmulator(repo_count=150, throttle_rate=0.05, seed=1) as emulator:
+        crawler = MCPDockerCrawler(base_url=emulator.base_url, cache_dir=None, request_rate=1000.0, max_retries=10,
+                                   registry_url=None)
+        crawler.scheduler.backoff_base = 0.001
+        servers = crawler.crawl_all_servers()
+
+    # 150 個倉庫需要跟隨兩次 next 連結，被注入 429 的請求重試後仍全數取得
+    assert len(servers) == 150
+    assert list(servers) == [repo["name"] for repo in emulator.repos]
+    assert servers["filesystem"]["category"] == "檔案系統"
+    assert emulator.stats["throttled"] > 0
+
+
+def test_update_catalog_writes_delta_only_when_content_changes(tmp_path):
+    output = tmp_path / "mcp_catalog.json"
+    crawler = MCPDockerCrawler(cache_dir=None)
+    crawler.session = FakeHubSession(REPOS[:2])
+    crawler.update_catalog(str(output))
+    first = read_catalog(str(output))
+    assert first["revision"] == 1
+    cached = load_catalog(str(output))
+
+    crawler.session = FakeHubSession(REPOS)
+    crawler.update_catalog(str(output))
+    crawler.update_catalog(str(output))
+
+    delta_dir = tmp_path / "mcp_catalog.deltas"
+    assert sorted(p.name for p in delta_dir.iterdir()) == ["1.json", "2.json"]
+    delta = json.loads((delta_dir / "2.json").read_text(encoding="utf-8"))
+    assert list(delta["added"]) == ["time"]
+    assert refresh_catalog(first, str(output)) == read_catalog(str(output))
+    # 快照不可用時，快取的唯讀目錄以 delta 更新，未變更的服務器項目沿用同一物件
+    (tmp_path / "mcp_catalog.snapshot").unlink()
+    reloaded = load_catalog(str(output))
+    assert reloaded == read_catalog(str(output))
+    assert reloaded["servers"]["github"] is cached["servers"]["github"]
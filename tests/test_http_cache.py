@@ -0,0 +1,65 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from mcp_http_cache import CachingHTTPAdapter, ResponseCache
+
+
+class ETagHandler(BaseHTTPRequestHandler):
+    body = b'{"name": "filesystem", "pull_count": 12345}'
+    etag = '"v1"'
+
+    def do_GET(self):
+        if self.headers.get("If-None-Match") == self.etag:
+            self.send_response(304)
+            self.send_header("ETag", self.etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("ETag", self.etag)
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def test_not_modified_response_is_served_from_disk(tmp_path):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ETagHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/v2/repositories/mcp/filesystem/"
+    try:
+        cache = ResponseCache(str(tmp_path), max_bytes=1024 * 1024)
+        session = requests.Session()
+        session.mount("http://", CachingHTTPAdapter(cache))
+
+        first = session.get(url)
+        second = session.get(url)
+
+        # 新的 session 從磁碟重建快取索引
+        reloaded = ResponseCache(str(tmp_path), max_bytes=1024 * 1024)
+        other = requests.Session()
+        other.mount("http://", CachingHTTPAdapter(reloaded))
+        third = other.get(url)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert first.json()["pull_count"] == 12345
+    assert second.status_code == 200 and second.json() == first.json()
+    assert getattr(second, "from_cache", False)
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+    assert third.json() == first.json() and reloaded.stats()["hits"] == 1
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = ResponseCache(str(tmp_path), max_bytes=300)
+    for name in ("a", "b", "c"):
+        cache.store(name, f"http://hub/{name}", {"ETag": name}, b"x" * 100)
+
+    assert cache.get("a") is None
+    assert cache.get("c") is not None
+    assert cache.stats()["size_bytes"] <= 300
@@ -0,0 +1,46 @@
+import requests
+
+from benchmarks.hub_emulator import DockerHubEmulator
+from mcp_docker_crawler import MCPDockerCrawler
+from mcp_rate_limit import RequestScheduler
+from mcp_registry import RegistryClient, split_image_reference
+
+
+def test_probe_follows_token_flow_and_reuses_known_digests():
+    with DockerHubEmulator(repo_count=3) as emulator:
+        client = RegistryClient(RequestScheduler(rate=1000.0, quota_headers=False), emulator.base_url)
+        session = requests.Session()
+
+        # 第 0 個倉庫為多架構 index，第 2 個為單一架構 manifest
+        multi = client.probe(session, "mcp/filesystem")
+        single = client.probe(session, "mcp/git")
+        assert multi["architectures"] == ["linux/amd64", "linux/arm64/v8"]
+        assert single["architectures"] == ["linux/amd64"]
+        assert len(multi["layers"]) == 3
+        assert multi["compressed_size"] == sum(layer["size"] for layer in multi["layers"])
+        assert multi["image_digest"].startswith("sha256:")
+        assert client.probe(session, "mcp/missing") is None
+        assert emulator.stats["tokens"] >= 2
+
+        # 摘要已知時只需 HEAD，不再 GET manifest
+        fresh = RegistryClient(RequestScheduler(rate=1000.0, quota_headers=False), emulator.base_url)
+        fresh.remember([{"id": "filesystem", **multi}])
+        gets = emulator.stats["manifest_gets"]
+        assert fresh.probe(session, "mcp/filesystem") == multi
+        assert emulator.stats["manifest_gets"] == gets
+
+
+def test_crawl_records_image_manifest_in_catalog_entries():
+    with DockerHubEmulator(repo_count=4) as emulator:
+        crawler = MCPDockerCrawler(base_url=emulator.base_url, cache_dir=None, request_rate=1000.0,
+                                   registry_url=emulator.base_url)
+        servers = crawler.crawl_all_servers()
+
+    assert set(servers["github"]) >= {"image_digest", "compressed_size", "layers", "architectures"}
+    assert servers["git"]["architectures"] == ["linux/amd64"]
+
+
+def test_split_image_reference():
+    assert split_image_reference("mcp/time") == ("mcp/time", "latest")
+    assert split_image_reference("mcp/time:1.0") == ("mcp/time", "1.0")
+    assert split_image_reference("localhost:5000/mcp/time") == ("localhost:5000/mcp/time", "latest")
@@ -0,0 +1,76 @@
+import json
+
+from mcp_search import SearchIndex, bitset_to_docs, docs_to_bitset, facet_value, server_search_text
+
+
+def _scan(servers, query):
+    query = query.lower()
+    return [server_id for server_id, info in servers.items() if query in server_search_text(server_id, info)]
+
+
+def test_search_index_matches_full_scan():
+    with open("mcp_catalog.json", "r", encoding="utf-8") as f:
+        servers = json.load(f)["servers"]
+    index = SearchIndex(servers)
+
+    assert len(index) == len(servers)
+    for query in ["", "g", "fi", "FILE", "git", "資料庫", "開發", "docker", "極高", "no-such-server"]:
+        assert index.search(query) == _scan(servers, query), query
+
+
+def test_search_index_does_not_match_across_fields():
+    servers = {
+        "alpha": {"name": "Foo", "description": "bar", "use_cases": ["Log analysis", "Metrics"]},
+        "beta": {"name": "Foobar", "category": "工具"},
+    }
+    index = SearchIndex(servers)
+
+    assert index.search("foobar") == ["beta"]
+    assert index.search("oba") == ["beta"]
+    assert index.search("log anal") == ["alpha"]
+    assert index.search("工具") == ["beta"]
+    assert index.search("具") == ["beta"]
+
+
+def test_ranked_search_orders_by_relevance_then_popularity():
+    servers = {
+        "notes": {"name": "Notes", "description": "Keep notes, mentions a database once", "popularity": "低"},
+        "kv": {"name": "KV", "description": "Key value store", "use_cases": ["Database cache"], "popularity": "中等"},
+        "postgres": {"name": "Postgres Database", "description": "Query a database", "popularity": "高"},
+        "sqlite": {"name": "SQLite Database", "description": "Query a database", "popularity": "極高"},
+    }
+    index = SearchIndex(servers)
+
+    ranked = index.ranked_search("datab")
+    assert sorted(ranked) == sorted(index.search("datab"))
+    # 名稱命中權重最高，同分時熱門程度高者在前
+    assert ranked[:2] == ["sqlite", "postgres"]
+    assert ranked[-1] == "notes"
+    assert index.ranked_search("datab", limit=1)[0] == "sqlite"
+    # 只命中 id 中間的字串時沒有文字分數，仍保留在結果中
+    assert index.ranked_search("ostgr") == ["postgres"]
+
+
+def test_facet_filters_combine_with_and_and_report_counts():
+    with open("mcp_catalog.json", "r", encoding="utf-8") as f:
+        servers = json.load(f)["servers"]
+    index = SearchIndex(servers)
+    selected = {"security_level": "high", "official": True, "category": "數據庫", "popularity": None}
+
+    expected = [server_id for server_id, info in servers.items()
+                if all(value is None or facet_value(info, facet) == value for facet, value in selected.items())]
+    assert index.filter("", selected) == expected
+    assert sorted(index.filter("sql", selected)) == sorted(i for i in expected if i in index.search("sql"))
+
+    counts = index.facet_counts("", selected)
+    # 每個選項的數量等於改選該值後的結果數
+    for facet, values in counts.items():
+        for value, count in values.items():
+            assert count == len(index.filter("", dict(selected, **{facet: value}))), (facet, value)
+    assert sum(counts["docker_required"].values()) == len(expected)
+
+
+def test_bitset_round_trip():
+    docs = [0, 3, 7, 8, 64, 1000]
+    assert bitset_to_docs(docs_to_bitset(docs)) == docs
+    assert bitset_to_docs(0) == []
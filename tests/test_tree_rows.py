@@ -0,0 +1,210 @@
+from mcp_tree_rows import RowCache, TreeRows, VirtualTreeRows
+
+
+class FakeTree:
+    """記錄 Tk 呼叫的 Treeview 替身"""
+
+    def __init__(self):
+        self.calls = []
+        self.children = []
+
+    def insert(self, parent, index, iid, values, tags):
+        self.calls.append(("insert", iid))
+        self.children.append(iid)
+
+    def delete(self, *iids):
+        self.calls.append(("delete",) + iids)
+        self.children = [iid for iid in self.children if iid not in iids]
+
+    def set(self, iid, column, value):
+        self.calls.append(("set", iid, column, value))
+
+    def item(self, iid, **options):
+        self.calls.append(("item", iid, options))
+
+    def set_children(self, parent, *iids):
+        self.calls.append(("set_children",) + iids)
+        self.children = list(iids)
+
+
+def make_rows(ids):
+    tree = FakeTree()
+    selected = set()
+    rows = TreeRows(tree, lambda server_id: (("✔" if server_id in selected else "▫", server_id), ("wrap",)),
+                    ("selected", "name"))
+    rows.show(ids)
+    tree.calls.clear()
+    return tree, rows, selected
+
+
+def test_update_sends_only_changed_cells():
+    tree, rows, selected = make_rows(["a", "b", "c"])
+
+    selected.add("b")
+    rows.update(["b"])
+    assert tree.calls == [("set", "b", "selected", "✔")]
+
+    # 未變更或未顯示的列不送出任何呼叫
+    tree.calls.clear()
+    rows.update(["a", "b", "missing"])
+    assert tree.calls == []
+
+
+def test_show_diffs_visible_rows():
+    tree, rows, _ = make_rows(["a", "b", "c", "d"])
+
+    rows.show(["a", "b", "c", "d"])
+    assert tree.calls == []
+
+    rows.show(["a", "c", "e"])
+    assert tree.calls == [("delete", "b", "d"), ("insert", "e")]
+    assert list(rows) == tree.children == ["a", "c", "e"]
+
+    # 順序改變時一次重新排列
+    tree.calls.clear()
+    rows.show(["e", "a", "c"])
+    assert tree.calls == [("set_children", "e", "a", "c")]
+    assert list(rows) == ["e", "a", "c"] and len(rows) == 3
+
+    tree.calls.clear()
+    rows.clear()
+    assert tree.calls == [("delete", "e", "a", "c")]
+    assert "a" not in rows and tree.children == []
+
+
+def test_show_incrementally_can_be_abandoned_between_chunks():
+    tree, rows, _ = make_rows(["a", "b"])
+
+    steps = rows.show_incrementally(["b", "c", "d", "e", "f"], chunk_size=2)
+    next(steps)  # 刪除 a
+    next(steps)  # 插入 c、d
+    assert tree.calls == [("delete", "a"), ("insert", "c"), ("insert", "d")]
+    assert list(rows) == tree.children == ["b", "c", "d"]
+
+    # 較新的搜尋取代未完成的分段，列狀態仍與 Tk 一致
+    tree.calls.clear()
+    rows.show(["d", "b"])
+    assert tree.calls == [("delete", "c"), ("set_children", "d", "b")]
+    assert list(rows) == tree.children == ["d", "b"]
+
+
+def test_row_cache_formats_each_server_once_until_invalidated():
+    formatted = []
+    names = {"a": "A", "b": "B"}
+
+    def format_row(server_id):
+        formatted.append(server_id)
+        return (names[server_id],), ()
+
+    cache = RowCache(format_row)
+    assert cache["a"] == (("A",), ()) and cache["a"] is cache["a"]
+    cache["b"]
+    assert formatted == ["a", "b"] and len(cache) == 2
+
+    names["a"] = "A2"
+    cache.invalidate(["a", "missing"])
+    assert cache["a"] == (("A2",), ()) and cache["b"] == (("B",), ())
+    assert formatted == ["a", "b", "a"]
+
+
+class FakeVirtualTree(FakeTree):
+    """模擬可見列數固定的 Treeview：捲動後以 yscrollcommand 回報可見範圍"""
+
+    def __init__(self, visible):
+        super().__init__()
+        self.visible = visible
+        self.selected = []
+        self.focused = ""
+        self.idle = []
+
+    def cget(self, option):
+        return 10
+
+    def configure(self, yscrollcommand):
+        self.yscrollcommand = yscrollcommand
+
+    def yview_moveto(self, fraction):
+        size = len(self.children)
+        self.yscrollcommand(str(fraction), str(min(1.0, fraction + self.visible / size)))
+
+    def selection(self):
+        return tuple(self.selected)
+
+    def selection_set(self, items):
+        self.selected = list(items)
+
+    def focus(self, item=None):
+        if item is None:
+            return self.focused
+        self.focused = item
+
+    def after_idle(self, callback):
+        self.idle.append(callback)
+
+
+class FakeScrollbar:
+    def configure(self, command):
+        self.command = command
+
+    def set(self, first, last):
+        self.position = (first, last)
+
+
+def test_virtual_rows_materialize_only_visible_window():
+    tree, scrollbar = FakeVirtualTree(visible=10), FakeScrollbar()
+    rows = VirtualTreeRows(tree, lambda server_id: ((server_id,), ()), ("name",), scrollbar, overscan=5)
+    ids = [f"s{i}" for i in range(10000)]
+    for server_id in ids:
+        rows.insert(server_id)
+    # Tk 項目數固定為可見列加上前後 overscan，與列表大小無關
+    assert len(rows) == 10000 and len(tree.children) == 20
+    assert rows.server_id(tree.children[0]) == "s0"
+    tree.idle.pop()()
+    assert tree.idle == [] and scrollbar.position == (0.0, 10 / 10000)
+
+    tree.selected = [tree.children[3]]
+    scrollbar.command("moveto", "0.5")
+    assert rows.server_id(tree.children[5]) == "s5000"
+    assert tree.selected == []
+
+    # 更新不在可見範圍的列不需要 Tk 呼叫
+    tree.calls.clear()
+    rows.update(["s0"])
+    assert tree.calls == []
+
+    scrollbar.command("scroll", "-1", "pages")
+    tree.idle.pop()()
+    assert scrollbar.position == (4990 / 10000, 5000 / 10000)
+    assert rows.server_id(tree.children[5]) == "s4990"
+
+    rows.show(ids[:3])
+    assert len(tree.children) == 3 and list(rows) == ids[:3]
+    rows.clear()
+    assert tree.children == [] and len(rows) == 0
+
+
+def test_virtual_rows_keep_selection_focus_and_updates_on_their_server():
+    labels = {}
+    tree, scrollbar = FakeVirtualTree(visible=10), FakeScrollbar()
+    rows = VirtualTreeRows(tree, lambda server_id: ((labels.get(server_id, server_id),), ()), ("name",),
+                           scrollbar, overscan=5)
+    for i in range(100):
+        rows.insert(f"s{i}")
+    tree.selected, tree.focused = ["slot3", "slot12"], "slot12"
+
+    # 捲動超過 overscan 一半時重新繫結：slot 內容平移，選取與焦點跟著服務器
+    scrollbar.command("moveto", "0.08")
+    assert rows.server_id("slot0") == "s3"
+    assert [rows.server_id(item) for item in tree.selected] == ["s3", "s12"]
+    assert rows.server_id(tree.focused) == "s12" and tree.focused == "slot9"
+
+    # 重新繫結後的更新送到目前顯示該服務器的 slot
+    tree.calls.clear()
+    labels["s12"] = "changed"
+    rows.update(["s12"])
+    assert tree.calls == [("set", "slot9", "name", "changed")]
+
+    # 刪除前面的列時選取與焦點也跟著服務器
+    rows.delete(["s0", "s1", "s2", "s3"])
+    assert [rows.server_id(item) for item in tree.selected] == ["s12"]
+    assert rows.server_id(tree.focused) == "s12"